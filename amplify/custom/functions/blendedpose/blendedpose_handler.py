@@ -6,20 +6,27 @@ import sys
 from threading import Thread
 
 import boto3
-from boto3.dynamodb.conditions import Key
 import uuid
 import pathlib
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.dirname(SCRIPT_DIR))
+# shared modules are deployed as the common layer, add them for local runs
+sys.path.append(os.path.join(os.path.dirname(SCRIPT_DIR), 'layers', 'common', 'python'))
 
-from blending.smooth_video import smooth_video
+from blending import keypoint_stream
+from blending.smooth_video import smooth_keypoint_stream, smooth_video
+from genasl.gloss_resolver import GlossResolver
+from genasl.metrics import Metrics
 
 pose_bucket = os.environ['POSE_BUCKET']
 asl_data_bucket = os.environ['ASL_DATA_BUCKET']
 key_prefix = os.environ["KEY_PREFIX"]
 table_name = os.environ['TABLE_NAME']
 file_type='webm'
+# created once per execution environment so its cache survives warm starts
+gloss_resolver = GlossResolver(table_name)
+metrics = Metrics('blendedpose')
 
 def lambda_handler(event, context):
     """.
@@ -37,36 +44,31 @@ def lambda_handler(event, context):
     ------
         dict: Object containing details of the stock selling transaction
     """
+    metrics.reset()
     # Get the Gloss from event
-    return gloss_to_video(event.get("Gloss"))
+    output_mode = event.get('OutputMode', 'video')
+    response = gloss_to_video(event.get("Gloss"), output_mode=output_mode)
+    return metrics.respond(response, event, OutputMode=output_mode)
 
 
-def gloss_to_video(gloss_sentence,pose_only=False, pre_sign=True):
-    uniq_key = str(uuid.uuid4())
+def gloss_to_video(gloss_sentence,pose_only=False, pre_sign=True, output_mode='video'):
+    """Render a gloss sentence.
 
-    sign_ids = []
+    With output_mode='video' the URL points to a webm of the smoothed
+    skeleton. With output_mode='keypoints' it points to the smoothed
+    keypoints and the skeleton tables (see blending/keypoint_stream.py), a
+    few KB the client draws itself instead of a rendered video.
+    """
+    uniq_key = str(uuid.uuid4())
 
-    for gloss in gloss_sentence.split(" "):
-        gloss = re.sub('[,!?.]', '', gloss.strip())
-        # query dynamodb table
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
-        response = table.query(
-            KeyConditionExpression=Key('Gloss').eq(gloss)
-        )
-        # for now pick the first item in the response
-        if response['Count'] == 0:
-            #if not sign found finger spell it
-            for c in gloss:
-                response = table.query(
-                    KeyConditionExpression=Key('Gloss').eq(c)
-                )
-                if response['Count'] > 0:
-                    sign_ids.append(response['Items'][0]['SignID'])
-        else:
-            sign_ids.append(response['Items'][0]['SignID'])
+    with metrics.span('lookup'):
+        sign_ids = gloss_resolver.resolve(gloss_sentence)
     # print(sign_ids)
 
+    if output_mode == 'keypoints':
+        return {
+            'KeypointStreamURL': create_keypoint_stream("smooth_pose", sign_ids, uniq_key, pre_sign)
+        }
     return {
         'SmoothPoseURL': create_smooth_videos("smooth_pose",sign_ids, uniq_key, pre_sign)
              }
@@ -81,17 +83,47 @@ def create_smooth_videos(video_type, sign_ids, uniq_key,pre_sign):
     for sign_id in sign_ids:
         keypoint_prefixes.append(f"{key_prefix}keypoints/{sign_id}")
     output_file=f"{temp_folder}{video_type}.mp4"
-    smooth_video(pose_bucket, keypoint_prefixes,output_file,file_type=file_type)
+    with metrics.span('render'):
+        smooth_video(pose_bucket, keypoint_prefixes,output_file,file_type=file_type)
     if pre_sign:
-        s3.upload_file(output_file, asl_data_bucket, f"{uniq_key}/{video_type}.{file_type}")
-        video_url = s3.generate_presigned_url(
+        with metrics.span('upload'):
+            s3.upload_file(output_file, asl_data_bucket, f"{uniq_key}/{video_type}.{file_type}")
+        with metrics.span('presign'):
+            video_url = s3.generate_presigned_url(
+                ClientMethod='get_object',
+                Params={
+                    'Bucket': asl_data_bucket,
+                    'Key': f"{uniq_key}/{video_type}.{file_type}"
+                },
+                ExpiresIn=604800
+            )
+        return video_url
+    else:
+        return f"{temp_folder}{video_type}.{file_type}"
+
+
+def create_keypoint_stream(stream_type, sign_ids, uniq_key, pre_sign):
+    s3 = boto3.client('s3')
+    temp_folder = f"/tmp/{uniq_key}/"
+    pathlib.Path(temp_folder).mkdir(parents=True, exist_ok=True)
+    keypoint_prefixes = [f"{key_prefix}keypoints/{sign_id}" for sign_id in sign_ids]
+    output_file = f"{temp_folder}{stream_type}{keypoint_stream.EXTENSION}"
+    with metrics.span('encode'):
+        smooth_keypoint_stream(pose_bucket, keypoint_prefixes, output_file)
+    if not pre_sign:
+        return output_file
+    output_key = f"{uniq_key}/{stream_type}{keypoint_stream.EXTENSION}"
+    with metrics.span('upload'):
+        # browsers inflate it on the fly
+        s3.upload_file(output_file, asl_data_bucket, output_key,
+                       ExtraArgs={'ContentType': keypoint_stream.CONTENT_TYPE,
+                                  'ContentEncoding': 'gzip'})
+    with metrics.span('presign'):
+        return s3.generate_presigned_url(
             ClientMethod='get_object',
             Params={
                 'Bucket': asl_data_bucket,
-                'Key': f"{uniq_key}/{video_type}.{file_type}"
+                'Key': output_key
             },
             ExpiresIn=604800
         )
-        return video_url
-    else:
-        return f"{temp_folder}{video_type}.{file_type}"
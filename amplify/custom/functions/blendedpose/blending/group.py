@@ -4,10 +4,9 @@
 # ------------------------------------------------------------------------------
 
 import numpy as np
-import torch
-from munkres import Munkres
 
-from mmpose.core.evaluation import post_dark_udp
+# torch, munkres, scipy and mmpose are imported where they are used, so that
+# importing the blending package does not load them
 
 
 def _py_max_match(scores):
@@ -19,15 +18,77 @@ def _py_max_match(scores):
     Returns:
         np.ndarray: best match.
     """
+    from munkres import Munkres
+
     m = Munkres()
     tmp = m.compute(scores)
     tmp = np.array(tmp).astype(int)
     return tmp
 
 
+def _scipy_max_match(scores):
+    """Apply the Hungarian algorithm of scipy, vectorized, to get the best
+    match.
+
+    Args:
+        scores(np.ndarray): cost matrix.
+
+    Returns:
+        np.ndarray: best match.
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    rows, cols = linear_sum_assignment(scores)
+    return np.stack((rows, cols), axis=1).astype(int)
+
+
+def _greedy_max_match(scores):
+    """Match the pairs of lowest cost first.
+
+    The match is not always the best one, but it only needs a sort of the
+    cost matrix, for matrices too large for the Hungarian algorithm.
+
+    Args:
+        scores(np.ndarray): cost matrix.
+
+    Returns:
+        np.ndarray: match, sorted by row.
+    """
+    num_rows, num_cols = scores.shape
+    free_rows = np.ones(num_rows, dtype=bool)
+    free_cols = np.ones(num_cols, dtype=bool)
+    pairs = []
+    for index in np.argsort(scores, axis=None, kind='stable'):
+        row, col = divmod(int(index), num_cols)
+        if free_rows[row] and free_cols[col]:
+            pairs.append((row, col))
+            free_rows[row] = free_cols[col] = False
+            if len(pairs) == min(num_rows, num_cols):
+                break
+    return np.array(sorted(pairs), dtype=int).reshape(-1, 2)
+
+
+_MATCHERS = {
+    'munkres': _py_max_match,
+    'scipy': _scipy_max_match,
+    'greedy': _greedy_max_match,
+}
+
+
+def _max_match(scores, params):
+    """Match with the solver of ``params.matcher``, or greedily if the cost
+    matrix has more rows than ``params.greedy_match_size``."""
+    matcher = params.matcher
+    if (params.greedy_match_size is not None
+            and scores.shape[0] > params.greedy_match_size):
+        matcher = 'greedy'
+    return _MATCHERS[matcher](scores)
+
+
 def _match_by_tag(inp, params):
-    """Match joints by tags. Use Munkres algorithm to calculate the best match
-    for keypoints grouping.
+    """Match joints by tags. Use the Hungarian algorithm (or greedy matching,
+    see ``params.matcher``) to calculate the best match for keypoints
+    grouping.
 
     Note:
         number of keypoints: K
@@ -101,7 +162,7 @@ def _match_by_tag(inp, params):
                               dtype=np.float32) + 1e10),
                     axis=1)
 
-            pairs = _py_max_match(diff_normed)
+            pairs = _max_match(diff_normed, params)
             for row, col in pairs:
                 if (row < num_added and col < num_grouped
                         and diff_saved[row][col] < params.tag_threshold):
@@ -139,6 +200,14 @@ class _Params:
         self.tag_threshold = cfg['tag_threshold']
         self.use_detection_val = cfg['use_detection_val']
         self.ignore_too_much = cfg['ignore_too_much']
+        # the assignment solver, 'munkres', 'scipy' or 'greedy', and the
+        # number of joints above which matching falls back to greedy. scipy
+        # is faster but breaks ties between equal matches differently, so
+        # it is opt-in to keep the groups of existing configs
+        self.matcher = cfg.get('matcher', 'munkres')
+        self.greedy_match_size = cfg.get('greedy_match_size', None)
+        assert self.matcher in _MATCHERS, (
+            f'matcher should be one of {list(_MATCHERS)}, got {self.matcher}')
 
         if self.num_joints == 17:
             self.joint_order = [
@@ -153,6 +222,7 @@ class HeatmapParser:
     """The heatmap parser for post processing."""
 
     def __init__(self, cfg):
+        import torch
         self.params = _Params(cfg)
         self.tag_per_joint = cfg['tag_per_joint']
         self.pool = torch.nn.MaxPool2d(cfg['nms_kernel'], 1,
@@ -169,6 +239,7 @@ class HeatmapParser:
         Returns:
             torch.Tensor: Heatmaps after nms.
         """
+        import torch
 
         maxm = self.pool(heatmaps)
         maxm = torch.eq(maxm, heatmaps).float()
@@ -223,6 +294,8 @@ class HeatmapParser:
             - val_k (np.ndarray[NxKxM]):
                 top k value of feature map per keypoint.
         """
+        import torch
+
         heatmaps = self.nms(heatmaps)
         N, K, H, W = heatmaps.size()
         heatmaps = heatmaps.view(N, K, -1)
@@ -253,6 +326,9 @@ class HeatmapParser:
     def adjust(results, heatmaps):
         """Adjust the coordinates for better accuracy.
 
+        Moves every detected joint by a quarter pixel towards its higher
+        neighbour, for all the people and joints of an image at once.
+
         Note:
             batch size: N
             number of keypoints: K
@@ -263,27 +339,28 @@ class HeatmapParser:
             results (list(np.ndarray)): Keypoint predictions.
             heatmaps (torch.Tensor[NxKxHxW]): Heatmaps.
         """
+        if hasattr(heatmaps, 'cpu'):
+            heatmaps = heatmaps.cpu().numpy()
         _, _, H, W = heatmaps.shape
+        quarter = np.float32(0.25)
         for batch_id, people in enumerate(results):
-            for people_id, people_i in enumerate(people):
-                for joint_id, joint in enumerate(people_i):
-                    if joint[2] > 0:
-                        x, y = joint[0:2]
-                        xx, yy = int(x), int(y)
-                        tmp = heatmaps[batch_id][joint_id]
-                        if tmp[min(H - 1, yy + 1), xx] > tmp[max(0, yy - 1),
-                                                             xx]:
-                            y += 0.25
-                        else:
-                            y -= 0.25
-
-                        if tmp[yy, min(W - 1, xx + 1)] > tmp[yy,
-                                                             max(0, xx - 1)]:
-                            x += 0.25
-                        else:
-                            x -= 0.25
-                        results[batch_id][people_id, joint_id,
-                                          0:2] = (x + 0.5, y + 0.5)
+            if len(people) == 0:
+                continue
+            # [M, K] indices of the detected joints
+            people_ids, joint_ids = np.nonzero(people[..., 2] > 0)
+            x = people[people_ids, joint_ids, 0]
+            y = people[people_ids, joint_ids, 1]
+            xx, yy = x.astype(int), y.astype(int)
+            tmp = heatmaps[batch_id]
+
+            up = (tmp[joint_ids, np.minimum(H - 1, yy + 1), xx] >
+                  tmp[joint_ids, np.maximum(0, yy - 1), xx])
+            y = y + np.where(up, quarter, -quarter)
+            right = (tmp[joint_ids, yy, np.minimum(W - 1, xx + 1)] >
+                     tmp[joint_ids, yy, np.maximum(0, xx - 1)])
+            x = x + np.where(right, quarter, -quarter)
+            people[people_ids, joint_ids, 0] = x + np.float32(0.5)
+            people[people_ids, joint_ids, 1] = y + np.float32(0.5)
         return results
 
     @staticmethod
@@ -312,56 +389,54 @@ class HeatmapParser:
         if len(tag.shape) == 3:
             tag = tag[..., None]
 
-        tags = []
-        for i in range(K):
-            if keypoints[i, 2] > 0:
-                # save tag value of detected keypoint
-                x, y = keypoints[i][:2].astype(int)
-                x = np.clip(x, 0, W - 1)
-                y = np.clip(y, 0, H - 1)
-                tags.append(tag[i, y, x])
+        # save tag value of detected keypoints
+        detected = np.nonzero(keypoints[:, 2] > 0)[0]
+        x, y = keypoints[detected, :2].astype(int).T
+        x = np.clip(x, 0, W - 1)
+        y = np.clip(y, 0, H - 1)
+        tags = tag[detected, y, x]
 
         # mean tag of current detected people
         prev_tag = np.mean(tags, axis=0)
-        results = []
-
-        for _heatmap, _tag in zip(heatmap, tag):
-            # distance of all tag values with mean tag of
-            # current detected people
-            distance_tag = (((_tag -
-                              prev_tag[None, None, :])**2).sum(axis=2)**0.5)
-            norm_heatmap = _heatmap - np.round(distance_tag)
-
-            # find maximum position
-            y, x = np.unravel_index(np.argmax(norm_heatmap), _heatmap.shape)
-            xx = x.copy()
-            yy = y.copy()
-            # detection score at maximum position
-            val = _heatmap[y, x]
-            if not use_udp:
-                # offset by 0.5
-                x += 0.5
-                y += 0.5
-
-            # add a quarter offset
-            if _heatmap[yy, min(W - 1, xx + 1)] > _heatmap[yy, max(0, xx - 1)]:
-                x += 0.25
-            else:
-                x -= 0.25
 
-            if _heatmap[min(H - 1, yy + 1), xx] > _heatmap[max(0, yy - 1), xx]:
-                y += 0.25
-            else:
-                y -= 0.25
-
-            results.append((x, y, val))
-        results = np.array(results)
-
-        if results is not None:
-            for i in range(K):
-                # add keypoint if it is not detected
-                if results[i, 2] > 0 and keypoints[i, 2] == 0:
-                    keypoints[i, :3] = results[i, :3]
+        # distance of all tag values with mean tag of current detected
+        # people, [K, H, W]
+        distance_tag = tag - prev_tag[None, None, None, :]
+        if distance_tag.shape[3] == 1:
+            # sqrt(x**2) is |x| in floating point
+            distance_tag = np.abs(distance_tag[..., 0], out=distance_tag[..., 0])
+        else:
+            distance_tag = np.sqrt(np.square(distance_tag, out=distance_tag).sum(axis=3))
+        norm_heatmap = heatmap - np.round(distance_tag, out=distance_tag)
+
+        # find maximum position of each keypoint
+        y, x = np.unravel_index(
+            np.argmax(norm_heatmap.reshape(K, -1), axis=1), (H, W))
+        xx = x.copy()
+        yy = y.copy()
+        joints = np.arange(K)
+        # detection score at maximum position
+        val = heatmap[joints, y, x]
+        x = x.astype(np.float64)
+        y = y.astype(np.float64)
+        if not use_udp:
+            # offset by 0.5
+            x += 0.5
+            y += 0.5
+
+        # add a quarter offset
+        right = (heatmap[joints, yy, np.minimum(W - 1, xx + 1)] >
+                 heatmap[joints, yy, np.maximum(0, xx - 1)])
+        x += np.where(right, 0.25, -0.25)
+        up = (heatmap[joints, np.minimum(H - 1, yy + 1), xx] >
+              heatmap[joints, np.maximum(0, yy - 1), xx])
+        y += np.where(up, 0.25, -0.25)
+
+        # add keypoint if it is not detected
+        missing = (val > 0) & (keypoints[:, 2] == 0)
+        keypoints[missing, 0] = x[missing]
+        keypoints[missing, 1] = y[missing]
+        keypoints[missing, 2] = val[missing]
 
         return keypoints
 
@@ -390,6 +465,7 @@ class HeatmapParser:
 
         if adjust:
             if self.use_udp:
+                from mmpose.core.evaluation import post_dark_udp
                 for i in range(len(results)):
                     if results[i].shape[0] > 0:
                         results[i][..., :2] = post_dark_udp(
@@ -404,13 +480,13 @@ class HeatmapParser:
 
         if refine:
             results = results[0]
+            heatmap_numpy = heatmaps[0].cpu().numpy()
+            tag_numpy = tags[0].cpu().numpy()
+            if not self.tag_per_joint:
+                tag_numpy = np.tile(tag_numpy,
+                                    (self.params.num_joints, 1, 1, 1))
             # for every detected person
             for i in range(len(results)):
-                heatmap_numpy = heatmaps[0].cpu().numpy()
-                tag_numpy = tags[0].cpu().numpy()
-                if not self.tag_per_joint:
-                    tag_numpy = np.tile(tag_numpy,
-                                        (self.params.num_joints, 1, 1, 1))
                 results[i] = self.refine(
                     heatmap_numpy, tag_numpy, results[i], use_udp=self.use_udp)
             results = [results]
@@ -422,6 +498,7 @@ class HeatmapOffsetParser:
     """The heatmap&offset parser for post processing."""
 
     def __init__(self, cfg):
+        import torch
         super(HeatmapOffsetParser, self).__init__()
 
         self.num_joints = cfg['num_joints']
@@ -447,6 +524,8 @@ class HeatmapOffsetParser:
         Returns:
             torch.Tensor[NxKxHxW]: A tensor containing pose for each pixel.
         """
+        import torch
+
         h, w = offsets.shape[-2:]
         offsets = offsets.view(self.num_joints, -1, h, w)
 
@@ -478,6 +557,8 @@ class HeatmapOffsetParser:
                 instances.
             - score (torch.Tensor): Score of detected instances.
         """
+        import torch
+
         assert heatmap.size(0) == 1 and heatmap.size(1) == 1
         max_map = torch.eq(heatmap, self.pool(heatmap)).float()
         heatmap = heatmap * max_map
@@ -506,6 +587,8 @@ class HeatmapOffsetParser:
             torch.Tensor[NxKx4]: A tensor containing predicted pose and
                 score for each instance.
         """
+        import torch
+
 
         posemap = self._offset_to_pose(offsets)
         inst_indexes, inst_scores = self._get_maximum_from_heatmap(
@@ -536,6 +619,8 @@ class HeatmapOffsetParser:
         Returns:
             torch.Tensor[NxKx4]: poses with refined scores.
         """
+        import torch
+
         normed_poses = poses.unsqueeze(0).permute(2, 0, 1, 3).contiguous()
         normed_poses = torch.cat((
             normed_poses.narrow(3, 0, 1) / (heatmaps.size(3) - 1) * 2 - 1,
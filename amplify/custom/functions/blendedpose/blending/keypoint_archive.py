@@ -0,0 +1,73 @@
+import struct
+
+import numpy as np
+
+# One object per sign holding all its keypoint frames:
+#
+#   magic "GKPA" | version u8 | dtype u8 | 2 pad | T u32 | K u32 | C u32 | 12 pad
+#
+# followed by the [T, K, C] array in C order. The header is 32 bytes so the
+# array stays aligned for np.frombuffer.
+MAGIC = b'GKPA'
+VERSION = 1
+HEADER = struct.Struct('<4sBB2xIII12x')
+DTYPES = {1: np.dtype('<f2'), 2: np.dtype('<f4')}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+EXTENSION = '.kpa'
+
+
+def archive_key(folder_prefix):
+    """Return the archive key of a sign from its per-frame folder prefix,
+    e.g. ``.../keypoints/1012`` -> ``.../keypoints-packed/1012.kpa``.
+
+    The archives live outside the per-frame folder so that listing a sign's
+    frames never returns them.
+    """
+    folder, sign_id = folder_prefix.rstrip('/').rsplit('/', 1)
+    return f'{folder}-packed/{sign_id}{EXTENSION}'
+
+
+def pack(keypoints, dtype=np.float32):
+    """Serialize a [T, K, C] keypoint array as an archive.
+
+    Args:
+        keypoints (np.ndarray): The keypoint frames of a sign.
+        dtype: float16 or float32. float16 halves the size at a precision of
+            0.5 px for coordinates between 512 and 1024.
+
+    Returns:
+        bytes: The archive.
+    """
+    dtype = np.dtype(dtype).newbyteorder('<')
+    assert dtype in DTYPE_CODES, f'Unsupported archive dtype {dtype}'
+    keypoints = np.ascontiguousarray(keypoints, dtype=dtype)
+    assert keypoints.ndim == 3, ('Input should be an array with shape '
+                                 f'[T, K, C], but got shape {keypoints.shape}')
+    T, K, C = keypoints.shape
+    return HEADER.pack(MAGIC, VERSION, DTYPE_CODES[dtype], T, K, C) + keypoints.tobytes()
+
+
+def read_header(buffer):
+    """Return (dtype, T, K, C) from the first ``HEADER.size`` bytes of an
+    archive."""
+    magic, version, dtype_code, T, K, C = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION or dtype_code not in DTYPES:
+        raise ValueError(f'Not a version {VERSION} keypoint archive')
+    return DTYPES[dtype_code], T, K, C
+
+
+def unpack(buffer):
+    """Return the [T, K, C] keypoint array of an archive.
+
+    The array is a read only view of ``buffer``, nothing is copied.
+    """
+    dtype, T, K, C = read_header(buffer)
+    return np.frombuffer(buffer, dtype=dtype, count=T * K * C,
+                         offset=HEADER.size).reshape(T, K, C)
+
+
+def load(s3, bucket_name, key):
+    """Load the keypoints of a sign with a single GET."""
+    response = s3.get_object(Bucket=bucket_name, Key=key)
+    return unpack(response['Body'].read())
+
@@ -0,0 +1,97 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+
+def frame_number(key):
+    """Return the frame number of a per-frame key, e.g. ``.../12.npy`` -> 12."""
+    return int(os.path.basename(key).split('.')[0])
+
+
+def list_frames(s3, bucket_name, folder_prefix):
+    """Return the .npy keys of a sign in numeric frame order.
+
+    S3 lists keys in lexicographic order (``10.npy`` before ``2.npy``), so
+    they are sorted by frame number here.
+    """
+    # the trailing slash keeps keypoints/12 from matching keypoints/120
+    prefix = folder_prefix.rstrip('/') + '/'
+    paginator = s3.get_paginator('list_objects_v2')
+    keys = []
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith('.npy'):
+                keys.append(obj['Key'])
+    return sorted(keys, key=frame_number)
+
+
+def load_keypoints(s3, bucket_name, folder_prefixes, max_workers=16):
+    """Load the per-frame keypoints of several signs into one array.
+
+    The signs are listed and their frames downloaded concurrently over the
+    connection pool of ``s3``. Each frame is written into a preallocated
+    array at the position given by its sign and numeric frame index.
+
+    Frames are expected to be numbered consecutively from 0 or 1. Gaps in
+    the numbering are reported as missing frames and skipped, so the
+    returned sequence holds only the frames that exist.
+
+    Args:
+        s3: S3 client, with ``max_pool_connections`` >= ``max_workers``.
+        bucket_name (str): Bucket holding the keypoints.
+        folder_prefixes (list[str]): Per-frame folder of each sign, in
+            sentence order.
+        max_workers (int): Number of concurrent requests.
+
+    Returns:
+        dict: ``keypoints`` the [T, K, C] array of all the frames in
+        sentence order, ``frame_counts`` the number of frames of each sign,
+        ``missing_frames`` mapping a folder prefix to the frame numbers
+        missing from it and ``missing_signs`` listing the prefixes without
+        any frame.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        sign_keys = list(executor.map(
+            lambda folder_prefix: list_frames(s3, bucket_name, folder_prefix),
+            folder_prefixes))
+
+        missing_frames, missing_signs = {}, []
+        slots = {}
+        for folder_prefix, keys in zip(folder_prefixes, sign_keys):
+            if not keys:
+                missing_signs.append(folder_prefix)
+                continue
+            numbers = [frame_number(key) for key in keys]
+            expected = range(min(numbers[0], 1), numbers[-1] + 1)
+            if len(numbers) != len(expected):
+                missing_frames[folder_prefix] = sorted(set(expected) - set(numbers))
+            for key in keys:
+                slots[key] = len(slots)
+
+        def _load(key):
+            body = s3.get_object(Bucket=bucket_name, Key=key)['Body'].read()
+            return np.load(io.BytesIO(body))[0]
+
+        keypoints = None
+        futures = {executor.submit(_load, key): slot for key, slot in slots.items()}
+        for future in as_completed(futures):
+            frame = future.result()
+            if keypoints is None:
+                # the shape is known once the first frame arrives
+                keypoints = np.empty((len(slots), *frame.shape), dtype=frame.dtype)
+            keypoints[futures[future]] = frame
+
+    if keypoints is None:
+        keypoints = np.zeros((0, 0, 2), dtype=np.float32)
+    if missing_frames:
+        print(f"Missing keypoint frames: {missing_frames}")
+    if missing_signs:
+        print(f"No keypoint frames under: {missing_signs}")
+    return {
+        'keypoints': keypoints,
+        'frame_counts': [len(keys) for keys in sign_keys],
+        'missing_frames': missing_frames,
+        'missing_signs': missing_signs,
+    }
@@ -0,0 +1,129 @@
+import struct
+
+import numpy as np
+
+# Smoothed keypoints of a sentence for clients that draw the skeleton
+# themselves, all little endian:
+#
+#   magic "GKPS" | version u8 | body_links u8 | fps u16 | T u32 | K u32
+#   | scale f32 | L u16 | radius u8 | line_width u8            (24 bytes)
+#   links        u16 [L, 2]   keypoint ids of each link
+#   link_colors  u8  [L, 3]
+#   kpt_colors   u8  [K, 3]
+#   padding to an even offset
+#   frames       i16 [T, K, 2]
+#
+# The coordinates are fixed point, round(pixels * scale). The first frame is
+# stored as is and every following one as its difference to the previous
+# frame, in wrapping int16 arithmetic, so that a running sum over an
+# Int16Array restores the exact values. Small deltas compress well, the
+# object is served gzip encoded.
+MAGIC = b'GKPS'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHIIfHBB')
+EXTENSION = '.kps'
+CONTENT_TYPE = 'application/octet-stream'
+# 1/8 px steps, coordinates up to +-4096 px
+DEFAULT_SCALE = 8.0
+
+
+def quantize(keypoints, scale=DEFAULT_SCALE):
+    """Return the int16 fixed point coordinates of [T, K, 2] keypoints.
+
+    Missing (NaN) coordinates become 0, which the renderers skip like any
+    keypoint outside of the frame.
+    """
+    fixed = np.rint(np.nan_to_num(np.asarray(keypoints, dtype=np.float64)) * scale)
+    return np.clip(fixed, -32768, 32767).astype(np.int16)
+
+
+def delta_encode(fixed):
+    """Replace every frame but the first by its difference to the previous
+    one. int16 wraps around, :func:`delta_decode` undoes it exactly."""
+    deltas = fixed.copy()
+    deltas[1:] = np.diff(fixed, axis=0)
+    return deltas
+
+
+def delta_decode(deltas):
+    return np.cumsum(deltas, axis=0, dtype=np.int16)
+
+
+def encode(keypoints, skeleton, link_colors, kpt_colors, fps=30, scale=DEFAULT_SCALE,
+           body_links=17, radius=4, line_width=5):
+    """Serialize keypoints and the tables needed to draw them.
+
+    Args:
+        keypoints (np.ndarray): The keypoints in shape [T, K, 2], in pixels.
+        skeleton (list[tuple]): The links as (start, end) keypoint ids.
+        link_colors (np.ndarray): The color of each link in shape [L, 3].
+        kpt_colors (np.ndarray): The color of each keypoint in shape [K, 3].
+        fps (int): The frame rate.
+        scale (float): Fixed point steps per pixel.
+        body_links (int): The number of leading links drawn as body limbs.
+        radius (int): The radius of the body keypoints.
+        line_width (int): The width of the body limbs.
+
+    Returns:
+        bytes: The stream.
+    """
+    keypoints = np.asarray(keypoints)
+    if keypoints.ndim != 3 or keypoints.shape[-1] != 2:
+        raise ValueError(f'Expected keypoints in shape [T, K, 2], got {keypoints.shape}')
+    skeleton = np.asarray(skeleton, dtype='<u2').reshape(-1, 2)
+    link_colors = np.asarray(link_colors, dtype=np.uint8).reshape(-1, 3)
+    kpt_colors = np.asarray(kpt_colors, dtype=np.uint8).reshape(-1, 3)
+    num_frames, num_keypoints = keypoints.shape[:2]
+    if len(link_colors) != len(skeleton) or len(kpt_colors) != num_keypoints:
+        raise ValueError('Expected a color per link and per keypoint')
+
+    tables = skeleton.tobytes() + link_colors.tobytes() + kpt_colors.tobytes()
+    padding = (HEADER.size + len(tables)) % 2
+    frames = delta_encode(quantize(keypoints, scale)).astype('<i2')
+    return b''.join([
+        HEADER.pack(MAGIC, VERSION, body_links, fps, num_frames, num_keypoints, scale,
+                    len(skeleton), radius, line_width),
+        tables,
+        b'\0' * padding,
+        frames.tobytes(),
+    ])
+
+
+def decode(data):
+    """Parse a stream written by :func:`encode`.
+
+    Returns:
+        dict: ``keypoints`` the [T, K, 2] float32 pixel coordinates,
+        ``skeleton``, ``link_colors``, ``kpt_colors`` and the drawing
+        parameters ``fps``, ``scale``, ``body_links``, ``radius`` and
+        ``line_width``.
+    """
+    data = memoryview(data)
+    if len(data) < HEADER.size:
+        raise ValueError('Keypoint stream is truncated')
+    (magic, version, body_links, fps, num_frames, num_keypoints, scale, num_links, radius,
+     line_width) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f'Not a keypoint stream, magic {magic!r}')
+    if version != VERSION:
+        raise ValueError(f'Unsupported keypoint stream version {version}')
+
+    offset = HEADER.size
+    sizes = [('skeleton', '<u2', (num_links, 2)),
+             ('link_colors', np.uint8, (num_links, 3)),
+             ('kpt_colors', np.uint8, (num_keypoints, 3))]
+    tables = {}
+    for name, dtype, shape in sizes:
+        count = shape[0] * shape[1]
+        tables[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += count * np.dtype(dtype).itemsize
+    offset += offset % 2
+    count = num_frames * num_keypoints * 2
+    if len(data) - offset != count * 2:
+        raise ValueError('Keypoint stream is truncated')
+    deltas = np.frombuffer(data, dtype='<i2', count=count, offset=offset)
+    fixed = delta_decode(deltas.reshape(num_frames, num_keypoints, 2))
+    return dict(
+        keypoints=(fixed / np.float32(scale)).astype(np.float32),
+        fps=fps, scale=scale, body_links=body_links, radius=radius, line_width=line_width,
+        **tables)
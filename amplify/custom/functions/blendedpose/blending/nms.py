@@ -48,6 +48,56 @@ def nms(dets, thr):
     return keep
 
 
+# COCO body keypoints
+COCO_SIGMAS = np.array([
+    .26, .25, .25, .35, .35, .79, .79, .72, .72, .62, .62, 1.07, 1.07, .87,
+    .87, .89, .89
+]) / 10.0
+
+
+def _get_sigmas(sigmas, num_keypoints):
+    """Return the given sigmas, or the default ones of COCO (17 keypoints)
+    or of COCO-WholeBody in openpose order (134 keypoints, with the neck)."""
+    if sigmas is not None:
+        return np.asarray(sigmas, dtype=np.float64)
+    if num_keypoints == 134:
+        from .visualizer import coco_wholebody_openpose
+        return np.array(coco_wholebody_openpose.dataset_info['sigmas'])
+    return COCO_SIGMAS
+
+
+def _oks(g, d, a_g, a_d, sigmas, vis_thr):
+    """Calculate the oks ious of keypoints broadcast together.
+
+    Args:
+        g (np.ndarray): Ground truth keypoints in shape [..., K, 3].
+        d (np.ndarray): Detected keypoints in shape [..., K, 3].
+        a_g (np.ndarray): Areas of the ground truth objects in shape [...].
+        a_d (np.ndarray): Areas of the detected objects in shape [...].
+        sigmas (np.ndarray): Standard deviation of keypoint labelling.
+        vis_thr (float): Only the keypoints visible in both the ground truth
+            and the detection count, if not None.
+
+    Returns:
+        np.ndarray: The oks ious in shape [...].
+    """
+    vars = (sigmas * 2)**2
+    e = (d[..., 0] - g[..., 0])**2
+    e += (d[..., 1] - g[..., 1])**2
+    e /= vars
+    e /= ((a_g + a_d) / 2 + np.spacing(1))[..., None]
+    e /= 2
+    np.exp(np.negative(e, out=e), out=e)
+    if vis_thr is None:
+        count = np.full(e.shape[:-1], e.shape[-1])
+    else:
+        visible = (g[..., 2] > vis_thr) & (d[..., 2] > vis_thr)
+        e *= visible
+        count = visible.sum(-1)
+    ious = np.divide(e.sum(-1), count, out=np.zeros(e.shape[:-1]), where=count != 0)
+    return ious.astype(np.float32)
+
+
 def oks_iou(g, d, a_g, a_d, sigmas=None, vis_thr=None):
     """Calculate oks ious.
 
@@ -62,70 +112,103 @@ def oks_iou(g, d, a_g, a_d, sigmas=None, vis_thr=None):
     Returns:
         list: The oks ious.
     """
-    if sigmas is None:
-        sigmas = np.array([
-            .26, .25, .25, .35, .35, .79, .79, .72, .72, .62, .62, 1.07, 1.07,
-            .87, .87, .89, .89
-        ]) / 10.0
-    vars = (sigmas * 2)**2
-    xg = g[0::3]
-    yg = g[1::3]
-    vg = g[2::3]
-    ious = np.zeros(len(d), dtype=np.float32)
-    for n_d in range(0, len(d)):
-        xd = d[n_d, 0::3]
-        yd = d[n_d, 1::3]
-        vd = d[n_d, 2::3]
-        dx = xd - xg
-        dy = yd - yg
-        e = (dx**2 + dy**2) / vars / ((a_g + a_d[n_d]) / 2 + np.spacing(1)) / 2
-        if vis_thr is not None:
-            ind = list(vg > vis_thr) and list(vd > vis_thr)
-            e = e[ind]
-        ious[n_d] = np.sum(np.exp(-e)) / len(e) if len(e) != 0 else 0.0
-    return ious
+    g = np.asarray(g, dtype=np.float64).reshape(-1, 3)
+    d = np.asarray(d, dtype=np.float64).reshape(len(d), len(g), 3)
+    return _oks(g, d, a_g, np.asarray(a_d, dtype=np.float64),
+                _get_sigmas(sigmas, len(g)), vis_thr)
 
 
-def oks_nms(kpts_db, thr, sigmas=None, vis_thr=None, score_per_joint=False):
-    """OKS NMS implementations.
+def oks_matrix(kpts, areas, sigmas=None, vis_thr=None, block_size=16):
+    """Calculate the oks ious between every pair of instances at once.
+
+    The ious are symmetric, only the upper triangle is computed, in float32
+    and ``block_size`` rows at a time to keep the temporaries small.
 
     Args:
-        kpts_db: keypoints.
-        thr: Retain overlap < thr.
-        sigmas: standard deviation of keypoint labelling.
-        vis_thr: threshold of the keypoint visibility.
-        score_per_joint: the input scores (in kpts_db) are per joint scores
+        kpts (np.ndarray): Keypoints in shape [N, K, 3] (or [N, K * 3]).
+        areas (np.ndarray): Areas of the instances in shape [N].
+        sigmas: standard deviation of keypoint labelling. By default the
+            COCO ones for 17 keypoints and the COCO-WholeBody ones for 134.
+        vis_thr: threshold of the keypoint visibility. Only the keypoints
+            visible in both instances of a pair count.
+        block_size (int): The number of rows computed together.
 
     Returns:
-        np.ndarray: indexes to keep.
+        np.ndarray: The oks ious in shape [N, N].
     """
-    if len(kpts_db) == 0:
-        return []
+    kpts = np.asarray(kpts, dtype=np.float32)
+    if kpts.ndim == 2:
+        kpts = kpts.reshape(len(kpts), -1, 3)
+    areas = np.asarray(areas, dtype=np.float32)
+    sigmas = _get_sigmas(sigmas, kpts.shape[1])
+
+    num = len(kpts)
+    ious = np.empty((num, num), dtype=np.float32)
+    for start in range(0, num, block_size):
+        rows = slice(start, start + block_size)
+        block = _oks(kpts[rows, None], kpts[None, start:], areas[rows, None],
+                     areas[None, start:], sigmas, vis_thr)
+        ious[rows, start:] = block
+        ious[start:, rows] = block.T
+    return ious
 
+
+def _parse_kpts_db(kpts_db, score_per_joint):
+    """Return the scores, keypoints [N, K, 3] and areas of instances."""
     if score_per_joint:
         scores = np.array([k['score'].mean() for k in kpts_db])
     else:
         scores = np.array([k['score'] for k in kpts_db])
 
-    kpts = np.array([k['keypoints'].flatten() for k in kpts_db])
+    kpts = np.array([k['keypoints'] for k in kpts_db]).reshape(len(kpts_db), -1, 3)
     areas = np.array([k['area'] for k in kpts_db])
+    return scores, kpts, areas
+
+
+def greedy_nms(overlaps, scores, thr):
+    """Greedily select instances with high scores and overlap <= thr.
+
+    Args:
+        overlaps (np.ndarray): Overlaps between instances in shape [N, N],
+            e.g. from :func:`oks_matrix`.
+        scores (np.ndarray): Scores of the instances in shape [N].
+        thr: Retain overlap <= thr.
 
+    Returns:
+        np.ndarray: indexes to keep.
+    """
     order = scores.argsort()[::-1]
+    suppressed = np.zeros(len(order), dtype=bool)
 
     keep = []
-    while len(order) > 0:
-        i = order[0]
+    for i in order:
+        if suppressed[i]:
+            continue
         keep.append(i)
+        suppressed |= ~(overlaps[i] <= thr)
+        suppressed[i] = True
 
-        oks_ovr = oks_iou(kpts[i], kpts[order[1:]], areas[i], areas[order[1:]],
-                          sigmas, vis_thr)
+    return np.array(keep)
 
-        inds = np.where(oks_ovr <= thr)[0]
-        order = order[inds + 1]
 
-    keep = np.array(keep)
+def oks_nms(kpts_db, thr, sigmas=None, vis_thr=None, score_per_joint=False):
+    """OKS NMS implementations.
 
-    return keep
+    Args:
+        kpts_db: keypoints.
+        thr: Retain overlap < thr.
+        sigmas: standard deviation of keypoint labelling.
+        vis_thr: threshold of the keypoint visibility.
+        score_per_joint: the input scores (in kpts_db) are per joint scores
+
+    Returns:
+        np.ndarray: indexes to keep.
+    """
+    if len(kpts_db) == 0:
+        return []
+
+    scores, kpts, areas = _parse_kpts_db(kpts_db, score_per_joint)
+    return greedy_nms(oks_matrix(kpts, areas, sigmas, vis_thr), scores, thr)
 
 
 def _rescore(overlap, scores, thr, type='gaussian'):
@@ -165,6 +248,7 @@ def soft_oks_nms(kpts_db,
         thr: retain oks overlap < thr.
         max_dets: max number of detections to keep.
         sigmas: Keypoint labelling uncertainty.
+        vis_thr: threshold of the keypoint visibility.
         score_per_joint: the input scores (in kpts_db) are per joint scores
 
     Returns:
@@ -173,14 +257,23 @@ def soft_oks_nms(kpts_db,
     if len(kpts_db) == 0:
         return []
 
-    if score_per_joint:
-        scores = np.array([k['score'].mean() for k in kpts_db])
-    else:
-        scores = np.array([k['score'] for k in kpts_db])
+    scores, kpts, areas = _parse_kpts_db(kpts_db, score_per_joint)
+    return soft_nms(oks_matrix(kpts, areas, sigmas, vis_thr), scores, thr, max_dets)
 
-    kpts = np.array([k['keypoints'].flatten() for k in kpts_db])
-    areas = np.array([k['area'] for k in kpts_db])
 
+def soft_nms(overlaps, scores, thr, max_dets=20):
+    """Soft NMS over precomputed overlaps.
+
+    Args:
+        overlaps (np.ndarray): Overlaps between instances in shape [N, N],
+            e.g. from :func:`oks_matrix`.
+        scores (np.ndarray): Scores of the instances in shape [N].
+        thr: retain overlap < thr.
+        max_dets: max number of detections to keep.
+
+    Returns:
+        np.ndarray: indexes to keep.
+    """
     order = scores.argsort()[::-1]
     scores = scores[order]
 
@@ -189,8 +282,7 @@ def soft_oks_nms(kpts_db,
     while len(order) > 0 and keep_cnt < max_dets:
         i = order[0]
 
-        oks_ovr = oks_iou(kpts[i], kpts[order[1:]], areas[i], areas[order[1:]],
-                          sigmas, vis_thr)
+        oks_ovr = overlaps[i, order[1:]]
 
         order = order[1:]
         scores = _rescore(oks_ovr, scores[1:], thr)
@@ -213,6 +305,7 @@ def nearby_joints_nms(
     num_nearby_joints_thr=None,
     score_per_joint=False,
     max_dets=-1,
+    block_size=32,
 ):
     """Nearby joints NMS implementations.
 
@@ -224,6 +317,9 @@ def nearby_joints_nms(
         max_dets (int): max number of detections to keep.
         score_per_joint (bool): the input scores (in kpts_db) are per joint
             scores.
+        block_size (int): the number of instances whose joint distances are
+            computed together, which bounds the memory to
+            ``block_size * N * K`` float32.
 
     Returns:
         np.ndarray: indexes to keep.
@@ -246,17 +342,26 @@ def nearby_joints_nms(
     assert num_nearby_joints_thr < num_joints, '`num_nearby_joints_thr` must '\
         'be less than the number of joints.'
 
-    # compute distance threshold
+    # compute distance threshold, from the pose size of the first instance
+    # of each pair
     pose_area = kpts.max(axis=1) - kpts.min(axis=1)
     pose_area = np.sqrt(np.power(pose_area, 2).sum(axis=1))
-    pose_area = pose_area.reshape(num_people, 1, 1)
-    pose_area = np.tile(pose_area, (num_people, num_joints))
     close_dist_thr = pose_area * dist_thr
-
-    # count nearby joints between instances
-    instance_dist = kpts[:, None] - kpts
-    instance_dist = np.sqrt(np.power(instance_dist, 2).sum(axis=3))
-    close_instance_num = (instance_dist < close_dist_thr).sum(2)
+    # compare squared distances, without the square roots
+    close_dist_thr2 = np.square(close_dist_thr).astype(np.float32)
+
+    # count nearby joints between instances, the distances are symmetric so
+    # only the upper triangle is computed, block by block
+    kpts = kpts.astype(np.float32)
+    close_instance_num = np.empty((num_people, num_people), dtype=np.intp)
+    for start in range(0, num_people, block_size):
+        rows = slice(start, start + block_size)
+        instance_dist = kpts[rows, None] - kpts[None, start:]
+        instance_dist = np.square(instance_dist, out=instance_dist).sum(axis=3)
+        close_instance_num[rows, start:] = (
+            instance_dist < close_dist_thr2[rows, None, None]).sum(2)
+        close_instance_num[start:, rows] = (
+            instance_dist < close_dist_thr2[None, start:, None]).sum(2).T
     close_instance = close_instance_num > num_nearby_joints_thr
 
     # apply nms
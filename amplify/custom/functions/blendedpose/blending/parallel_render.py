@@ -0,0 +1,148 @@
+import mmap
+import multiprocessing
+import os
+import traceback
+
+import numpy as np
+
+# 0 uses every CPU available to the function
+render_workers = int(os.environ.get('RENDER_WORKERS', 0))
+# frames per chunk, chunks are dealt to the workers round robin
+render_chunk_frames = int(os.environ.get('RENDER_CHUNK_FRAMES', 8))
+# shorter sentences render in process, forking costs more than it saves
+render_parallel_min_frames = int(os.environ.get('RENDER_PARALLEL_MIN_FRAMES', 300))
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count(num_frames, chunk_frames=render_chunk_frames,
+                 min_frames=render_parallel_min_frames):
+    """Return the number of render processes for a sentence of
+    ``num_frames``, 1 meaning render in process.
+
+    Processes are forked, which is also what lets them share the anonymous
+    memory maps, so other platforms render in process. So do sentences of
+    fewer than ``min_frames`` and functions with a single CPU, where the
+    workers only add the cost of the fork and of passing the frames back.
+    """
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return 1
+    cpus = available_cpus()
+    if cpus <= 1 or num_frames < min_frames:
+        return 1
+    workers = render_workers or cpus
+    return max(1, min(workers, -(-num_frames // max(1, chunk_frames))))
+
+
+def shared_array(shape, dtype):
+    """Return an array backed by an anonymous shared memory map.
+
+    Forked children see the same pages, nothing is pickled. Unlike
+    ``multiprocessing.shared_memory`` this needs no /dev/shm, which Lambda
+    does not provide.
+    """
+    dtype = np.dtype(dtype)
+    size = max(1, int(np.prod(shape)) * dtype.itemsize)
+    return np.frombuffer(mmap.mmap(-1, size), dtype=dtype,
+                         count=int(np.prod(shape))).reshape(shape)
+
+
+def _render_chunks(create_renderer, keypoints, frames, chunks, conn):
+    """Render the frames of ``chunks`` in order into the ring ``frames``.
+
+    The index of each rendered slot is sent to the parent, which sends a
+    message back once it has written the frame and the slot is free again.
+    """
+    try:
+        renderer = create_renderer()
+        free = len(frames)
+        slot = 0
+        for start, stop in chunks:
+            for t in range(start, stop):
+                if not free:
+                    conn.recv()
+                    free += 1
+                frame = frames[slot]
+                frame.fill(0)
+                renderer.render(frame, keypoints[t])
+                conn.send(slot)
+                free -= 1
+                slot = (slot + 1) % len(frames)
+    except BaseException:
+        conn.send(traceback.format_exc())
+    finally:
+        conn.close()
+
+
+def render_frames(create_renderer, keypoints, frame_shape, workers,
+                  chunk_frames=render_chunk_frames):
+    """Render ``keypoints`` in a pool of processes and yield the frames in
+    order.
+
+    The [T, K, C] keypoints are copied once into shared memory and split
+    into chunks of ``chunk_frames``, dealt round robin to ``workers``
+    forked processes. Each worker draws into its own shared ring of
+    ``2 * chunk_frames`` frames, so it can render its next chunk while the
+    caller is still consuming the chunks of the other workers.
+
+    Args:
+        create_renderer (callable): Returns the renderer of a worker, whose
+            ``render(image, keypoints)`` draws a frame in place.
+        keypoints (np.ndarray): The poses in shape [T, K, C].
+        frame_shape (tuple[int]): The (height, width, 3) of the frames.
+        workers (int): The number of processes.
+        chunk_frames (int): The number of frames per chunk.
+
+    Yields:
+        np.ndarray: Each frame, valid until the next one is requested.
+    """
+    keypoints = np.asarray(keypoints)
+    chunk_frames = max(1, chunk_frames)
+    shared_keypoints = shared_array(keypoints.shape, keypoints.dtype)
+    shared_keypoints[...] = keypoints
+    frames = shared_array((workers, 2 * chunk_frames, *frame_shape), np.uint8)
+
+    chunks = [(start, min(start + chunk_frames, len(keypoints)))
+              for start in range(0, len(keypoints), chunk_frames)]
+    context = multiprocessing.get_context('fork')
+    processes, conns = [], []
+    try:
+        for w in range(workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_render_chunks,
+                args=(create_renderer, shared_keypoints, frames[w], chunks[w::workers],
+                      child_conn),
+                daemon=True)
+            process.start()
+            child_conn.close()
+            processes.append(process)
+            conns.append(parent_conn)
+
+        for c, (start, stop) in enumerate(chunks):
+            conn = conns[c % workers]
+            for _ in range(start, stop):
+                try:
+                    slot = conn.recv()
+                except EOFError:
+                    raise RuntimeError('render worker exited unexpectedly')
+                if isinstance(slot, str):
+                    raise RuntimeError(f'render worker failed:\n{slot}')
+                yield frames[c % workers, slot]
+                try:
+                    conn.send(None)
+                except BrokenPipeError:
+                    # the worker is done and has exited
+                    pass
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        for conn in conns:
+            conn.close()
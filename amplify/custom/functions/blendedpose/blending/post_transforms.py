@@ -3,11 +3,50 @@
 # Original licence: Copyright (c) Microsoft, under the MIT License.
 # ------------------------------------------------------------------------------
 
+import functools
 import math
 
 import cv2
 import numpy as np
-import torch
+
+
+def flip_permutation(flip_pairs, num_keypoints=None):
+    """Get the keypoint order of the mirrored pose, so that a pose is flipped
+    with a single gather, ``keypoints[..., permutation, :]``.
+
+    The permutation of a list is cached, so that passing the same pairs on
+    every call does not rebuild it. Passing the returned array is cheaper.
+
+    Args:
+        flip_pairs (list[tuple] | list[int] | np.ndarray): Pairs of
+            keypoints which are mirrored, or the id of the mirrored keypoint
+            of every keypoint (the ``flip_indices`` of
+            ``parse_pose_metainfo``), or a permutation returned by this
+            function.
+        num_keypoints (int): The number of keypoints, needed with pairs.
+
+    Returns:
+        np.ndarray: The read-only permutation.
+    """
+    if isinstance(flip_pairs, np.ndarray) and flip_pairs.ndim == 1:
+        return flip_pairs
+    flip = tuple(
+        tuple(pair) if isinstance(pair, (list, tuple, np.ndarray)) else pair
+        for pair in flip_pairs)
+    return _flip_permutation(flip, num_keypoints)
+
+
+@functools.lru_cache(maxsize=64)
+def _flip_permutation(flip, num_keypoints):
+    if flip and not isinstance(flip[0], tuple):
+        permutation = np.array(flip, dtype=np.intp)
+    else:
+        permutation = np.arange(num_keypoints)
+        for left, right in flip:
+            permutation[left] = right
+            permutation[right] = left
+    permutation.flags.writeable = False
+    return permutation
 
 
 def fliplr_joints(joints_3d, joints_3d_visible, img_width, flip_pairs):
@@ -20,8 +59,9 @@ def fliplr_joints(joints_3d, joints_3d_visible, img_width, flip_pairs):
         joints_3d (np.ndarray([K, 3])): Coordinates of keypoints.
         joints_3d_visible (np.ndarray([K, 1])): Visibility of keypoints.
         img_width (int): Image width.
-        flip_pairs (list[tuple]): Pairs of keypoints which are mirrored
-            (for example, left ear and right ear).
+        flip_pairs (list[tuple] | np.ndarray): Pairs of keypoints which are
+            mirrored (for example, left ear and right ear), or their
+            :func:`flip_permutation`.
 
     Returns:
         tuple: Flipped human joints.
@@ -33,16 +73,10 @@ def fliplr_joints(joints_3d, joints_3d_visible, img_width, flip_pairs):
     assert len(joints_3d) == len(joints_3d_visible)
     assert img_width > 0
 
-    joints_3d_flipped = joints_3d.copy()
-    joints_3d_visible_flipped = joints_3d_visible.copy()
-
     # Swap left-right parts
-    for left, right in flip_pairs:
-        joints_3d_flipped[left, :] = joints_3d[right, :]
-        joints_3d_flipped[right, :] = joints_3d[left, :]
-
-        joints_3d_visible_flipped[left, :] = joints_3d_visible[right, :]
-        joints_3d_visible_flipped[right, :] = joints_3d_visible[left, :]
+    permutation = flip_permutation(flip_pairs, len(joints_3d))
+    joints_3d_flipped = joints_3d[permutation]
+    joints_3d_visible_flipped = joints_3d_visible[permutation]
 
     # Flip horizontally
     joints_3d_flipped[:, 0] = img_width - 1 - joints_3d_flipped[:, 0]
@@ -69,8 +103,9 @@ def fliplr_regression(regression,
             - [N, K, C]: a batch of keypoints where N is the batch size.
             - [N, T, K, C]: a batch of pose sequences, where T is the frame
                 number.
-        flip_pairs (list[tuple()]): Pairs of keypoints which are mirrored
-            (for example, left ear -- right ear).
+        flip_pairs (list[tuple()] | np.ndarray): Pairs of keypoints which are
+            mirrored (for example, left ear -- right ear), or their
+            :func:`flip_permutation`.
         center_mode (str): The mode to set the center location on the x-axis
             to flip around. Options are:
 
@@ -96,11 +131,9 @@ def fliplr_regression(regression,
         assert regression.shape[-2] > center_index
         x_c = regression[..., center_index:center_index + 1, 0]
 
-    regression_flipped = regression.copy()
     # Swap left-right parts
-    for left, right in flip_pairs:
-        regression_flipped[..., left, :] = regression[..., right, :]
-        regression_flipped[..., right, :] = regression[..., left, :]
+    permutation = flip_permutation(flip_pairs, regression.shape[-2])
+    regression_flipped = regression[..., permutation, :]
 
     # Flip horizontally
     regression_flipped[..., 0] = x_c * 2 - regression_flipped[..., 0]
@@ -119,8 +152,9 @@ def flip_back(output_flipped, flip_pairs, target_type='GaussianHeatmap'):
     Args:
         output_flipped (np.ndarray[N, K, H, W]): The output heatmaps obtained
             from the flipped images.
-        flip_pairs (list[tuple()): Pairs of keypoints which are mirrored
-            (for example, left ear -- right ear).
+        flip_pairs (list[tuple()] | np.ndarray): Pairs of keypoints which are
+            mirrored (for example, left ear -- right ear), or their
+            :func:`flip_permutation`.
         target_type (str): GaussianHeatmap or CombinedTarget
 
     Returns:
@@ -135,12 +169,9 @@ def flip_back(output_flipped, flip_pairs, target_type='GaussianHeatmap'):
         output_flipped[:, 1::3, ...] = -output_flipped[:, 1::3, ...]
     output_flipped = output_flipped.reshape(shape_ori[0], -1, channels,
                                             shape_ori[2], shape_ori[3])
-    output_flipped_back = output_flipped.copy()
-
     # Swap left-right parts
-    for left, right in flip_pairs:
-        output_flipped_back[:, left, ...] = output_flipped[:, right, ...]
-        output_flipped_back[:, right, ...] = output_flipped[:, left, ...]
+    permutation = flip_permutation(flip_pairs, output_flipped.shape[1])
+    output_flipped_back = output_flipped[:, permutation]
     output_flipped_back = output_flipped_back.reshape(shape_ori)
     # Flip horizontally
     output_flipped_back = output_flipped_back[..., ::-1]
@@ -268,6 +299,26 @@ def affine_transform(pt, trans_mat):
     return new_pt
 
 
+def batch_affine_transform(pts, trans_mats):
+    """Apply an affine transformation per instance to its points, for a
+    whole batch at once.
+
+    Args:
+        pts (np.ndarray[N, K, 2]): The points of N instances.
+        trans_mats (np.ndarray[N, 2, 3] | np.ndarray[2, 3]): The affine
+            transform of each instance, or one for all of them.
+
+    Returns:
+        np.ndarray[N, K, 2]: Transformed points.
+    """
+    pts = np.asarray(pts)
+    trans_mats = np.asarray(trans_mats)
+    assert pts.shape[-1] == 2
+    assert trans_mats.shape[-2:] == (2, 3)
+    linear = np.swapaxes(trans_mats[..., :2], -1, -2)
+    return pts @ linear + trans_mats[..., None, :, 2]
+
+
 def _get_3rd_point(a, b):
     """To calculate the affine matrix, three pairs of points are required. This
     function is used to get the 3rd point, given 2D points a & b.
@@ -360,6 +411,8 @@ def warp_affine_joints(joints, mat):
 
 
 def affine_transform_torch(pts, t):
+    import torch
+
     npts = pts.shape[0]
     pts_homo = torch.cat([pts, torch.ones(npts, 1, device=pts.device)], dim=1)
     out = torch.mm(t, torch.t(pts_homo))
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+from . import video_writer
+
+# encoded sign interiors, keyed by the content they are rendered from
+cache_bucket = os.environ.get('SEGMENT_CACHE_BUCKET', os.environ.get('ASL_DATA_BUCKET', ''))
+cache_prefix = os.environ.get('SEGMENT_CACHE_PREFIX', 'cache/blendedpose/segments/')
+# every segment starts with a key frame, shorter interiors are rendered
+# with their junctions
+min_segment_frames = int(os.environ.get('SEGMENT_MIN_FRAMES', 8))
+# bump when the drawing changes in a way the parameters do not capture
+VERSION = 1
+
+
+def enabled():
+    """Segments are stitched with ffmpeg, which must be available."""
+    return (bool(cache_bucket) and os.environ.get('SEGMENT_CACHE', '1') == '1'
+            and video_writer.writer_backend == 'ffmpeg'
+            and os.path.exists(video_writer.ffmpeg_path))
+
+
+def influence_radius(filter_cfg):
+    """Return how many neighbouring frames on each side a smoothed frame
+    depends on, or None if the filter is not supported.
+
+    GaussianFilter applies a median filter then ``gaussian_filter1d``, which
+    truncates the kernel at 4 sigma.
+    """
+    if filter_cfg.get('type') != 'GaussianFilter':
+        return None
+    window_size = filter_cfg.get('window_size', 11)
+    sigma = filter_cfg.get('sigma', 4.0)
+    return window_size // 2 + int(4.0 * sigma + 0.5)
+
+
+def plan_segments(frame_counts, radius, min_frames=min_segment_frames):
+    """Split a sentence into cacheable sign interiors and junctions.
+
+    The interior of a sign, its frames further than ``radius`` from both of
+    its ends, smooths to the same values whatever the neighbouring signs
+    are. Everything else (the junctions between signs and the ends of the
+    sentence) has to be rendered for each sentence.
+
+    Args:
+        frame_counts (list[int]): The number of frames of each sign.
+        radius (int): See :func:`influence_radius`.
+        min_frames (int): The shortest interior worth a segment.
+
+    Returns:
+        list[tuple]: ``(start, stop, sign)`` frame ranges covering the
+        sentence in order, ``sign`` is the index of the sign whose interior
+        the range is, or None for a junction.
+    """
+    segments = []
+    start = offset = 0
+    for sign, count in enumerate(frame_counts):
+        lo, hi = offset + radius, offset + count - radius
+        if hi - lo >= max(1, min_frames):
+            if lo > start:
+                segments.append((start, lo, None))
+            segments.append((lo, hi, sign))
+            start = hi
+        offset += count
+    if offset > start:
+        segments.append((start, offset, None))
+    return segments
+
+
+def segment_key(sign_id, keypoints, params, ext):
+    """Build the content addressed key of a rendered interior.
+
+    The key depends on the smoothed keypoints it is drawn from and on the
+    renderer, filter and encoder parameters, so changing any of them
+    misses the cache instead of serving stale frames.
+    """
+    digest = hashlib.sha256(json.dumps([VERSION, params, keypoints.shape, str(keypoints.dtype)],
+                                       sort_keys=True).encode('utf-8'))
+    digest.update(np.ascontiguousarray(keypoints).tobytes())
+    return f"{cache_prefix}{sign_id}/{digest.hexdigest()}.{ext}"
+
+
+def _download(s3, key, path):
+    try:
+        s3.download_file(cache_bucket, key, path)
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey', 'NotFound'):
+            raise
+        return False
+
+
+def _upload(s3, path, key):
+    try:
+        s3.upload_file(path, cache_bucket, key)
+    except Exception as e:
+        # the sentence is fine, the segment is rendered again next time
+        print(f"Error caching segment {key}: {e}")
+
+
+def concat(paths, output_file):
+    """Join encoded segments into ``output_file`` without re-encoding."""
+    list_file = f"{output_file}.txt"
+    with open(list_file, 'w') as writer:
+        for path in paths:
+            writer.write(f"file '{path}' \n")
+    ffmpeg_args = [
+        video_writer.ffmpeg_path, '-y', '-loglevel', 'error',
+        '-f', 'concat', '-safe', '0', '-i', list_file,
+        '-c', 'copy', output_file,
+    ]
+    print(f"Running command: {' '.join(ffmpeg_args)}")
+    result = subprocess.run(ffmpeg_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    os.remove(list_file)
+    if result.returncode != 0:
+        print(f"Error running ffmpeg: {result.stderr.decode()}")
+        raise subprocess.CalledProcessError(result.returncode, ffmpeg_args,
+                                            result.stdout, result.stderr)
+
+
+def render_sentence(s3, keypoints, frame_counts, sign_ids, output_file, file_type,
+                    frame_size, fps, create_renderer, radius, params):
+    """Render a sentence from cached sign interiors and fresh junctions.
+
+    The interiors are downloaded concurrently. Only the junctions and the
+    interiors missing from the cache are drawn and encoded, the missing
+    interiors are then uploaded for the next sentences. The segments are
+    joined with the ffmpeg concat demuxer, which only works because they
+    share the same encoder settings.
+
+    Args:
+        s3: S3 client.
+        keypoints (np.ndarray): The smoothed sentence in shape [T, K, C].
+        frame_counts (list[int]): The number of frames of each sign.
+        sign_ids (list[str]): The SignID of each sign.
+        output_file (str): The video file to write.
+        file_type (str): ``webm`` or ``mp4``, the codec of the segments.
+        frame_size (tuple[int]): The (width, height) of the frames.
+        fps (int): The frame rate.
+        create_renderer (callable): Returns the frame renderer.
+        radius (int): See :func:`influence_radius`.
+        params (dict): The rendering parameters, part of the cache keys.
+
+    Returns:
+        dict: The number of ``frames`` of the sentence, of ``rendered``
+        frames and of cache ``hits`` and ``misses``.
+    """
+    frame_shape = (frame_size[1], frame_size[0], 3)
+    params = dict(params, frame_size=list(frame_size), fps=fps,
+                  encoder=video_writer.encoder_args(video_writer.video_codec
+                                                    or video_writer.CODECS[file_type]))
+    segments = plan_segments(frame_counts, radius)
+    keys = {i: segment_key(sign_ids[sign], keypoints[start:stop], params, file_type)
+            for i, (start, stop, sign) in enumerate(segments) if sign is not None}
+
+    workdir = tempfile.mkdtemp(prefix='segments-',
+                               dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        paths = [os.path.join(workdir, f"{i}.{file_type}") for i in range(len(segments))]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            hits = dict(zip(keys, executor.map(lambda i: _download(s3, keys[i], paths[i]), keys)))
+
+            renderer = create_renderer()
+            rendered = 0
+            uploads = []
+            for i, (start, stop, sign) in enumerate(segments):
+                if hits.get(i):
+                    continue
+                with video_writer.open_writer(paths[i], file_type, frame_size, fps,
+                                              backend='ffmpeg') as writer:
+                    video_writer.write_frames(writer, renderer.render, keypoints[start:stop],
+                                              frame_shape)
+                rendered += stop - start
+                if i in keys:
+                    uploads.append(executor.submit(_upload, s3, paths[i], keys[i]))
+            concat(paths, output_file)
+            for upload in uploads:
+                upload.result()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        'frames': len(keypoints),
+        'rendered': rendered,
+        'hits': sum(hits.values()),
+        'misses': len(hits) - sum(hits.values()),
+    }
+    print(f"Rendered {rendered} of {len(keypoints)} frames, {result['hits']} cached segments, "
+          f"{result['misses']} new")
+    return result
@@ -1,106 +1,153 @@
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
-import io
+import gzip
+from botocore.config import Config
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.dirname(SCRIPT_DIR))
 
-import cv2
 import numpy as np
+from botocore.exceptions import ClientError
+from . import keypoint_archive
+from . import keypoint_loader
+from . import keypoint_stream
+from . import parallel_render
+from . import segment_cache
+from . import video_writer
 from .visualizer import coco_wholebody_openpose
-from .visualizer.visualizer import PoseVisualizer
+from .visualizer.skeleton_renderer import SkeletonRenderer
 from .visualizer.utils import parse_pose_metainfo
 from .smoother import Smoother
 
+fetch_workers = int(os.environ.get('KEYPOINT_FETCH_WORKERS', 16))
+# shared by all the keypoint downloads of an execution environment
+s3_client = boto3.client('s3', config=Config(max_pool_connections=fetch_workers))
+
+# part of the segment cache keys, see segment_cache.py
+renderer_cfg = dict(radius=4, show_keypoint_weight=True, line_width=5)
+filter_cfg = dict(type='GaussianFilter', window_size=3)
 
-def create_video_using_visualizer(keypoints_list, output_file,file_type='mp4', frame_size=(640, 480), fps=30):
-    if file_type=='mp4':
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    elif file_type=='webm':
-        fourcc = cv2.VideoWriter_fourcc(*'VP90')
 
-    out = cv2.VideoWriter(output_file, fourcc, fps, frame_size)
+def create_renderer():
     parsed_config= parse_pose_metainfo(coco_wholebody_openpose.dataset_info)
-    visualizer = PoseVisualizer(
+    return SkeletonRenderer(
         skeleton=parsed_config['skeleton_links'],
         link_color=parsed_config['skeleton_link_colors'],
         kpt_color=parsed_config['keypoint_colors'],
-        radius =4,
-        # parsed_config['dataset_keypoint_weights'],
-        show_keypoint_weight=True,
-        line_width=5
+        **renderer_cfg
     )
 
 
-
-    for keypoints in keypoints_list:
-        # Create a blank frame
-        img = np.zeros((frame_size[1], frame_size[0], 3), dtype=np.uint8)
-        data = keypoints.reshape((1, keypoints.shape[0], keypoints.shape[1]))
-        image= visualizer._draw_instances_kpts_openpose(img, data)
-        # Write the frame to the video file
-        out.write(image)
-    # Release the VideoWriter
-    out.release()
-    print(f"Video saved as {output_file}")
-
-
-
-def extract_number_from_path(file_path):
-    # Get the base name of the file (6.npy in this case)
-    base_name = os.path.basename(file_path)
-    # Split the base name by '.' and get the first part
-    number = base_name.split('.')[0]
-    return number
-
-def get_keypoints(bucket_name,folder_prefixes):
-    # Initialize the S3 client
-    s3 = boto3.client('s3')
-    paginator = s3.get_paginator('list_objects_v2')
-
-    # Initialize an empty list to store the numpy arrays
-    poses = []
-
-    for folder_prefix in folder_prefixes:
-        # List objects in the specified S3 folder
-        pages = paginator.paginate(Bucket=bucket_name, Prefix=folder_prefix)
-        frame_cnt=len(poses)
-        for page in pages:
-            if 'Contents' in page:
-                for obj in page['Contents']:
-                    # Get the object key
-                    key = obj['Key']
-
-                    # Check if the object is a file (not a subfolder)
-                    if not key.endswith('/'):
-                        # Download the file content
-                        response = s3.get_object(Bucket=bucket_name, Key=key)
-                        content = response['Body'].read()
-
-                        # Load the numpy array from the content
-                        result = {
-                            'track_id': frame_cnt+int(extract_number_from_path(key)),
-                            'keypoints': np.load(io.BytesIO(content))[0]
-                        }
-                        poses.append(result)
-    return poses
-
-
+def create_video_using_visualizer(keypoints_list, output_file,file_type='mp4', frame_size=(640, 480), fps=30):
+    frame_shape = (frame_size[1], frame_size[0], 3)
+    workers = parallel_render.worker_count(len(keypoints_list))
+    with video_writer.open_writer(output_file, file_type, frame_size, fps) as writer:
+        if workers > 1:
+            # long sentences, render chunks in a process per CPU
+            count = 0
+            for frame in parallel_render.render_frames(create_renderer, keypoints_list,
+                                                       frame_shape, workers):
+                writer.write(frame)
+                count += 1
+        else:
+            # frames are drawn in a producer thread while the writer encodes
+            count = video_writer.write_frames(writer, create_renderer().render,
+                                              keypoints_list, frame_shape)
+    print(f"Video saved as {output_file} ({count} frames, {workers} render workers)")
+
+
+def load_archive(bucket_name, folder_prefix):
+    """Return the keypoints of a sign from its packed archive, or None if it
+    has not been packed."""
+    try:
+        return keypoint_archive.load(
+            s3_client, bucket_name, keypoint_archive.archive_key(folder_prefix))
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey', 'NotFound'):
+            raise
+        return None
+
+
+def get_sign_keypoints(bucket_name, folder_prefixes):
+    """Return the [T, K, C] keypoints of each sign, empty for the signs
+    without any frame.
+
+    A sign is read from its packed archive (see keypoint_archive.py and
+    dataprep/pack_keypoints.py) with a single GET, and from its per-frame
+    .npy files if it has not been packed yet. All the requests of a
+    sentence run concurrently.
+    """
+    with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+        signs = list(executor.map(lambda folder_prefix: load_archive(bucket_name, folder_prefix),
+                                  folder_prefixes))
+
+    unpacked = [folder_prefix for folder_prefix, sign in zip(folder_prefixes, signs) if sign is None]
+    if unpacked:
+        print(f"No keypoint archive for {unpacked}, reading their frames")
+        loaded = keypoint_loader.load_keypoints(s3_client, bucket_name, unpacked,
+                                                max_workers=fetch_workers)
+        frames = iter(np.split(loaded['keypoints'], np.cumsum(loaded['frame_counts'])[:-1]))
+        signs = [next(frames) if sign is None else sign for sign in signs]
+    return signs
+
+
+def smooth_keypoints(bucket_name, folder_prefixes):
+    """Return the smoothed [T, K, C] keypoints of a sentence, the number of
+    frames and the SignID of each sign that has frames."""
+    signs, sign_ids = [], []
+    for folder_prefix, sign in zip(folder_prefixes, get_sign_keypoints(bucket_name, folder_prefixes)):
+        if len(sign):
+            signs.append(sign)
+            sign_ids.append(os.path.basename(folder_prefix.rstrip('/')))
+    # smooth the concatenated sentence as one [T, K, C] sequence so that the
+    # filter sees the transitions between signs
+    keypoints = np.concatenate(signs) if signs else np.zeros((0, 0, 2), dtype=np.float32)
+    smoother = Smoother(filter_cfg, keypoint_dim=2)
+    return smoother.smooth_array(keypoints), [len(sign) for sign in signs], sign_ids
 
 
 def smooth_video(bucket_name, folder_prefixes,output_file,file_type):
-    pose_results = get_keypoints(bucket_name, folder_prefixes)
-    # Example 1: Smooth multi-frame pose results offline.
-    filter_cfg = dict(type='GaussianFilter', window_size=3)
-    smoother = Smoother(filter_cfg, keypoint_dim=2)
-    smoothed_results = smoother.smooth(pose_results)
-    # smoothed_results=results
-    keypoints_list=list(range(len(smoothed_results)))
-    for pose_result in smoothed_results:
-        keypoints_list[int(pose_result["track_id"])-1] = pose_result["keypoints"]
-    create_video_using_visualizer(keypoints_list,output_file,file_type=file_type)
+    smoothed_keypoints, frame_counts, sign_ids = smooth_keypoints(bucket_name, folder_prefixes)
+
+    radius = segment_cache.influence_radius(filter_cfg)
+    if segment_cache.enabled() and radius is not None and len(smoothed_keypoints):
+        # only the junctions between signs change from sentence to sentence
+        segment_cache.render_sentence(
+            s3_client, smoothed_keypoints, frame_counts, sign_ids,
+            output_file, file_type, (640, 480), 30, create_renderer, radius,
+            dict(renderer=renderer_cfg, filter=filter_cfg))
+    else:
+        create_video_using_visualizer(smoothed_keypoints,output_file,file_type=file_type)
+
+
+def smooth_keypoint_stream(bucket_name, folder_prefixes, output_file, fps=30):
+    """Write the smoothed sentence as a gzip compressed keypoint stream, see
+    keypoint_stream.py, for clients that draw the skeleton themselves.
+
+    The keypoints are in the openpose order of coco_wholebody_openpose,
+    with the neck inserted, so that they match its skeleton and colors.
+    """
+    smoothed_keypoints, _, _ = smooth_keypoints(bucket_name, folder_prefixes)
+    parsed_config = parse_pose_metainfo(coco_wholebody_openpose.dataset_info)
+    if len(smoothed_keypoints):
+        openpose_keypoints, _ = create_renderer().to_openpose(smoothed_keypoints[..., :2])
+    else:
+        openpose_keypoints = np.zeros((0, parsed_config['num_keypoints'], 2), dtype=np.float32)
+    data = keypoint_stream.encode(
+        openpose_keypoints,
+        parsed_config['skeleton_links'],
+        parsed_config['skeleton_link_colors'],
+        parsed_config['keypoint_colors'],
+        fps=fps,
+        radius=renderer_cfg['radius'],
+        line_width=renderer_cfg['line_width'])
+    with gzip.open(output_file, 'wb') as f:
+        f.write(data)
+    print(f"Keypoint stream saved as {output_file} ({len(openpose_keypoints)} frames, "
+          f"{len(data)} bytes before compression)")
 
 
 if __name__ == '__main__':
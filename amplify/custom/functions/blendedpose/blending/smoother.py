@@ -3,10 +3,11 @@ import copy
 import warnings
 from collections import abc
 from typing import Dict, Union, Any, Type
-from .temporal_filters import GaussianFilter
 
 import numpy as np
 
+from . import temporal_filters
+
 
 def is_seq_of(seq: Any,
               expected_type: Union[Type, tuple],
@@ -78,6 +79,10 @@ class Smoother():
         >>> smoother = Smoother(filter_cfg, keypoint_dim=2)
         >>> for result_t in results:
         >>>     smoothed_result_t = smoother.smooth(result_t)
+        >>> # Example 3: Smooth a pose sequence array offline.
+        >>> poses = np.random.rand(10, 17, 3).astype(np.float32)
+        >>> smoother = Smoother(filter_cfg, keypoint_dim=2)
+        >>> smoothed_poses = smoother.smooth_array(poses)
     """
 
     def __init__(self,
@@ -94,28 +99,22 @@ class Smoother():
     def build_filter(self, filter_cfg: Union[Dict, str]) -> Any:
         """Build a filter from the given configuration.
         Args:
-            filter_cfg (dict or str): The configuration of the filter. If it is
+            filter_cfg (dict or str): The configuration of the filter, its
+                ``type`` is a key of ``temporal_filters.FILTERS``. If it is
                 a string, it represents the type of the filter, and the default
                 configuration will be used.
 
         Returns:
             Any: The built filter.
         """
-        if isinstance(filter_cfg, str):
-            filter_cfg = dict(type=filter_cfg)
-        filter_type = filter_cfg.pop('type')
-        if filter_type == 'GaussianFilter':
-            filter_ = GaussianFilter(**filter_cfg)
-        else:
-            raise ValueError(f'Invalid filter type: {filter_type}')
-        return filter_
+        return temporal_filters.build_filter(filter_cfg)
 
     def _get_filter(self):
         fltr = self._filter
         if not fltr.shareable:
             # If the filter is not shareable, build a new filter for the next
             # requires
-            self._filter = build_filter(self.filter_cfg)
+            self._filter = self.build_filter(self.filter_cfg)
         return fltr
 
     def _collate_pose(self, results):
@@ -189,7 +188,9 @@ class Smoother():
                 id2result = enumerate(results_t)
 
             for track_id, result in id2result:
-                result = copy.deepcopy(result)
+                # only the keypoints are updated, leave the other values shared
+                result = copy.copy(result)
+                result[self.key] = result[self.key].copy()
                 result[self.key][:, :self.keypoint_dim] = poses[track_id][t]
                 updated_results_t.append(result)
 
@@ -244,23 +245,15 @@ class Smoother():
             if track_id in self.history:
                 # For tracked target, get its filter and pose history
                 pose_history, pose_filter = self.history[track_id]
-                if self.padding_size > 0:
-                    # Pad the pose sequence with pose history
-                    pose = np.concatenate((pose_history, pose), axis=0)
             else:
-                # For new target, build a new filter
+                # For new target, build a new filter and history
                 pose_filter = self._get_filter()
-
-            # Update the history information
-            if self.padding_size > 0:
-                pose_history = pose[-self.padding_size:].copy()
-            else:
-                pose_history = None
+                pose_history = temporal_filters.RingBuffer(self.padding_size + T)
             update_history[track_id] = (pose_history, pose_filter)
 
-            # Smooth the pose sequence with the filter
-            smoothed_pose = pose_filter(pose)
-            smoothed_poses[track_id] = smoothed_pose[-T:]
+            # Smooth the pose sequence with the filter, after the last
+            # frames of the target
+            smoothed_poses[track_id] = pose_filter.online(pose, pose_history)
 
         self.history = update_history
 
@@ -272,3 +265,56 @@ class Smoother():
         if single_frame:
             smoothed_results = smoothed_results[0]
         return smoothed_results
+
+    def smooth_array(self, poses: np.ndarray) -> np.ndarray:
+        """Apply temporal smoothing on pose sequences stored in one array.
+
+        Unlike :meth:`smooth`, the whole sequence is filtered in a single
+        call without building per-frame dicts, and the pose history of
+        :meth:`smooth` is neither used nor updated.
+
+        Note:
+            N: The number of targets
+            T: The temporal length of the pose sequence
+            K: The keypoint number of each target
+            C: The keypoint coordinate dimension
+
+        Args:
+            poses (np.ndarray): The pose sequence in shape [T, K, C], or the
+                pose sequences of multiple targets in shape [N, T, K, C].
+
+        Returns:
+            np.ndarray: The smoothed pose sequences in float32, with the same
+            shape as the input. Only the first ``keypoint_dim`` coordinates
+            are smoothed, the others (e.g. scores) are copied.
+        """
+        poses = np.asarray(poses)
+        assert poses.ndim in (3, 4), (
+            'Input should be an array with shape [T, K, C] or [N, T, K, C]'
+            f', but got invalid shape {poses.shape}')
+
+        smoothed = poses.astype(np.float32)
+        if smoothed.shape[-3] == 0:
+            warnings.warn('Smoother received empty result.')
+            return smoothed
+
+        pose_filter = self._get_filter()
+        if poses.ndim == 3:
+            smoothed[..., :self.keypoint_dim] = pose_filter(
+                smoothed[..., :self.keypoint_dim])
+        elif getattr(pose_filter, 'root_index', None) is not None:
+            # The keypoints of a target are centered around its own root, so
+            # the targets cannot share the keypoint axis
+            for i in range(smoothed.shape[0]):
+                smoothed[i, ..., :self.keypoint_dim] = pose_filter(
+                    smoothed[i, ..., :self.keypoint_dim])
+                pose_filter = self._get_filter()
+        else:
+            # Filters work on each keypoint independently, so the targets are
+            # stacked along the keypoint axis and filtered at once
+            N, T, K, _ = smoothed.shape
+            x = smoothed[..., :self.keypoint_dim].transpose(1, 0, 2, 3)
+            x = pose_filter(x.reshape(T, N * K, self.keypoint_dim))
+            smoothed[..., :self.keypoint_dim] = x.reshape(
+                T, N, K, self.keypoint_dim).transpose(1, 0, 2, 3)
+        return smoothed
@@ -1,10 +1,74 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from .gaussian_filter import GaussianFilter
-from .one_euro_filter import OneEuroFilter
-from .savizky_golay_filter import SavizkyGolayFilter
-from .smoothnet_filter import SmoothNetFilter
+import importlib
+
+from .filter import RingBuffer, TemporalFilter
+
+# The filters are imported on first access, so that importing the package
+# does not load scipy or torch, which only some of the filters need.
+_FILTERS = {
+    'GaussianFilter': '.gaussian_filter',
+    'OneEuroFilter': '.one_euro_filter',
+    'SavizkyGolayFilter': '.savizky_golay_filter',
+    'SmoothNetFilter': '.smoothnet_filter',
+}
+
+# filter type -> class name in _FILTERS, or a registered class
+FILTERS = {
+    'GaussianFilter': 'GaussianFilter',
+    'gaussian': 'GaussianFilter',
+    'OneEuroFilter': 'OneEuroFilter',
+    'oneeuro': 'OneEuroFilter',
+    'SavizkyGolayFilter': 'SavizkyGolayFilter',
+    'savgol': 'SavizkyGolayFilter',
+    'SmoothNetFilter': 'SmoothNetFilter',
+    'smoothnet': 'SmoothNetFilter',
+}
 
 __all__ = [
      'GaussianFilter', 'OneEuroFilter', 'SavizkyGolayFilter',
-    'SmoothNetFilter'
+    'SmoothNetFilter', 'TemporalFilter', 'RingBuffer', 'FILTERS',
+    'register_filter', 'build_filter'
 ]
+
+
+def __getattr__(name):
+    if name not in _FILTERS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    filter_class = getattr(importlib.import_module(_FILTERS[name], __name__), name)
+    globals()[name] = filter_class
+    return filter_class
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
+
+def register_filter(name, filter_class):
+    """Make ``filter_class``, a :class:`TemporalFilter`, buildable as
+    ``dict(type=name)``."""
+    FILTERS[name] = filter_class
+
+
+def build_filter(filter_cfg):
+    """Build a filter from its configuration.
+
+    Args:
+        filter_cfg (dict or str): The filter ``type``, a key of
+            :data:`FILTERS`, and its arguments. A string is the type with
+            the default arguments.
+
+    Returns:
+        TemporalFilter: The built filter.
+    """
+    if isinstance(filter_cfg, str):
+        filter_cfg = dict(type=filter_cfg)
+    filter_cfg = dict(filter_cfg)
+    filter_type = filter_cfg.pop('type')
+    if filter_type not in FILTERS:
+        raise ValueError(f'Invalid filter type: {filter_type}, expected one of '
+                         f'{sorted(FILTERS)}')
+    filter_class = FILTERS[filter_type]
+    if isinstance(filter_class, str):
+        # the module of the filter, and its dependencies, load here
+        filter_class = __getattr__(filter_class)
+    return filter_class(**filter_cfg)
@@ -1,6 +1,8 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from abc import ABCMeta, abstractmethod
 
+import numpy as np
+
 
 class TemporalFilter(metaclass=ABCMeta):
     """Base class of temporal filter.
@@ -40,3 +42,93 @@ class TemporalFilter(metaclass=ABCMeta):
         Returns:
             np.ndarray: Smoothed pose sequence in shape [T, K, C]
         """
+
+    def online(self, x, history=None):
+        """Apply filter to the next frame or chunk of a pose stream.
+
+        The filter sees the last ``window_size - 1`` frames of the stream
+        followed by ``x``, and the smoothed ``x`` is returned, as if the
+        whole stream had been filtered causally. The frames are kept in a
+        :class:`RingBuffer`, so no history is concatenated per call.
+
+        Args:
+            x (np.ndarray): A frame in shape [K, C] or a chunk in shape
+                [T, K, C].
+            history (RingBuffer, optional): The frames of the stream, updated
+                in place. By default the filter keeps its own, so that one
+                filter follows one stream. Pass a buffer per stream to share
+                a filter between streams.
+
+        Returns:
+            np.ndarray: The smoothed frame or chunk, in the shape of ``x``.
+        """
+        single_frame = x.ndim == 2
+        if single_frame:
+            x = x[None]
+        if self.window_size <= 1:
+            # Markov filters keep their own state between calls
+            smoothed = self(x)
+        else:
+            if history is None:
+                if getattr(self, '_history', None) is None:
+                    self._history = RingBuffer(self.window_size - 1 + len(x))
+                history = self._history
+            history.reserve(self.window_size - 1 + len(x))
+            history.extend(x)
+            smoothed = self(history.latest(self.window_size - 1 + len(x)))[-len(x):]
+        return smoothed[0] if single_frame else smoothed
+
+
+class RingBuffer:
+    """The last frames of a pose stream.
+
+    Every frame is written twice, at ``i`` and ``i + capacity``, so the last
+    frames are always a contiguous view and appending never shifts or
+    concatenates the history.
+
+    Args:
+        capacity (int): The number of frames kept.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, capacity)
+        self._data = None
+        self._end = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def reserve(self, capacity):
+        """Grow to keep at least ``capacity`` frames."""
+        if capacity <= self.capacity:
+            return
+        frames = self.latest(self._count) if self._data is not None else None
+        self.capacity = capacity
+        self._data = None
+        self._end = self._count = 0
+        if frames is not None and len(frames):
+            self.extend(frames.copy())
+
+    def extend(self, frames):
+        """Append frames in shape [T, K, C]."""
+        if self._data is None:
+            self._data = np.empty((2 * self.capacity, *frames.shape[1:]), dtype=frames.dtype)
+        frames = frames[-self.capacity:]
+        n = len(frames)
+        start = self._end
+        first = min(n, self.capacity - start)
+        for offset in (0, self.capacity):
+            self._data[offset + start:offset + start + first] = frames[:first]
+            self._data[offset:offset + n - first] = frames[first:]
+        self._end = (start + n) % self.capacity
+        self._count = min(self.capacity, self._count + n)
+
+    def latest(self, n):
+        """Return a view of the last ``min(n, len(self))`` frames, oldest
+        first."""
+        n = min(n, self._count)
+        if self._data is None:
+            return np.empty((0,))
+        stop = self._end + self.capacity
+        return self._data[stop - n:stop]
@@ -2,140 +2,10 @@
 from typing import Optional
 
 import numpy as np
-import torch
-# from mmengine.runner import load_checkpoint
-from torch import Tensor, nn
 
 from .filter import TemporalFilter
 
 
-class SmoothNetResBlock(nn.Module):
-    """Residual block module used in SmoothNet.
-
-    Args:
-        in_channels (int): Input channel number.
-        hidden_channels (int): The hidden feature channel number.
-        dropout (float): Dropout probability. Default: 0.5
-
-    Shape:
-        Input: (*, in_channels)
-        Output: (*, in_channels)
-    """
-
-    def __init__(self, in_channels, hidden_channels, dropout=0.5):
-        super().__init__()
-        self.linear1 = nn.Linear(in_channels, hidden_channels)
-        self.linear2 = nn.Linear(hidden_channels, in_channels)
-        self.lrelu = nn.LeakyReLU(0.2, inplace=True)
-        self.dropout = nn.Dropout(p=dropout, inplace=True)
-
-    def forward(self, x):
-        identity = x
-        x = self.linear1(x)
-        x = self.dropout(x)
-        x = self.lrelu(x)
-        x = self.linear2(x)
-        x = self.dropout(x)
-        x = self.lrelu(x)
-
-        out = x + identity
-        return out
-
-
-class SmoothNet(nn.Module):
-    """SmoothNet is a plug-and-play temporal-only network to refine human
-    poses. It works for 2d/3d/6d pose smoothing.
-
-    "SmoothNet: A Plug-and-Play Network for Refining Human Poses in Videos",
-    arXiv'2021. More details can be found in the `paper
-    <https://arxiv.org/abs/2112.13715>`__ .
-
-    Note:
-        N: The batch size
-        T: The temporal length of the pose sequence
-        C: The total pose dimension (e.g. keypoint_number * keypoint_dim)
-
-    Args:
-        window_size (int): The size of the input window.
-        output_size (int): The size of the output window.
-        hidden_size (int): The hidden feature dimension in the encoder,
-            the decoder and between residual blocks. Default: 512
-        res_hidden_size (int): The hidden feature dimension inside the
-            residual blocks. Default: 256
-        num_blocks (int): The number of residual blocks. Default: 3
-        dropout (float): Dropout probability. Default: 0.5
-
-    Shape:
-        Input: (N, C, T) the original pose sequence
-        Output: (N, C, T) the smoothed pose sequence
-    """
-
-    def __init__(self,
-                 window_size: int,
-                 output_size: int,
-                 hidden_size: int = 512,
-                 res_hidden_size: int = 256,
-                 num_blocks: int = 3,
-                 dropout: float = 0.5):
-        super().__init__()
-        self.window_size = window_size
-        self.output_size = output_size
-        self.hidden_size = hidden_size
-        self.res_hidden_size = res_hidden_size
-        self.num_blocks = num_blocks
-        self.dropout = dropout
-
-        assert output_size <= window_size, (
-            'The output size should be less than or equal to the window size.',
-            f' Got output_size=={output_size} and window_size=={window_size}')
-
-        # Build encoder layers
-        self.encoder = nn.Sequential(
-            nn.Linear(window_size, hidden_size),
-            nn.LeakyReLU(0.1, inplace=True))
-
-        # Build residual blocks
-        res_blocks = []
-        for _ in range(num_blocks):
-            res_blocks.append(
-                SmoothNetResBlock(
-                    in_channels=hidden_size,
-                    hidden_channels=res_hidden_size,
-                    dropout=dropout))
-        self.res_blocks = nn.Sequential(*res_blocks)
-
-        # Build decoder layers
-        self.decoder = nn.Linear(hidden_size, output_size)
-
-    def forward(self, x: Tensor) -> Tensor:
-        """Forward function."""
-        N, C, T = x.shape
-        num_windows = T - self.window_size + 1
-
-        assert T >= self.window_size, (
-            'Input sequence length must be no less than the window size. ',
-            f'Got x.shape[2]=={T} and window_size=={self.window_size}')
-
-        # Unfold x to obtain input sliding windows
-        # [N, C, num_windows, window_size]
-        x = x.unfold(2, self.window_size, 1)
-
-        # Forward layers
-        x = self.encoder(x)
-        x = self.res_blocks(x)
-        x = self.decoder(x)  # [N, C, num_windows, output_size]
-
-        # Accumulate output ensembles
-        out = x.new_zeros(N, C, T)
-        count = x.new_zeros(T)
-
-        for t in range(num_windows):
-            out[..., t:t + self.output_size] += x[:, :, t]
-            count[t:t + self.output_size] += 1.0
-
-        return out.div(count)
-
-
 class SmoothNetFilter(TemporalFilter):
     """Apply SmoothNet filter.
 
@@ -161,6 +31,18 @@ class SmoothNetFilter(TemporalFilter):
             will be calculated as the SmoothNet input, by centering the
             keypoints around the root point. The model output will be
             converted back to absolute coordinates. Default: None
+        graph (str, optional): An ONNX graph written by :meth:`export`. If
+            given, it is run with onnxruntime on CPU instead of building the
+            PyTorch model, so that torch is not needed at inference.
+            onnxruntime is not in requirements.txt, see
+            requirements-smoothnet.txt. Only local images built from the
+            Dockerfile can install it, the deployed BlendedPoseFunction
+            is zipped from this directory and does not have it.
+            Default: None
+        max_windows (int): The most windows the model runs on in one
+            forward pass. Larger batches are split along the channels, as
+            every window holds ``hidden_size`` activations per layer.
+            Default: 65536
     """
 
     def __init__(
@@ -173,10 +55,23 @@ class SmoothNetFilter(TemporalFilter):
         num_blocks: int = 3,
         device: str = 'cpu',
         root_index: Optional[int] = None,
+        graph: Optional[str] = None,
+        max_windows: int = 65536,
     ):
         super().__init__(window_size)
         self.device = device
+        self.max_windows = max_windows
         self.root_index = root_index
+        self.session = None
+        self.smoothnet = None
+        if graph:
+            # imported here, the PyTorch model is not needed
+            import onnxruntime
+            self.session = onnxruntime.InferenceSession(
+                graph, providers=['CPUExecutionProvider'])
+            return
+
+        from .smoothnet import SmoothNet
         self.smoothnet = SmoothNet(window_size, output_size, hidden_size,
                                    res_hidden_size, num_blocks)
         # load_checkpoint
@@ -191,35 +86,105 @@ class SmoothNetFilter(TemporalFilter):
     def __call__(self, x: np.ndarray):
         assert x.ndim == 3, ('Input should be an array with shape [T, K, C]'
                              f', but got invalid shape {x.shape}')
+        return self.smooth_batch([x])[0]
 
-        root_index = self.root_index
-        if root_index is not None:
-            x_root = x[:, root_index:root_index + 1]
-            x = np.delete(x, root_index, axis=1)
-            x = x - x_root
-
-        T, K, C = x.shape
+    def smooth_batch(self, xs):
+        """Smooth several pose sequences, e.g. the tracks of a video.
 
-        if T < self.window_size:
-            # Skip smoothing if the input length is less than the window size
-            smoothed = x
-        else:
-            dtype = x.dtype
+        The sequences of the same shape go through the model together, in
+        as few forward passes as ``max_windows`` allows. Sequences shorter
+        than the window are padded with their first frame.
 
-            # Convert to tensor and forward the model
-            with torch.no_grad():
-                x = torch.tensor(x, dtype=torch.float32, device=self.device)
-                x = x.view(1, T, K * C).permute(0, 2, 1)  # to [1, KC, T]
-                smoothed = self.smoothnet(x)  # in shape [1, KC, T]
+        Args:
+            xs (list[np.ndarray]): Pose sequences in shape [T, K, C].
 
-            # Convert model output back to input shape and format
-            smoothed = smoothed.permute(0, 2, 1).view(T, K, C)  # to [T, K, C]
-            smoothed = smoothed.cpu().numpy().astype(dtype)  # to numpy.ndarray
+        Returns:
+            list[np.ndarray]: The smoothed sequences, in the order of ``xs``.
+        """
+        root_index = self.root_index
+        inputs, roots = [], []
+        for x in xs:
+            assert x.ndim == 3, ('Input should be an array with shape '
+                                 f'[T, K, C], but got invalid shape {x.shape}')
+            x_root = None
+            if root_index is not None:
+                x_root = x[:, root_index:root_index + 1]
+                x = np.delete(x, root_index, axis=1)
+                x = x - x_root
+            inputs.append(x)
+            roots.append(x_root)
+
+        groups = {}
+        for i, x in enumerate(inputs):
+            groups.setdefault(x.shape, []).append(i)
+
+        results = [None] * len(inputs)
+        for (T, K, C), indices in groups.items():
+            batch = np.stack([inputs[i] for i in indices])
+            if 0 < T < self.window_size:
+                pad_width = [(0, 0), (self.window_size - T, 0), (0, 0), (0, 0)]
+                batch = np.pad(batch, pad_width, mode='edge')
+            if T > 0:
+                batch = self._forward(batch)[:, -T:]
+            for i, smoothed in zip(indices, batch):
+                results[i] = smoothed.astype(inputs[i].dtype)
 
         if root_index is not None:
-            smoothed += x_root
-            smoothed = np.concatenate(
-                (smoothed[:, :root_index], x_root, smoothed[:, root_index:]),
-                axis=1)
-
-        return smoothed
+            for i, x_root in enumerate(roots):
+                smoothed = results[i] + x_root
+                results[i] = np.concatenate(
+                    (smoothed[:, :root_index], x_root, smoothed[:, root_index:]),
+                    axis=1)
+        return results
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        """Run the model on a batch in shape [N, T, K, C]."""
+        N, T, K, C = batch.shape
+        # to [1, NKC, T], every channel is smoothed on its own
+        x = np.ascontiguousarray(
+            batch.transpose(0, 2, 3, 1).reshape(1, N * K * C, T),
+            dtype=np.float32)
+        step = max(1, self.max_windows // (T - self.window_size + 1))
+        chunks = [x[:, i:i + step] for i in range(0, N * K * C, step)]
+        if self.session is not None:
+            smoothed = [self.session.run(None, {'input': chunk})[0]
+                        for chunk in chunks]
+        else:
+            import torch
+            with torch.no_grad():
+                smoothed = [
+                    self.smoothnet(torch.from_numpy(chunk).to(
+                        self.device)).cpu().numpy() for chunk in chunks
+                ]
+        smoothed = np.concatenate(smoothed, axis=1)
+        # back to [N, T, K, C]
+        return smoothed.reshape(N, K, C, T).transpose(0, 3, 1, 2)
+
+    def export(self, path: str, opset_version: int = 18):
+        """Export the model as an ONNX graph, to be loaded with ``graph``.
+
+        The batch, channel and frame dimensions of the graph are dynamic.
+        The model smooths every channel (keypoint coordinate) on its own, so
+        the graph does not depend on the number of keypoints.
+
+        The graph is exported with the ``torch.export`` based exporter
+        (torch>=2.5, with onnx and onnxscript installed), the TorchScript
+        one cannot export ``unfold`` over a dynamic number of frames.
+        """
+        import torch
+        from torch.export import Dim
+        if self.smoothnet is None:
+            raise ValueError('Only the PyTorch model can be exported')
+        # sizes of 1 would be specialized, not kept dynamic
+        dummy = torch.zeros(2, 2, 2 * self.window_size, device=self.device)
+        dynamic_shapes = {'x': {0: Dim('batch'), 1: Dim('channels'),
+                                2: Dim('frames', min=self.window_size)}}
+        torch.onnx.export(
+            self.smoothnet,
+            (dummy, ),
+            path,
+            input_names=['input'],
+            output_names=['output'],
+            dynamic_shapes=dynamic_shapes,
+            opset_version=opset_version,
+            dynamo=True)
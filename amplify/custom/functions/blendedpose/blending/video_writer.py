@@ -0,0 +1,235 @@
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+ffmpeg_path = os.environ.get('FFMPEG_PATH', '/opt/bin/ffmpeg')
+# 'ffmpeg' pipes raw frames into an ffmpeg process, 'opencv' encodes in
+# process with cv2.VideoWriter. ffmpeg falls back to opencv if the binary is
+# missing, e.g. in the container image.
+writer_backend = os.environ.get('VIDEO_WRITER', 'ffmpeg')
+# encoder tuning, the codec defaults to the one of the container
+video_codec = os.environ.get('VIDEO_CODEC')
+# libvpx: realtime, good or best
+video_deadline = os.environ.get('VIDEO_DEADLINE', 'realtime')
+# libvpx speed, 0 (slowest) to 8 with the realtime deadline
+video_cpu_used = int(os.environ.get('VIDEO_CPU_USED', 8))
+video_row_mt = os.environ.get('VIDEO_ROW_MT', '1') == '1'
+video_threads = int(os.environ.get('VIDEO_THREADS', os.cpu_count() or 1))
+# frames rendered ahead of the encoder
+frame_pool_size = int(os.environ.get('FRAME_POOL_SIZE', 8))
+# bytes of the ffmpeg log reported when it fails
+stderr_tail_bytes = 4096
+
+CODECS = {'webm': 'libvpx-vp9', 'mp4': 'libx264'}
+FOURCCS = {'webm': 'VP90', 'mp4': 'mp4v'}
+
+
+def encoder_args(codec, deadline=video_deadline, cpu_used=video_cpu_used,
+                 row_mt=video_row_mt, threads=video_threads):
+    """Return the ffmpeg output options of ``codec``.
+
+    ``deadline``, ``cpu_used`` and ``row_mt`` only apply to the libvpx
+    encoders.
+    """
+    args = ['-c:v', codec, '-threads', str(threads)]
+    if codec.startswith('libvpx'):
+        args += ['-deadline', deadline, '-cpu-used', str(cpu_used)]
+        if codec == 'libvpx-vp9':
+            args += ['-row-mt', '1' if row_mt else '0']
+    return args + ['-pix_fmt', 'yuv420p']
+
+
+class FFmpegWriter:
+    """Encode BGR frames by streaming them to an ffmpeg process over stdin.
+
+    ffmpeg logs to a temporary file rather than a pipe, which nobody reads
+    while the frames are written and which would block ffmpeg once full.
+    The end of the log is reported if ffmpeg fails.
+
+    Args:
+        output_file (str): The video file to write.
+        frame_size (tuple[int]): The (width, height) of the frames.
+        fps (int): The frame rate.
+        codec (str): The ffmpeg video encoder.
+        **options: Encoder tuning passed to :func:`encoder_args`.
+    """
+
+    def __init__(self, output_file, frame_size, fps, codec, **options):
+        self.output_file = output_file
+        self.args = [
+            ffmpeg_path, '-y', '-loglevel', 'error', '-nostats',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{frame_size[0]}x{frame_size[1]}', '-r', str(fps),
+            '-i', 'pipe:0', '-an',
+            *encoder_args(codec, **options),
+            output_file,
+        ]
+        print(f"Running command: {' '.join(self.args)}")
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(self.args, stdin=subprocess.PIPE,
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=self.stderr)
+
+    def write(self, frame):
+        try:
+            self.process.stdin.write(memoryview(frame))
+        except BrokenPipeError:
+            # ffmpeg exited, report its error instead
+            self.close()
+            raise
+
+    def close(self):
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        self.process.wait()
+        stderr = self._stderr_tail()
+        if self.process.returncode != 0:
+            print(f"Error running ffmpeg: {stderr.decode(errors='replace')}")
+            raise subprocess.CalledProcessError(self.process.returncode, self.args,
+                                                None, stderr)
+
+    def abort(self):
+        self.process.kill()
+        self.process.wait()
+        self._stderr_tail()
+
+    def _stderr_tail(self):
+        """Return the end of the ffmpeg log and delete it."""
+        if self.stderr.closed:
+            return b''
+        size = self.stderr.seek(0, os.SEEK_END)
+        self.stderr.seek(max(0, size - stderr_tail_bytes))
+        tail = self.stderr.read()
+        self.stderr.close()
+        return tail
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class OpenCVWriter:
+    """:class:`FFmpegWriter` interface over ``cv2.VideoWriter``."""
+
+    def __init__(self, output_file, frame_size, fps, file_type):
+        fourcc = cv2.VideoWriter_fourcc(*FOURCCS[file_type])
+        self.writer = cv2.VideoWriter(output_file, fourcc, fps, frame_size)
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+    abort = close
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_writer(output_file, file_type, frame_size, fps, backend=None, **options):
+    """Return the video writer of ``backend``, ``VIDEO_WRITER`` by default."""
+    backend = backend or writer_backend
+    if backend == 'ffmpeg' and not os.path.exists(ffmpeg_path):
+        print(f"{ffmpeg_path} not found, encoding with OpenCV")
+        backend = 'opencv'
+    if backend == 'opencv':
+        return OpenCVWriter(output_file, frame_size, fps, file_type)
+    return FFmpegWriter(output_file, frame_size, fps,
+                        video_codec or CODECS[file_type], **options)
+
+
+class FramePool:
+    """A fixed set of preallocated frames handed out and given back.
+
+    :meth:`acquire` blocks until a frame is free, which bounds how far the
+    producer can get ahead of the consumer.
+    """
+
+    def __init__(self, size, shape, dtype=np.uint8):
+        self.shape = shape
+        self.dtype = dtype
+        self._free = queue.Queue()
+        for _ in range(size):
+            self._free.put(np.empty(shape, dtype=dtype))
+
+    def acquire(self):
+        """Return a free frame cleared to zero."""
+        frame = self._free.get()
+        frame.fill(0)
+        return frame
+
+    def release(self, frame):
+        self._free.put(frame)
+
+
+def write_frames(writer, render, items, frame_shape, pool_size=frame_pool_size):
+    """Render ``items`` in a producer thread and write the frames in order.
+
+    Each frame is drawn by ``render(frame, item)`` into a buffer of a
+    :class:`FramePool` and handed to the calling thread, which writes it and
+    returns the buffer to the pool. Drawing the next frames thus overlaps
+    with encoding the current one.
+
+    Args:
+        writer: :class:`FFmpegWriter` or :class:`OpenCVWriter`.
+        render (callable): Draws an item into a cleared frame in place.
+        items (Iterable): One item per frame, e.g. the keypoints.
+        frame_shape (tuple[int]): The (height, width, 3) of the frames.
+        pool_size (int): The number of frame buffers.
+
+    Returns:
+        int: The number of frames written.
+    """
+    pool = FramePool(max(1, pool_size), frame_shape)
+    rendered = queue.Queue()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                frame = pool.acquire()
+                if stop.is_set():
+                    return
+                render(frame, item)
+                rendered.put(frame)
+        except BaseException as e:
+            rendered.put(e)
+            return
+        rendered.put(None)
+
+    producer = threading.Thread(target=produce, name='frame-producer', daemon=True)
+    producer.start()
+    count = 0
+    try:
+        while True:
+            frame = rendered.get()
+            if frame is None:
+                break
+            if isinstance(frame, BaseException):
+                raise frame
+            writer.write(frame)
+            pool.release(frame)
+            count += 1
+    finally:
+        stop.set()
+        # unblock a producer waiting for a buffer, it exits once it has one
+        pool.release(np.empty(frame_shape, dtype=pool.dtype))
+        producer.join()
+    return count
@@ -1,9 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import List, Optional, Union, Callable
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional, Union, Callable
 
 import cv2
 import numpy as np
-import torch
+
+if TYPE_CHECKING:
+    # only named in the annotations
+    import torch
 
 from .color import Color, color_val
 
@@ -123,13 +128,15 @@ class OpencvBackendVisualizer():
         if isinstance(face_colors, str):
             face_colors = color_val(face_colors)[::-1]
 
+        # int() of a one element array is an error since NumPy 2
+        radius = int(np.asarray(radius).item())
         if alpha == 1.0:
             self._image = cv2.circle(self._image,
                                      (int(center[0]), int(center[1])),
-                                     int(radius), face_colors, -1)
+                                     radius, face_colors, -1)
         else:
             img = cv2.circle(self._image.copy(),
-                             (int(center[0]), int(center[1])), int(radius),
+                             (int(center[0]), int(center[1])), radius,
                              face_colors, -1)
             self._image = cv2.addWeighted(self._image, 1 - alpha, img,
                                           alpha, 0)
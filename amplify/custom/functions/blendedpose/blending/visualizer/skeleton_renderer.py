@@ -0,0 +1,191 @@
+import cv2
+import numpy as np
+
+# sin of every integer degree in single precision, the table OpenCV uses in
+# ellipse2Poly, so that the vectorized polygons round to the same pixels
+_SIN_TABLE = np.sin(np.deg2rad(np.arange(451))).astype(np.float32).astype(np.float64)
+
+# openpose keypoint order, see PoseVisualizer._draw_instances_kpts_openpose
+_MMPOSE_IDX = [17, 6, 8, 10, 7, 9, 12, 14, 16, 13, 15, 2, 1, 4, 3]
+_OPENPOSE_IDX = [1, 2, 3, 4, 6, 7, 8, 9, 10, 12, 13, 14, 15, 16, 17]
+
+
+def ellipse_polygons(centers, half_lengths, half_width, angles):
+    """Vectorized ``cv2.ellipse2Poly(center, axes, angle, 0, 360, 1)``.
+
+    Args:
+        centers (np.ndarray): Integer centers in shape [L, 2].
+        half_lengths (np.ndarray): Integer major semi-axes in shape [L].
+        half_width (int): Minor semi-axis shared by all the ellipses.
+        angles (np.ndarray): Integer rotations in degrees in shape [L].
+
+    Returns:
+        np.ndarray: The int32 polygons in shape [L, 361, 2]. Unlike OpenCV,
+        consecutive duplicated points are kept, which fills the same area.
+    """
+    angles = np.mod(angles, 360)
+    cos_a = _SIN_TABLE[450 - angles][:, None]
+    sin_a = _SIN_TABLE[angles][:, None]
+    degrees = np.arange(361)
+    x = half_lengths[:, None] * _SIN_TABLE[450 - degrees][None]
+    y = half_width * _SIN_TABLE[degrees][None]
+    polygons = np.empty((len(centers), len(degrees), 2), dtype=np.int32)
+    polygons[..., 0] = np.rint(centers[:, 0:1] + x * cos_a - y * sin_a)
+    polygons[..., 1] = np.rint(centers[:, 1:2] + x * sin_a + y * cos_a)
+    return polygons
+
+
+class SkeletonRenderer:
+    """Draw COCO-WholeBody poses in openpose style, batched per frame.
+
+    Produces the same drawing as
+    :meth:`PoseVisualizer._draw_instances_kpts_openpose`, with the colors,
+    skeleton indices and openpose keypoint remap prepared once. The body
+    limbs of a frame are computed with NumPy, drawn onto a single overlay
+    and blended once instead of copying and blending the whole frame for
+    each limb. Where translucent limbs overlap, the last one drawn wins
+    rather than showing through, so those pixels may differ slightly from
+    the per-limb blending.
+
+    Args:
+        skeleton (list[tuple]): The links as (start, end) keypoint ids.
+        link_color (np.ndarray): The color of each link in shape [L, 3].
+        kpt_color (np.ndarray): The color of each keypoint in shape [K, 3].
+        line_width (int): The minor semi-axis of the body limbs.
+        radius (int): The radius of the body keypoints, face and hand
+            keypoints use half of it.
+        show_keypoint_weight (bool): Draw keypoints with their score as
+            opacity.
+        alpha (float): The opacity of the keypoints.
+        body_links (int): The number of leading links drawn as translucent
+            body limbs, the others are drawn as hand lines. Default: 17
+        limb_alpha (float): The opacity of the body limbs. Default: 0.6
+    """
+
+    def __init__(self,
+                 skeleton,
+                 link_color,
+                 kpt_color,
+                 line_width=1,
+                 radius=3,
+                 show_keypoint_weight=False,
+                 alpha=1.0,
+                 body_links=17,
+                 limb_alpha=0.6):
+        skeleton = np.asarray(skeleton, dtype=np.intp).reshape(-1, 2)
+        self.link_src, self.link_dst = skeleton[:, 0], skeleton[:, 1]
+        self.body = np.arange(len(skeleton)) < body_links
+        self.link_colors = [tuple(int(c) for c in color) for color in link_color]
+        self.kpt_colors = [tuple(int(c) for c in color) for color in kpt_color]
+        self.line_width = int(line_width)
+        self.radius = radius
+        self.show_keypoint_weight = show_keypoint_weight
+        self.alpha = alpha
+        self.limb_alpha = limb_alpha
+        num_keypoints = len(kpt_color)
+        self.radii = np.where(np.arange(num_keypoints) > 17, radius // 2, radius)
+        # index that turns the mmpose order (with the neck inserted at 17)
+        # into the openpose order in a single gather
+        self.openpose_order = np.arange(num_keypoints)
+        self.openpose_order[_OPENPOSE_IDX] = _MMPOSE_IDX
+
+    def to_openpose(self, keypoints, kpt_thr=0.3):
+        """Insert the neck and reorder COCO-WholeBody keypoints.
+
+        Args:
+            keypoints (np.ndarray): The keypoints in shape [N, K, C]. If C is
+                3 the last coordinate is the keypoint score.
+
+        Returns:
+            tuple[np.ndarray]: The coordinates in shape [N, K + 1, 2] and the
+            visibility in shape [N, K + 1].
+        """
+        keypoints = np.asarray(keypoints, dtype=np.float64)
+        if keypoints.shape[-1] >= 3:
+            visible = keypoints[..., 2]
+        else:
+            visible = np.ones(keypoints.shape[:-1])
+        coords = keypoints[..., :2]
+
+        neck = coords[:, [5, 6]].mean(axis=1)
+        neck_visible = np.logical_and(visible[:, 5] > kpt_thr,
+                                      visible[:, 6] > kpt_thr).astype(np.float64)
+        coords = np.insert(coords, 17, neck, axis=1)[:, self.openpose_order]
+        visible = np.insert(visible, 17, neck_visible, axis=1)[:, self.openpose_order]
+        return coords, visible
+
+    def render(self, image, keypoints, kpt_thr=0.3):
+        """Draw the poses on ``image`` in place.
+
+        Args:
+            image (np.ndarray): The BGR uint8 frame.
+            keypoints (np.ndarray): The keypoints of the instances in shape
+                [N, K, C] or of a single instance in shape [K, C].
+            kpt_thr (float): The minimum score of a drawn keypoint.
+
+        Returns:
+            np.ndarray: ``image``.
+        """
+        keypoints = np.asarray(keypoints)
+        if keypoints.ndim == 2:
+            keypoints = keypoints[None]
+        img_h, img_w = image.shape[:2]
+        coords, visible = self.to_openpose(keypoints, kpt_thr)
+
+        for kpts, vis in zip(coords, visible):
+            # int() truncates toward zero, so does astype
+            pts = kpts.astype(np.int32)
+            pos1, pos2 = pts[self.link_src], pts[self.link_dst]
+            drawn = ((pos1 > 0).all(1) & (pos2 > 0).all(1)
+                     & (pos1[:, 0] < img_w) & (pos2[:, 0] < img_w)
+                     & (pos1[:, 1] < img_h) & (pos2[:, 1] < img_h)
+                     & (vis[self.link_src] >= kpt_thr)
+                     & (vis[self.link_dst] >= kpt_thr))
+
+            limbs = np.flatnonzero(drawn & self.body)
+            if len(limbs):
+                self._draw_limbs(image, pos1[limbs], pos2[limbs], limbs)
+            for sk_id in np.flatnonzero(drawn & ~self.body):
+                cv2.line(image, tuple(pos1[sk_id].tolist()), tuple(pos2[sk_id].tolist()),
+                         self.link_colors[sk_id], thickness=2)
+
+            self._draw_keypoints(image, kpts, vis, kpt_thr)
+        return image
+
+    def _draw_limbs(self, image, pos1, pos2, limbs):
+        delta = (pos1 - pos2).astype(np.float64)
+        centers = ((pos1 + pos2) / 2).astype(np.int32)
+        half_lengths = (np.hypot(delta[:, 0], delta[:, 1]) / 2).astype(np.int32)
+        angles = np.degrees(np.arctan2(delta[:, 1], delta[:, 0])).astype(np.int32)
+        polygons = ellipse_polygons(centers, half_lengths, self.line_width, angles)
+
+        overlay = image.copy()
+        for polygon, sk_id in zip(polygons, limbs):
+            cv2.fillConvexPoly(overlay, polygon, self.link_colors[sk_id])
+        cv2.addWeighted(image, 1 - self.limb_alpha, overlay, self.limb_alpha, 0,
+                        dst=image)
+
+    def _draw_keypoints(self, image, kpts, vis, kpt_thr):
+        centers = kpts.astype(np.int32)
+        if self.show_keypoint_weight:
+            alphas = self.alpha * np.clip(vis, 0, 1)
+        else:
+            alphas = np.full(len(vis), float(self.alpha))
+        img_h, img_w = image.shape[:2]
+        for kid in np.flatnonzero(vis >= kpt_thr):
+            center = tuple(centers[kid].tolist())
+            radius = int(self.radii[kid])
+            alpha = alphas[kid]
+            if alpha == 1.0:
+                cv2.circle(image, center, radius, self.kpt_colors[kid], -1)
+                continue
+            # blend only the area around the circle, the rest of the frame
+            # is unchanged by the blend
+            x0, y0 = max(center[0] - radius - 1, 0), max(center[1] - radius - 1, 0)
+            x1, y1 = min(center[0] + radius + 2, img_w), min(center[1] + radius + 2, img_h)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            roi = image[y0:y1, x0:x1]
+            circle = cv2.circle(roi.copy(), (center[0] - x0, center[1] - y0), radius,
+                                self.kpt_colors[kid], -1)
+            cv2.addWeighted(roi, 1 - alpha, circle, alpha, 0, dst=roi)
@@ -0,0 +1,118 @@
+import importlib.util
+import os
+import sys
+import unittest
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+
+from blending import group
+
+HAS_MUNKRES = importlib.util.find_spec('munkres') is not None
+
+
+def grouping_cfg(**kwargs):
+    return dict(dict(num_joints=17, max_num_people=30, detection_threshold=0.1,
+                     tag_threshold=1.0, use_detection_val=True, ignore_too_much=False),
+                **kwargs)
+
+
+def synthetic_detections(num_people, rng, num_joints=17):
+    """Top-k detections of ``num_people`` people per joint, in random order,
+    with a tag per person, as from ``HeatmapParser.top_k``."""
+    max_num_people = 30
+    people_tags = rng.permutation(num_people) * 3.0
+    tag_k = rng.normal(0, 0.2, (num_joints, max_num_people, 1))
+    loc_k = rng.integers(0, 128, (num_joints, max_num_people, 2)).astype(np.float32)
+    val_k = np.zeros((num_joints, max_num_people), dtype=np.float32)
+    for joint in range(num_joints):
+        # some people are missing some joints
+        detected = rng.permutation(num_people)[:rng.integers(num_people // 2, num_people + 1)]
+        tag_k[joint, :len(detected), 0] += people_tags[detected]
+        val_k[joint, :len(detected)] = rng.uniform(0.2, 1.0, len(detected))
+    return tag_k, loc_k, val_k
+
+
+class MatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def cost_matrices(self):
+        for num_people in range(5, 31, 5):
+            # more new joints than groups is padded with columns, as in
+            # _match_by_tag, fewer stays rectangular
+            for rows, cols in ((num_people, num_people), (num_people, num_people + 3),
+                               (num_people + 3, num_people)):
+                scores = self.rng.uniform(0, 10, (rows, cols)).astype(np.float32)
+                if rows > cols:
+                    scores = np.concatenate(
+                        (scores, np.zeros((rows, rows - cols), dtype=np.float32) + 1e10), axis=1)
+                yield scores, cols
+
+    @unittest.skipUnless(HAS_MUNKRES, 'munkres is not installed')
+    def test_scipy_matches_munkres(self):
+        for scores, cols in self.cost_matrices():
+            pairs = group._scipy_max_match(scores)
+            expected = group._py_max_match(scores)
+            # the padding columns all cost the same, which of them a row
+            # gets does not matter
+            np.testing.assert_array_equal(np.minimum(pairs, cols), np.minimum(expected, cols))
+            np.testing.assert_array_equal(pairs[:, 0], np.arange(len(scores)))
+
+    def test_greedy_is_a_matching(self):
+        for scores, _ in self.cost_matrices():
+            pairs = group._greedy_max_match(scores)
+            best = group._scipy_max_match(scores)
+            self.assertEqual(len(pairs), min(scores.shape))
+            self.assertEqual(len(set(pairs[:, 0])), len(pairs))
+            self.assertEqual(len(set(pairs[:, 1])), len(pairs))
+            np.testing.assert_array_equal(pairs[:, 0], np.sort(pairs[:, 0]))
+            self.assertGreaterEqual(scores[tuple(pairs.T)].sum(),
+                                    scores[tuple(best.T)].sum() - 1e-3)
+
+    def test_greedy_on_separated_costs(self):
+        # with one cheap pair per row the greedy match is the best one
+        scores = np.full((6, 6), 100.0)
+        cols = self.rng.permutation(6)
+        scores[np.arange(6), cols] = self.rng.uniform(0, 1, 6)
+        np.testing.assert_array_equal(group._greedy_max_match(scores)[:, 1], cols)
+
+    @unittest.skipUnless(HAS_MUNKRES, 'munkres is not installed')
+    def test_match_by_tag_parity(self):
+        # use_detection_val rounds the tag distances, which makes ties
+        # between equally good matches that the solvers break differently
+        for num_people in range(5, 31, 5):
+            inp = synthetic_detections(num_people, self.rng)
+            results = {
+                matcher: group._match_by_tag(inp, group._Params(
+                    grouping_cfg(matcher=matcher, use_detection_val=False)))
+                for matcher in ('munkres', 'scipy')
+            }
+            np.testing.assert_array_equal(results['scipy'], results['munkres'])
+
+    def test_greedy_fallback(self):
+        params = group._Params(grouping_cfg(matcher='scipy', greedy_match_size=4))
+        calls = []
+        original = group._MATCHERS['greedy']
+        group._MATCHERS['greedy'] = lambda scores: calls.append(scores.shape) or original(scores)
+        try:
+            group._match_by_tag(synthetic_detections(10, self.rng), params)
+        finally:
+            group._MATCHERS['greedy'] = original
+        self.assertTrue(calls)
+        self.assertTrue(all(rows > 4 for rows, _ in calls))
+
+    def test_default_matcher(self):
+        # existing configs keep the munkres groups
+        self.assertEqual(group._Params(grouping_cfg()).matcher, 'munkres')
+
+    def test_unknown_matcher(self):
+        with self.assertRaises(AssertionError):
+            group._Params(grouping_cfg(matcher='auction'))
+
+
+if __name__ == '__main__':
+    unittest.main()
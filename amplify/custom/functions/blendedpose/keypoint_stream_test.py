@@ -0,0 +1,94 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+
+from blending import keypoint_stream
+from blending.visualizer import coco_wholebody_openpose
+from blending.visualizer.utils import parse_pose_metainfo
+
+
+def openpose_tables():
+    parsed_config = parse_pose_metainfo(coco_wholebody_openpose.dataset_info)
+    return (parsed_config['skeleton_links'], parsed_config['skeleton_link_colors'],
+            parsed_config['keypoint_colors'])
+
+
+class KeypointStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.skeleton, self.link_colors, self.kpt_colors = openpose_tables()
+        rng = np.random.default_rng(0)
+        steps = rng.normal(0, 3, (90, len(self.kpt_colors), 2))
+        self.keypoints = (np.cumsum(steps, axis=0) + [320, 240]).astype(np.float32)
+
+    def encode(self, keypoints, **kwargs):
+        return keypoint_stream.encode(keypoints, self.skeleton, self.link_colors,
+                                      self.kpt_colors, **kwargs)
+
+    def test_round_trip_within_quantization_step(self):
+        stream = keypoint_stream.decode(self.encode(self.keypoints))
+        self.assertEqual(stream['keypoints'].shape, self.keypoints.shape)
+        self.assertEqual(stream['keypoints'].dtype, np.float32)
+        step = 1 / keypoint_stream.DEFAULT_SCALE
+        np.testing.assert_allclose(stream['keypoints'], self.keypoints, atol=step / 2 + 1e-6)
+
+    def test_fixed_point_values_are_exact(self):
+        fixed = keypoint_stream.quantize(self.keypoints)
+        stream = keypoint_stream.decode(self.encode(self.keypoints))
+        np.testing.assert_array_equal(keypoint_stream.quantize(stream['keypoints']), fixed)
+        # encoding the decoded keypoints gives the same bytes
+        self.assertEqual(self.encode(stream['keypoints']), self.encode(self.keypoints))
+
+    def test_deltas_wrap_around(self):
+        # jumps across the whole int16 range overflow the deltas
+        keypoints = np.zeros((4, len(self.kpt_colors), 2), dtype=np.float32)
+        keypoints[0::2] = -4096
+        keypoints[1::2] = 4095.875
+        stream = keypoint_stream.decode(self.encode(keypoints))
+        np.testing.assert_array_equal(stream['keypoints'], keypoints)
+
+    def test_tables_and_parameters(self):
+        stream = keypoint_stream.decode(self.encode(self.keypoints, fps=25, scale=4.0,
+                                                    radius=6, line_width=3))
+        np.testing.assert_array_equal(stream['skeleton'], np.asarray(self.skeleton))
+        np.testing.assert_array_equal(stream['link_colors'], self.link_colors)
+        np.testing.assert_array_equal(stream['kpt_colors'], self.kpt_colors)
+        self.assertEqual((stream['fps'], stream['scale'], stream['body_links'],
+                          stream['radius'], stream['line_width']), (25, 4.0, 17, 6, 3))
+
+    def test_missing_and_out_of_range_coordinates(self):
+        keypoints = self.keypoints.copy()
+        keypoints[3, 5] = np.nan
+        keypoints[4, 6] = [1e6, -1e6]
+        decoded = keypoint_stream.decode(self.encode(keypoints))['keypoints']
+        np.testing.assert_array_equal(decoded[3, 5], [0, 0])
+        np.testing.assert_array_equal(decoded[4, 6], [32767 / 8, -4096])
+
+    def test_empty_sentence(self):
+        keypoints = np.zeros((0, len(self.kpt_colors), 2), dtype=np.float32)
+        stream = keypoint_stream.decode(self.encode(keypoints))
+        self.assertEqual(stream['keypoints'].shape, keypoints.shape)
+
+    def test_invalid_streams(self):
+        data = self.encode(self.keypoints)
+        with self.assertRaises(ValueError):
+            keypoint_stream.decode(data[:-2])
+        with self.assertRaises(ValueError):
+            keypoint_stream.decode(b'XXXX' + data[4:])
+        with self.assertRaises(ValueError):
+            keypoint_stream.decode(data[:10])
+        with self.assertRaises(ValueError):
+            self.encode(self.keypoints[..., :1])
+
+    def test_compact(self):
+        # delta-encoded fixed point is half of float32 before compression
+        self.assertLess(len(self.encode(self.keypoints)), self.keypoints.nbytes // 2 + 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+
+from blending.temporal_filters import SmoothNetFilter
+
+HAS_TORCH = importlib.util.find_spec('torch') is not None
+HAS_ONNXRUNTIME = importlib.util.find_spec('onnxruntime') is not None
+
+WINDOW_SIZE = 8
+
+
+def loop_forward(smoothnet, x):
+    """SmoothNet.forward as it was, one window at a time."""
+    N, C, T = x.shape
+    num_windows = T - smoothnet.window_size + 1
+    x = x.unfold(2, smoothnet.window_size, 1)
+    x = smoothnet.decoder(smoothnet.res_blocks(smoothnet.encoder(x)))
+    out = x.new_zeros(N, C, T)
+    count = x.new_zeros(T)
+    for t in range(num_windows):
+        out[..., t:t + smoothnet.output_size] += x[:, :, t]
+        count[t:t + smoothnet.output_size] += 1.0
+    return out.div(count)
+
+
+def loop_call(pose_filter, x):
+    """SmoothNetFilter.__call__ as it was, for sequences of at least a
+    window."""
+    import torch
+    root_index = pose_filter.root_index
+    if root_index is not None:
+        x_root = x[:, root_index:root_index + 1]
+        x = np.delete(x, root_index, axis=1)
+        x = x - x_root
+    T, K, C = x.shape
+    with torch.no_grad():
+        x = torch.tensor(x, dtype=torch.float32).view(1, T, K * C).permute(0, 2, 1)
+        smoothed = loop_forward(pose_filter.smoothnet, x)
+    smoothed = smoothed.permute(0, 2, 1).reshape(T, K, C).numpy()
+    if root_index is not None:
+        smoothed = smoothed + x_root
+        smoothed = np.concatenate(
+            (smoothed[:, :root_index], x_root, smoothed[:, root_index:]), axis=1)
+    return smoothed
+
+
+def poses(frames, rng, num_keypoints=5):
+    """A random walk of ``num_keypoints`` 2d keypoints."""
+    steps = rng.normal(0, 2, (frames, num_keypoints, 2))
+    return (rng.uniform(100, 500, (1, num_keypoints, 2)) + steps.cumsum(axis=0)).astype(np.float32)
+
+
+@unittest.skipUnless(HAS_TORCH, 'torch is not installed')
+class SmoothNetTest(unittest.TestCase):
+
+    def setUp(self):
+        import torch
+        torch.manual_seed(0)
+        self.rng = np.random.default_rng(0)
+
+    def test_overlap_add_matches_loop(self):
+        import torch
+        from blending.temporal_filters.smoothnet import SmoothNet
+        for output_size in (WINDOW_SIZE, WINDOW_SIZE // 2):
+            smoothnet = SmoothNet(WINDOW_SIZE, output_size, hidden_size=32,
+                                  res_hidden_size=16).eval()
+            for T in (WINDOW_SIZE, WINDOW_SIZE + 1, 5 * WINDOW_SIZE + 3):
+                x = torch.randn(3, 4, T)
+                with torch.no_grad():
+                    # with output_size < window_size the last frames have no
+                    # estimate and are NaN in both
+                    torch.testing.assert_close(smoothnet(x), loop_forward(smoothnet, x),
+                                               equal_nan=True)
+
+    def test_smooth_batch_matches_call(self):
+        for root_index in (None, 0, 2):
+            pose_filter = SmoothNetFilter(WINDOW_SIZE, WINDOW_SIZE, hidden_size=32,
+                                          res_hidden_size=16, root_index=root_index)
+            tracks = [poses(T, self.rng) for T in (40, 3, 40, WINDOW_SIZE, 17, 1)]
+            smoothed = pose_filter.smooth_batch(tracks)
+            for track, result in zip(tracks, smoothed):
+                self.assertEqual(result.shape, track.shape)
+                self.assertEqual(result.dtype, track.dtype)
+                np.testing.assert_allclose(result, pose_filter(track), rtol=0, atol=1e-3)
+                if root_index is not None:
+                    np.testing.assert_array_equal(result[:, root_index], track[:, root_index])
+                if len(track) >= WINDOW_SIZE:
+                    np.testing.assert_allclose(result, loop_call(pose_filter, track),
+                                               rtol=0, atol=1e-3)
+
+    def test_short_sequences_are_padded(self):
+        pose_filter = SmoothNetFilter(WINDOW_SIZE, WINDOW_SIZE, hidden_size=32,
+                                      res_hidden_size=16, root_index=0)
+        for T in (1, 3, WINDOW_SIZE - 1):
+            track = poses(T, self.rng)
+            padded = np.pad(track, [(WINDOW_SIZE - T, 0), (0, 0), (0, 0)], mode='edge')
+            smoothed = pose_filter(track)
+            # smoothed, not returned unchanged
+            self.assertFalse(np.array_equal(smoothed, track))
+            np.testing.assert_allclose(smoothed, loop_call(pose_filter, padded)[-T:],
+                                       rtol=0, atol=1e-3)
+
+    def test_split_forward_matches_single_pass(self):
+        tracks = [poses(T, self.rng) for T in (40, 40, 3)]
+        expected = SmoothNetFilter(WINDOW_SIZE, WINDOW_SIZE, hidden_size=32,
+                                   res_hidden_size=16).smooth_batch(tracks)
+        # 33 windows per channel, 1 and 3 channels per pass
+        for max_windows in (1, 100):
+            self.setUp()
+            pose_filter = SmoothNetFilter(WINDOW_SIZE, WINDOW_SIZE, hidden_size=32,
+                                          res_hidden_size=16, max_windows=max_windows)
+            for actual, smoothed in zip(pose_filter.smooth_batch(tracks), expected):
+                np.testing.assert_allclose(actual, smoothed, rtol=0, atol=1e-3)
+
+    def test_empty_sequence(self):
+        pose_filter = SmoothNetFilter(WINDOW_SIZE, WINDOW_SIZE, hidden_size=32,
+                                      res_hidden_size=16)
+        track = np.zeros((0, 5, 2), dtype=np.float32)
+        self.assertEqual(pose_filter(track).shape, track.shape)
+
+    @unittest.skipUnless(HAS_ONNXRUNTIME, 'onnxruntime is not installed')
+    def test_exported_graph_matches_model(self):
+        pose_filter = SmoothNetFilter(WINDOW_SIZE, WINDOW_SIZE, hidden_size=32,
+                                      res_hidden_size=16, root_index=0)
+        with tempfile.TemporaryDirectory() as workdir:
+            graph = os.path.join(workdir, 'smoothnet.onnx')
+            pose_filter.export(graph)
+            graph_filter = SmoothNetFilter(WINDOW_SIZE, WINDOW_SIZE, root_index=0, graph=graph)
+            self.assertIsNone(graph_filter.smoothnet)
+            # one channel per pass
+            split_filter = SmoothNetFilter(WINDOW_SIZE, WINDOW_SIZE, root_index=0, graph=graph,
+                                           max_windows=1)
+            # batch, keypoints and frames differ from the traced input
+            for num_keypoints in (3, 134):
+                tracks = [poses(T, self.rng, num_keypoints)
+                          for T in (WINDOW_SIZE, 3 * WINDOW_SIZE + 1, 300, 300, 5)]
+                expected = pose_filter.smooth_batch(tracks)
+                for actual, smoothed in zip(graph_filter.smooth_batch(tracks), expected):
+                    np.testing.assert_allclose(actual, smoothed, rtol=0, atol=1e-3)
+            tracks = [poses(T, self.rng) for T in (WINDOW_SIZE, 20)]
+            expected = pose_filter.smooth_batch(tracks)
+            for actual, smoothed in zip(split_filter.smooth_batch(tracks), expected):
+                np.testing.assert_allclose(actual, smoothed, rtol=0, atol=1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
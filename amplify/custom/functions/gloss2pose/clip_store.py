@@ -0,0 +1,144 @@
+import hashlib
+import os
+import pathlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import boto3
+from botocore.config import Config
+
+cache_dir = os.environ.get('CLIP_CACHE_DIR', '/tmp/clip-cache/')
+cache_max_bytes = int(os.environ.get('CLIP_CACHE_BYTES', 256 * 1024 * 1024))
+fetch_workers = int(os.environ.get('CLIP_FETCH_WORKERS', 16))
+
+
+class ClipStore:
+    """Download lookup clips concurrently and keep them in a local cache.
+
+    The store owns a single S3 client with a connection pool that is shared
+    by all downloads of a sentence, whatever the video type. Downloaded clips
+    stay in ``cache_dir`` and are evicted least recently used first once
+    their total size goes over ``max_bytes``. The store is meant to be created
+    once per execution environment so that warm invocations reuse the clips.
+
+    Args:
+        bucket (str): Bucket the lookup clips are read from.
+        cache_dir (str): Local folder holding the cached clips.
+        max_bytes (int): Upper bound of the total size of cached clips.
+        max_workers (int): Number of concurrent downloads.
+    """
+
+    def __init__(self, bucket, cache_dir=cache_dir, max_bytes=cache_max_bytes,
+                 max_workers=fetch_workers):
+        self.bucket = bucket
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.client = boto3.client(
+            's3', config=Config(max_pool_connections=max_workers))
+        # key -> (local path, size in bytes), least recently used first
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        pathlib.Path(cache_dir).mkdir(parents=True, exist_ok=True)
+
+    def fetch(self, keys):
+        """Make the clips available locally.
+
+        Args:
+            keys (list[str]): S3 keys of the clips, duplicates are fetched
+                once.
+
+        Returns:
+            dict: ``clips`` mapping each available key to its local path,
+            ``missing`` listing the keys that could not be downloaded and
+            ``timings`` mapping each key to its fetch latency in seconds.
+        """
+        start = time.perf_counter()
+        unique_keys = list(dict.fromkeys(keys))
+        workers = max(1, min(self.max_workers, len(unique_keys)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._fetch_one, unique_keys))
+
+        clips, missing, timings = {}, [], {}
+        for key, (path, elapsed) in zip(unique_keys, results):
+            timings[key] = elapsed
+            if path is None:
+                missing.append(key)
+            else:
+                clips[key] = path
+        self._evict(protect=clips.keys())
+
+        total = self.hits + self.misses
+        print(f"Fetched {len(unique_keys)} clips in "
+              f"{time.perf_counter() - start:.3f}s "
+              f"(slowest {max(timings.values(), default=0.0):.3f}s), "
+              f"cache hits={self.hits} misses={self.misses} "
+              f"hit_ratio={self.hits / total if total else 0.0:.2f} "
+              f"size={self._size}B")
+        if missing:
+            print(f"Unable to download {len(missing)} clips: {missing}")
+        return {'clips': clips, 'missing': missing, 'timings': timings}
+
+    def _fetch_one(self, key):
+        start = time.perf_counter()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and os.path.exists(entry[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], time.perf_counter() - start
+            self.misses += 1
+
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        local_file_name = os.path.join(self.cache_dir, f"{name}{os.path.splitext(key)[1]}")
+        try:
+            # download next to the final name so a failed download never
+            # leaves a partial clip in the cache
+            self.client.download_file(self.bucket, key, local_file_name + ".part")
+            os.replace(local_file_name + ".part", local_file_name)
+        except Exception as e:
+            print(f"Unable to download {key}: {e}")
+            if os.path.exists(local_file_name + ".part"):
+                os.remove(local_file_name + ".part")
+            return None, time.perf_counter() - start
+
+        size = os.path.getsize(local_file_name)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (local_file_name, size)
+            self._size += size
+        return local_file_name, time.perf_counter() - start
+
+    def clear(self):
+        """Remove every cached clip."""
+        with self._lock:
+            for path, _ in self._entries.values():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._entries.clear()
+            self._size = 0
+
+    def _evict(self, protect=()):
+        """Remove least recently used clips until the cache fits
+        ``max_bytes``. Clips in ``protect`` are in use and are kept."""
+        with self._lock:
+            for key in list(self._entries):
+                if self._size <= self.max_bytes:
+                    break
+                if key in protect:
+                    continue
+                path, size = self._entries.pop(key)
+                self._size -= size
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
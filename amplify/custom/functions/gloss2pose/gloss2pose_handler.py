@@ -1,20 +1,40 @@
-import multiprocessing
+import asyncio
 import os
-import re
 import subprocess
 import sys
-from threading import Thread
 
-import boto3
-from boto3.dynamodb.conditions import Key
 import uuid
 import pathlib
 
+# shared modules are deployed as the common layer, add them for local runs
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(SCRIPT_DIR), 'layers', 'common', 'python'))
+
+from genasl.gloss_resolver import GlossResolver
+from genasl.metrics import Metrics
+import hls_playlist
+import video_cache
+from clip_store import ClipStore
+
 pose_bucket = os.environ['POSE_BUCKET']
 asl_data_bucket = os.environ['ASL_DATA_BUCKET']
 key_prefix = os.environ["KEY_PREFIX"]
 table_name = os.environ['TABLE_NAME']
 output_ext='webm'
+ffmpeg_path = os.environ.get('FFMPEG_PATH', '/opt/bin/ffmpeg')
+# "encode" re-encodes the lookup mp4 clips, "copy" remuxes the normalized
+# webm clips written by dataprep/create_mezzanine_clips.py without encoding
+concat_mode = os.environ.get('CONCAT_MODE', 'encode')
+lookup_folders = {"sign": "sign", "pose": "pose2", "avatar": "avatar"}
+# part of the cache key of the sentence videos, change it with the encoder
+if concat_mode == 'copy':
+    encoder_args = ["-c", "copy"]
+else:
+    encoder_args = ["-c:v", "libvpx-vp9"]
+# created once per execution environment so their caches survive warm starts
+gloss_resolver = GlossResolver(table_name)
+clip_store = ClipStore(pose_bucket)
+metrics = Metrics('gloss2pose')
 
 
 def lambda_handler(event, context):
@@ -33,47 +53,81 @@ def lambda_handler(event, context):
     ------
         dict: Object containing details of the stock selling transaction
     """
+    metrics.reset()
     # Get the Gloss from event
-    return gloss_to_video(event.get("Gloss"),event.get('Text'))
+    output_mode = event.get('OutputMode', 'video')
+    response = gloss_to_video(event.get("Gloss"),event.get('Text'),
+                              output_mode=output_mode)
+    return metrics.respond(response, event, OutputMode=output_mode)
 
 
-def gloss_to_video(gloss_sentence,text=None, pose_only=False, pre_sign=True):
-    uniq_key = str(uuid.uuid4())
+def gloss_to_video(gloss_sentence,text=None, pose_only=False, pre_sign=True, output_mode='video'):
+    """Render a gloss sentence.
 
-    sign_ids = []
+    With output_mode='video' each URL points to a single webm of the whole
+    sentence. With output_mode='hls' each URL points to an HLS playlist of the
+    pre-encoded per-sign segments, which the player can start right away.
+    """
+    uniq_key = str(uuid.uuid4())
 
-    for gloss in gloss_sentence.split(" "):
-        gloss = re.sub('[,!?.]', '', gloss.strip())
-        # query dynamodb table
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
-        response = table.query(
-            KeyConditionExpression=Key('Gloss').eq(gloss)
-        )
-        # for now pick the first item in the response
-        if response['Count'] == 0:
-            #if not sign found finger spell it
-            for c in gloss:
-                response = table.query(
-                    KeyConditionExpression=Key('Gloss').eq(c)
-                )
-                if response['Count'] > 0:
-                    sign_ids.append(response['Items'][0]['SignID'])
-        else:
-            sign_ids.append(response['Items'][0]['SignID'])
+    with metrics.span('lookup'):
+        sign_ids = gloss_resolver.resolve(gloss_sentence)
     # print(sign_ids)
-    manager = multiprocessing.Manager()
-    return_dict = manager.dict()
-    p1 = Thread(target=process_videos, args=(return_dict, "pose", sign_ids, uniq_key, pre_sign))
-    p1.start()
-    if not pose_only:
-        p2 = Thread(target=process_videos, args=(return_dict, "sign", sign_ids, uniq_key, pre_sign))
-        p2.start()
-        p3 = Thread(target=process_videos, args=(return_dict, "avatar", sign_ids, uniq_key, pre_sign))
-        p3.start()
-        p2.join()
-        p3.join()
-    p1.join()
+    video_types = ["pose"] if pose_only else ["pose", "sign", "avatar"]
+    if output_mode == 'hls':
+        return_dict = asyncio.run(create_playlists(video_types, sign_ids, uniq_key))
+    else:
+        return_dict = asyncio.run(render_videos(video_types, sign_ids, uniq_key, pre_sign))
+    return format_response(return_dict, gloss_sentence, text, pose_only)
+
+
+async def render_videos(video_types, sign_ids, uniq_key, pre_sign):
+    """Render the sentence video of each video type and return a dict
+    mapping the video type to its URL, or local path if not pre_sign.
+
+    Lookups, downloads, ffmpeg runs and uploads of the different video types
+    overlap on a single event loop; blocking boto3 calls run in the default
+    executor and ffmpeg runs as an async subprocess.
+    """
+    s3 = clip_store.client
+    output_keys = {video_type: video_cache.cache_key(video_type, sign_ids, encoder_args, output_ext,
+                                                     source=f"{pose_bucket}/{key_prefix}")
+                   for video_type in video_types}
+    return_dict = {}
+    if pre_sign:
+        with metrics.span('cache'):
+            hits = await asyncio.gather(*(
+                asyncio.to_thread(video_cache.lookup, s3, asl_data_bucket, output_keys[video_type])
+                for video_type in video_types))
+        for video_type, hit in zip(video_types, hits):
+            if hit:
+                # the same sentence was rendered before, skip download, encode and upload
+                return_dict[video_type] = presign(s3, output_keys[video_type])
+    pending_types = [video_type for video_type in video_types if video_type not in return_dict]
+    if not pending_types:
+        return return_dict
+
+    # fetch the clips of every video type still to render in one go
+    with metrics.span('fetch'):
+        fetched = await asyncio.to_thread(clip_store.fetch, [clip_key(video_type, sign_id)
+                                                             for video_type in pending_types
+                                                             for sign_id in sign_ids])
+    urls = await asyncio.gather(*(
+        process_videos(video_type, sign_ids, uniq_key, pre_sign, fetched['clips'],
+                       output_keys[video_type])
+        for video_type in pending_types))
+    return_dict.update(zip(pending_types, urls))
+    return return_dict
+
+
+async def create_playlists(video_types, sign_ids, uniq_key):
+    urls = await asyncio.gather(*(
+        asyncio.to_thread(create_playlist, video_type, sign_ids, uniq_key)
+        for video_type in video_types))
+    return dict(zip(video_types, urls))
+
+
+def format_response(return_dict, gloss_sentence, text, pose_only):
     if not pose_only:
         print(return_dict)
         return {'PoseURL': return_dict["pose"],
@@ -85,77 +139,113 @@ def gloss_to_video(gloss_sentence,text=None, pose_only=False, pre_sign=True):
         return {'PoseURL': return_dict["pose"]}
 
 
-    # return {'PoseURL': process_vides("pose", sign_ids,uniq_key),
-    #         'SignURL': process_vides("sign", sign_ids,uniq_key)}
+def create_playlist(video_type, sign_ids, uniq_key):
+    """Write an HLS playlist of the per-sign segments and return its URL.
+
+    Segments are pre-encoded by dataprep/create_mezzanine_clips.py and keyed by
+    SignID, so nothing is downloaded or encoded here. Signs without a segment
+    are skipped.
+    """
+    s3 = clip_store.client
+    keys = [segment_key(video_type, sign_id) for sign_id in sign_ids]
+    with metrics.span('fetch'):
+        durations = hls_playlist.segment_durations(s3, pose_bucket, keys)
+    with metrics.span('presign'):
+        segments = [(s3.generate_presigned_url(
+                        ClientMethod='get_object',
+                        Params={'Bucket': pose_bucket, 'Key': key},
+                        ExpiresIn=604800),
+                     durations[key])
+                    for key in keys if durations[key] is not None]
+
+    output_key = f"hls/{uniq_key}/{video_type}.m3u8"
+    with metrics.span('upload'):
+        s3.put_object(
+            Bucket=asl_data_bucket,
+            Key=output_key,
+            Body=hls_playlist.build_playlist(segments).encode('utf-8'),
+            ContentType='application/vnd.apple.mpegurl'
+        )
+    return presign(s3, output_key)
 
 
-def process_videos(return_dict, video_type, sign_ids, uniq_key, pre_sign):
-    s3 = boto3.client('s3')
+async def process_videos(video_type, sign_ids, uniq_key, pre_sign, clips, output_key):
+    s3 = clip_store.client
     temp_folder = f"/tmp/{uniq_key}/"
-    pathlib.Path(os.path.dirname(temp_folder + f"{video_type}/")).mkdir(parents=True, exist_ok=True)
+    pathlib.Path(temp_folder).mkdir(parents=True, exist_ok=True)
 
+    missing = False
     with open(f"{temp_folder}{video_type}.txt", 'w') as writer:
         for sign_id in sign_ids:
-            if video_type == "sign":
-                key = f"{key_prefix}sign/sign-{sign_id}.mp4"
-            elif video_type == "pose":
-                key = f"{key_prefix}pose2/pose-{sign_id}.mp4"
-            else:
-                key = f"{key_prefix}avatar/avatar-{sign_id}.mp4"
-            local_file_name = f"{temp_folder}{video_type}/{video_type}-{sign_id}.mp4"
-            try:
-                s3.download_file(pose_bucket, key, local_file_name)
-            except:
-                print(f"Unable to download {key}")
+            local_file_name = clips.get(clip_key(video_type, sign_id))
+            if local_file_name is None:
+                # reported by the clip store
+                missing = True
                 continue
-            print(f"downloading {key}")
             writer.write(f"file '{local_file_name}' \n")
+    if missing:
+        # the video lacks some signs, possibly because of a transient S3
+        # error, so it must not be stored under the key of the sentence
+        print(f"Not caching the {video_type} video, some clips are missing")
+        output_key = f"{uniq_key}/{video_type}.{output_ext}"
 
     # combine the sign videos using subprocess with arguments list
     ffmpeg_args = [
-        "/opt/bin/ffmpeg",
+        ffmpeg_path,
         "-f", "concat",
         "-safe", "0",
         "-i", f"{temp_folder}{video_type}.txt",
-        "-c:v", "libvpx-vp9",
+        *encoder_args,
         f"{temp_folder}{video_type}.{output_ext}"
     ]
     
     print(f"Running command: {' '.join(ffmpeg_args)}")
-    try:
-        p1 = subprocess.run(
-            ffmpeg_args,
+    # exec without a shell, the arguments are never interpreted
+    with metrics.span('encode'):
+        p1 = await asyncio.create_subprocess_exec(
+            *ffmpeg_args,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            shell=False,  # Important: shell=False for security
-            check=True    # Raises CalledProcessError if command fails
+            stderr=subprocess.PIPE
         )
-    except subprocess.CalledProcessError as e:
-        print(f"Error running ffmpeg: {e.stderr.decode()}")
-        raise
+        stdout, stderr = await p1.communicate()
+    if p1.returncode != 0:
+        print(f"Error running ffmpeg: {stderr.decode()}")
+        raise subprocess.CalledProcessError(p1.returncode, ffmpeg_args, stdout, stderr)
 
+    output_path = f"{temp_folder}{video_type}.{output_ext}"
     if pre_sign:
-        output_key = f"{uniq_key}/{video_type}.{output_ext}"
         try:
-            s3.upload_file(
-                f"{temp_folder}{video_type}.{output_ext}",
-                asl_data_bucket,
-                output_key
-            )
-            video_url = s3.generate_presigned_url(
-                ClientMethod='get_object',
-                Params={
-                    'Bucket': asl_data_bucket,
-                    'Key': output_key
-                },
-                ExpiresIn=604800
-            )
-            return_dict[video_type] = video_url
-            return video_url
+            with metrics.span('upload'):
+                await asyncio.to_thread(s3.upload_file, output_path, asl_data_bucket, output_key)
+            return presign(s3, output_key)
         except Exception as e:
             print(f"Error uploading to S3: {str(e)}")
             raise
     else:
-        output_path = f"{temp_folder}{video_type}.{output_ext}"
-        return_dict[video_type] = output_path
         return output_path
+
+
+def clip_key(video_type, sign_id):
+    """Return the S3 key of the lookup clip of a sign."""
+    folder = lookup_folders.get(video_type, "avatar")
+    if concat_mode == 'copy':
+        return f"{key_prefix}mezzanine/{folder}/{video_type}-{sign_id}.webm"
+    return f"{key_prefix}{folder}/{video_type}-{sign_id}.mp4"
+
+
+def segment_key(video_type, sign_id):
+    """Return the S3 key of the pre-encoded HLS segment of a sign."""
+    folder = lookup_folders.get(video_type, "avatar")
+    return f"{key_prefix}hls/{folder}/{video_type}-{sign_id}.ts"
+
+
+def presign(s3, output_key):
+    with metrics.span('presign'):
+        return s3.generate_presigned_url(
+            ClientMethod='get_object',
+            Params={
+                'Bucket': asl_data_bucket,
+                'Key': output_key
+            },
+            ExpiresIn=604800
+        )
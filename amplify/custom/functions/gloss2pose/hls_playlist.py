@@ -0,0 +1,70 @@
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from genasl.gloss_resolver import LRUCache
+
+# segment durations never change for a given key, keep them across warm starts
+_durations = LRUCache(max_size=int(os.environ.get('SEGMENT_CACHE_SIZE', 8192)),
+                      ttl=float(os.environ.get('SEGMENT_CACHE_TTL', 86400)))
+
+
+def segment_durations(s3, bucket, keys, max_workers=16):
+    """Return the duration in seconds of each pre-encoded segment.
+
+    The duration is stored as ``duration`` user metadata on the segment by
+    dataprep/create_mezzanine_clips.py and read with parallel HEAD requests.
+    Segments that do not exist map to None.
+    """
+    durations = {}
+    pending = []
+    for key in dict.fromkeys(keys):
+        duration = _durations.get(key)
+        if isinstance(duration, float):
+            durations[key] = duration
+        else:
+            pending.append(key)
+
+    def _head(key):
+        try:
+            response = s3.head_object(Bucket=bucket, Key=key)
+        except Exception as e:
+            print(f"Unable to find segment {key}: {e}")
+            return None
+        return float(response.get('Metadata', {}).get('duration', 0.0)) or None
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            for key, duration in zip(pending, executor.map(_head, pending)):
+                if duration is not None:
+                    _durations.put(key, duration)
+                durations[key] = duration
+    return durations
+
+
+def build_playlist(segments):
+    """Build an HLS media playlist.
+
+    Args:
+        segments (list[tuple]): (uri, duration in seconds) of each segment in
+            playback order.
+
+    Returns:
+        str: The m3u8 playlist. Each sign is its own segment, with a
+        discontinuity between signs since their timestamps are independent.
+    """
+    target_duration = math.ceil(max((d for _, d in segments), default=1.0))
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        f"#EXT-X-TARGETDURATION:{target_duration}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+    ]
+    for i, (uri, duration) in enumerate(segments):
+        if i > 0:
+            lines.append("#EXT-X-DISCONTINUITY")
+        lines.append(f"#EXTINF:{duration:.3f},")
+        lines.append(uri)
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
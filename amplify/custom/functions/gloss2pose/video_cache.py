@@ -0,0 +1,46 @@
+import hashlib
+import json
+import os
+from threading import Lock
+
+from botocore.exceptions import ClientError
+
+cache_prefix = os.environ.get('VIDEO_CACHE_PREFIX', 'cache/')
+
+# hit/miss counts of the current execution environment
+stats = {'hits': 0, 'misses': 0}
+_stats_lock = Lock()
+
+
+def cache_key(video_type, sign_ids, encoder_args, ext, source=''):
+    """Build the content addressed key of a sentence video.
+
+    The key only depends on what ends up in the video: the clip library the
+    clips come from, the video type, the ordered SignIDs and the encoder
+    settings. Rendering the same sentence twice therefore maps to the same
+    object.
+    """
+    content = json.dumps([source, video_type, [str(s) for s in sign_ids],
+                          list(encoder_args)])
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    return f"{cache_prefix}{video_type}/{digest}.{ext}"
+
+
+def lookup(s3, bucket, key):
+    """Check with a HEAD request if ``key`` was already rendered and record
+    the hit or miss."""
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        hit = True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey', 'NotFound'):
+            raise
+        hit = False
+
+    with _stats_lock:
+        stats['hits' if hit else 'misses'] += 1
+        total = stats['hits'] + stats['misses']
+        print(f"Video cache {'hit' if hit else 'miss'} for {key} "
+              f"(hits={stats['hits']}, misses={stats['misses']}, "
+              f"hit_ratio={stats['hits'] / total:.2f})")
+    return hit
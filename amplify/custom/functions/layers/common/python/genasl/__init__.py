@@ -0,0 +1,2 @@
+# Shared modules for the GenASL Lambda functions. This directory is packaged
+# as the common Lambda layer, so it is available under /opt/python at runtime.
@@ -0,0 +1,104 @@
+import mmap
+import os
+import struct
+
+# File layout, all integers little endian uint32:
+#
+#   magic "GLIX" | version | count | max_words | offsets[count + 1] | entries
+#
+# Entries are sorted by gloss and stored back to back as
+# b"<GLOSS>\0<SignID>,<SignID>,..." with the SignIDs in ascending order, so a
+# lookup is a binary search over the offsets table without parsing the file.
+MAGIC = b'GLIX'
+VERSION = 1
+_HEADER = struct.Struct('<4sIII')
+
+
+def normalize(gloss):
+    """Normalize a gloss the same way dataprep/create_sign_videos.py does
+    before writing it to the table."""
+    return gloss.upper().replace('+', '').replace('#', '')
+
+
+def write_index(mapping, path):
+    """Write a Gloss -> [SignID] mapping as a sorted string table.
+
+    Args:
+        mapping (dict[str, Iterable[int]]): SignIDs of each gloss.
+        path (str): Output file.
+    """
+    entries = sorted((gloss.encode('utf-8'), sorted(int(s) for s in sign_ids))
+                     for gloss, sign_ids in mapping.items() if sign_ids)
+    max_words = max((gloss.count(b' ') + 1 for gloss, _ in entries), default=1)
+
+    data = bytearray()
+    offsets = []
+    for gloss, sign_ids in entries:
+        offsets.append(len(data))
+        data += gloss + b'\0' + ','.join(str(s) for s in sign_ids).encode('ascii')
+    offsets.append(len(data))
+
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(entries), max_words))
+        f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        f.write(data)
+
+
+class GlossIndex:
+    """Read only, memory mapped Gloss -> [SignID] index written by
+    :func:`write_index`.
+
+    Args:
+        path (str): Index file.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.max_words = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} gloss index')
+        self._offsets_at = _HEADER.size
+        self._data_at = self._offsets_at + 4 * (self.count + 1)
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, i):
+        start, end = struct.unpack_from('<II', self._mm, self._offsets_at + 4 * i)
+        return self._mm[self._data_at + start:self._data_at + end]
+
+    def get_all(self, gloss):
+        """Return all SignIDs of ``gloss`` in ascending order, or an empty
+        list if the gloss is not in the index."""
+        key = gloss.encode('utf-8')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self._entry(mid)
+            entry_key, _, sign_ids = entry.partition(b'\0')
+            if entry_key < key:
+                lo = mid + 1
+            elif entry_key > key:
+                hi = mid
+            else:
+                return [int(s) for s in sign_ids.split(b',')]
+        return []
+
+    def get(self, gloss):
+        """Return the first SignID of ``gloss``, trying the gloss as is and
+        then normalized, or None if neither is in the index."""
+        sign_ids = self.get_all(gloss) or self.get_all(normalize(gloss))
+        return sign_ids[0] if sign_ids else None
+
+    def close(self):
+        self._mm.close()
+
+
+def load_index(path):
+    """Open the index at ``path``, or return None if there is none."""
+    if not path or not os.path.exists(path):
+        return None
+    index = GlossIndex(path)
+    print(f"Loaded gloss index {path} with {len(index)} glosses")
+    return index
@@ -0,0 +1,195 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import boto3
+from botocore.config import Config
+
+from genasl.gloss_index import load_index
+
+cache_size = int(os.environ.get('GLOSS_CACHE_SIZE', 4096))
+cache_ttl = float(os.environ.get('GLOSS_CACHE_TTL', 900))
+lookup_workers = int(os.environ.get('GLOSS_LOOKUP_WORKERS', 16))
+# written by dataprep/export_gloss_index.py, shipped with the layer
+index_path = os.environ.get(
+    'GLOSS_INDEX_PATH', os.path.join(os.path.dirname(__file__), 'gloss_index.bin'))
+
+# sentinel returned by the cache for glosses it knows nothing about, so that
+# a cached "not in the table" (None) can be told apart from a cache miss
+_MISS = object()
+
+
+def tokenize(gloss_sentence):
+    """Split a gloss sentence into gloss tokens, dropping punctuation."""
+    tokens = []
+    for gloss in gloss_sentence.split(" "):
+        gloss = re.sub('[,!?.]', '', gloss.strip())
+        if gloss:
+            tokens.append(gloss)
+    return tokens
+
+
+class LRUCache:
+    """Thread safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    Args:
+        max_size (int): Maximum number of entries kept in the cache.
+        ttl (float): Time to live of an entry in seconds.
+    """
+
+    def __init__(self, max_size=cache_size, ttl=cache_ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISS
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class GlossResolver:
+    """Resolve gloss sentences to SignIDs.
+
+    Glosses are first looked up in the memory mapped :class:`GlossIndex`
+    exported from the table, which also lets consecutive tokens be matched
+    as a single multiword gloss. Only glosses missing from the index, i.e.
+    added to the table after the index was built, go to DynamoDB.
+
+    Those are deduplicated and looked up in parallel, and the letters needed
+    to finger spell unknown glosses are fetched in a second parallel round.
+    Every DynamoDB answer, including "not found", is kept in an LRU cache that
+    lives as long as the Lambda execution environment, so warm invocations
+    only go to DynamoDB for glosses they have not seen recently.
+
+    The table is keyed on (Gloss, SignID), so BatchGetItem cannot be used
+    without knowing the SignID up front. Each gloss is a single ``Query``
+    that projects only ``SignID`` and stops at the first item instead.
+
+    Args:
+        table_name (str): DynamoDB table holding the Gloss -> SignID rows.
+        cache (LRUCache, optional): Cache to use. Defaults to a new cache
+            sized from ``GLOSS_CACHE_SIZE`` and ``GLOSS_CACHE_TTL``.
+        max_workers (int): Number of concurrent DynamoDB queries.
+        index (GlossIndex, optional): Index to use. Defaults to the index at
+            ``GLOSS_INDEX_PATH`` if there is one.
+    """
+
+    def __init__(self, table_name, cache=None, max_workers=lookup_workers,
+                 index=None):
+        self.table_name = table_name
+        self.cache = cache if cache is not None else LRUCache()
+        self.index = index if index is not None else load_index(index_path)
+        self.max_workers = max_workers
+        self.client = boto3.client(
+            'dynamodb', config=Config(max_pool_connections=max_workers))
+
+    def resolve(self, gloss_sentence):
+        """Return the SignIDs for a gloss sentence in reading order.
+
+        Glosses without a sign are finger spelled letter by letter, letters
+        without a sign are skipped.
+        """
+        tokens = self.match_phrases(tokenize(gloss_sentence))
+        found = self.lookup(set(tokens))
+        letters = {c for gloss in tokens if found[gloss] is None for c in gloss}
+        found.update(self.lookup(letters - found.keys()))
+
+        sign_ids = []
+        for gloss in tokens:
+            if found[gloss] is not None:
+                sign_ids.append(found[gloss])
+                continue
+            # if not sign found finger spell it
+            for c in gloss:
+                if found[c] is not None:
+                    sign_ids.append(found[c])
+        return sign_ids
+
+    def match_phrases(self, tokens):
+        """Merge consecutive tokens that form a multiword gloss of the index,
+        longest match first."""
+        if self.index is None or self.index.max_words < 2:
+            return tokens
+        glosses = []
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self.index.max_words, len(tokens) - i), 1, -1):
+                phrase = " ".join(tokens[i:i + n])
+                if self.index.get(phrase) is not None:
+                    glosses.append(phrase)
+                    i += n
+                    break
+            else:
+                glosses.append(tokens[i])
+                i += 1
+        return glosses
+
+    def lookup(self, glosses):
+        """Return a dict mapping each gloss to its SignID, or None if the
+        gloss is not in the table."""
+        found = {}
+        pending = []
+        indexed = 0
+        for gloss in glosses:
+            if self.index is not None:
+                sign_id = self.index.get(gloss)
+                if sign_id is not None:
+                    found[gloss] = sign_id
+                    indexed += 1
+                    continue
+            sign_id = self.cache.get(gloss)
+            if sign_id is _MISS:
+                pending.append(gloss)
+            else:
+                found[gloss] = sign_id
+
+        if pending:
+            workers = min(self.max_workers, len(pending))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for gloss, sign_id in zip(pending,
+                                          executor.map(self._query, pending)):
+                    self.cache.put(gloss, sign_id)
+                    found[gloss] = sign_id
+        if glosses:
+            print(f"Resolved {len(found)} glosses, {indexed} from index, "
+                  f"{len(found) - len(pending) - indexed} from cache")
+        return found
+
+    def _query(self, gloss):
+        # for now pick the first item in the response
+        response = self.client.query(
+            TableName=self.table_name,
+            KeyConditionExpression='Gloss = :gloss',
+            ExpressionAttributeValues={':gloss': {'S': gloss}},
+            ProjectionExpression='SignID',
+            Limit=1
+        )
+        if not response['Items']:
+            return None
+        return int(response['Items'][0]['SignID']['N'])
@@ -0,0 +1,110 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+namespace = os.environ.get('METRICS_NAMESPACE', 'GenASL')
+# add the span timings to every response, not only when the event asks for it
+include_timings = os.environ.get('INCLUDE_TIMINGS', 'false').lower() == 'true'
+
+
+def stdout_sink(line):
+    """Default sink: CloudWatch Logs turns EMF lines printed by a Lambda
+    function into metrics."""
+    print(line)
+
+
+class ListSink:
+    """Sink keeping the emitted records in memory, for local runs and
+    tests."""
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, line):
+        self.records.append(json.loads(line))
+
+
+class Metrics:
+    """Record the time spent in named spans of an invocation and emit them
+    as a CloudWatch Embedded Metric Format (EMF) record.
+
+    Spans with the same name add up, so concurrent spans (e.g. one ``fetch``
+    per video type) report the total time spent rather than the wall time.
+    Create one instance per function at module level, call :meth:`reset` at
+    the start of each invocation and :meth:`flush` at its end. Resetting
+    drops the spans of an earlier invocation that failed or returned before
+    flushing, so that they are not added to the next record.
+
+    Args:
+        service (str): Value of the ``Service`` dimension.
+        sink (callable, optional): Called with each EMF line. Defaults to
+            :func:`stdout_sink`.
+    """
+
+    def __init__(self, service, sink=None):
+        self.service = service
+        self.sink = sink if sink is not None else stdout_sink
+        self._spans = {}
+        self._lock = Lock()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        with self._lock:
+            self._spans[name] = self._spans.get(name, 0.0) + seconds
+
+    def reset(self):
+        """Drop the spans recorded so far."""
+        with self._lock:
+            self._spans.clear()
+
+    def timings(self):
+        """Return the spans recorded so far in milliseconds."""
+        with self._lock:
+            return {name: round(seconds * 1000, 3) for name, seconds in self._spans.items()}
+
+    def flush(self, **dimensions):
+        """Emit the recorded spans as one EMF record and start over.
+
+        Args:
+            **dimensions: Extra dimensions, e.g. ``OutputMode='hls'``.
+
+        Returns:
+            dict: The emitted timings in milliseconds.
+        """
+        with self._lock:
+            timings = {name: round(seconds * 1000, 3) for name, seconds in self._spans.items()}
+            self._spans.clear()
+        if not timings:
+            return timings
+        dimensions = {'Service': self.service, **dimensions}
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': namespace,
+                    'Dimensions': [list(dimensions)],
+                    'Metrics': [{'Name': name, 'Unit': 'Milliseconds'} for name in timings],
+                }],
+            },
+            **dimensions,
+            **timings,
+        }
+        self.sink(json.dumps(record))
+        return timings
+
+    def respond(self, response, event=None, **dimensions):
+        """Flush the spans and add them to ``response`` as ``Timings`` if the
+        event sets ``Timings`` or ``INCLUDE_TIMINGS`` is true."""
+        timings = self.flush(**dimensions)
+        if include_timings or (event or {}).get('Timings'):
+            response['Timings'] = timings
+        return response
@@ -83,6 +83,13 @@ export class GenASLBackendStack extends Stack {
 
         });
 
+        // Shared python modules (gloss resolver, metrics, ...) used by several functions
+        const commonLayer = new lambda.LayerVersion(this, 'CommonLayer', {
+          code: lambda.Code.fromAsset('./amplify/custom/functions/layers/common'),
+          compatibleRuntimes: [lambda.Runtime.PYTHON_3_11],
+          description: 'Shared GenASL python modules',
+        });
+
 
 
         const blendedPoseFunction = new lambda.Function(this, 'BlendedPoseFunction', {
@@ -93,6 +100,7 @@ export class GenASLBackendStack extends Stack {
             description: 'This function creates a blended pose',
             timeout: Duration.seconds(config.lambdaSettings.timeout),
             memorySize: config.lambdaSettings.memorySize,
+            layers: [ffmpegLayer, commonLayer],
             environment: {
             POSE_BUCKET: config.pose_bucket,
             ASL_DATA_BUCKET: this.dataBucket.bucketName,
@@ -121,7 +129,7 @@ export class GenASLBackendStack extends Stack {
             description: 'This function converts gloss to pose',
             timeout: Duration.seconds(config.lambdaSettings.timeout),
             memorySize: config.lambdaSettings.memorySize,
-            layers: [ffmpegLayer],
+            layers: [ffmpegLayer, commonLayer],
             environment: {
             POSE_BUCKET: config.pose_bucket,
             ASL_DATA_BUCKET: this.dataBucket.bucketName,
@@ -158,6 +166,7 @@ export class GenASLBackendStack extends Stack {
             description: 'This function converts text to gloss',
             timeout: Duration.seconds(config.lambdaSettings.timeout),
             memorySize: config.lambdaSettings.memorySize,
+            layers: [commonLayer],
             environment: {
                 ENG_TO_ASL_MODEL: config.eng_to_asl_model,
             },
@@ -443,7 +452,7 @@ export class GenASLBackendStack extends Stack {
         functionName: 'OnConnectFunction-'+ process.env.AMPLIFY_ENV,
         description: 'This function is called when a user connects to the websocket',
         timeout: Duration.seconds(config.lambdaSettings.timeout),
-        layers: [ffmpegLayer],
+        layers: [ffmpegLayer, commonLayer],
         memorySize: config.lambdaSettings.memorySize,
         environment: {
             DYNAMO_TABLE_NAME: websocketTable.tableName,
@@ -460,7 +469,7 @@ export class GenASLBackendStack extends Stack {
         functionName: 'OnDisConnectFunction-'+ process.env.AMPLIFY_ENV,
         description: 'This function is called when a user disconnects to the websocket',
         timeout: Duration.seconds(config.lambdaSettings.timeout),
-        layers: [ffmpegLayer],
+        layers: [ffmpegLayer, commonLayer],
         memorySize: config.lambdaSettings.memorySize,
         environment: {
             DYNAMO_TABLE_NAME: websocketTable.tableName,
@@ -477,7 +486,7 @@ export class GenASLBackendStack extends Stack {
         functionName: 'OnDefaultFunction-'+ process.env.AMPLIFY_ENV,
         timeout: Duration.seconds(config.lambdaSettings.timeout),
         memorySize: config.lambdaSettings.memorySize,
-        layers: [ffmpegLayer],
+        layers: [ffmpegLayer, commonLayer],
         environment: {
             DYNAMO_TABLE_NAME: websocketTable.tableName,
             INPUT_BUCKET: this.dataBucket.bucketName,
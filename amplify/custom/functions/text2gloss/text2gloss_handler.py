@@ -1,9 +1,17 @@
 import json
 import os
+import sys
 
 import boto3
 
+# shared modules are deployed as the common layer, add them for local runs
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(SCRIPT_DIR), 'layers', 'common', 'python'))
+
+from genasl.metrics import Metrics
+
 eng_to_asl_model = os.environ['ENG_TO_ASL_MODEL']
+metrics = Metrics('text2gloss')
 
 
 def construct_query(text):
@@ -47,9 +55,9 @@ def lambda_handler(event, context):
         dict: text consists of ASL Gloss
     """
     #
-
-    return {'Gloss': text_to_asl_gloss(event.get("Text")),
-            'Text': event.get("Text")}
+    metrics.reset()
+    return metrics.respond({'Gloss': text_to_asl_gloss(event.get("Text")),
+                            'Text': event.get("Text")}, event)
 
 
 def text_to_asl_gloss(text):
@@ -66,11 +74,12 @@ def text_to_asl_gloss(text):
 
     modelId = eng_to_asl_model
 
-    response = bedrock_client.converse(
-        modelId=modelId,
-        messages=conversation,
-        inferenceConfig=inferenceConfig,
-    )
+    with metrics.span('model'):
+        response = bedrock_client.converse(
+            modelId=modelId,
+            messages=conversation,
+            inferenceConfig=inferenceConfig,
+        )
 
     gloss = response["output"]["message"]["content"][0]["text"]
 
@@ -13,16 +13,24 @@ import time
 from datetime import datetime
 from botocore.exceptions import ClientError
 
+# shared modules are deployed as the common layer, add them for local runs
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(SCRIPT_DIR), 'layers', 'common', 'python'))
+
+from genasl.metrics import Metrics
+
 BUCKET_NAME = os.environ['INPUT_BUCKET']
 ASL_TO_ENG_MODEL = os.environ['ASL_TO_ENG_MODEL']
 ASL_TO_ENG_MODEL = "us.meta.llama3-2-11b-instruct-v1:0"
 
 # Initialize Bedrock client
 bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-east-1')
+metrics = Metrics('websocket')
 
 
 def default(event, context):
     """Default handler for websocket messages"""
+    metrics.reset()
     print(event)
     message = event.get('body', '')
     print(BUCKET_NAME)
@@ -49,17 +57,22 @@ def default(event, context):
     print(stream_name)
     if stream_name:
         output_path = '/tmp/'
-        asl_input_file = process_kvs_to_webp(stream_name, output_path)
+        with metrics.span('fetch'):
+            asl_input_file = process_kvs_to_webp(stream_name, output_path)
         print(asl_input_file)
-        message = analyze_asl_image(asl_input_file)
+        with metrics.span('model'):
+            message = analyze_asl_image(asl_input_file)
     else:
         bucket_name = data.get('BucketName', '')
         key_name = data.get('KeyName', '')
-        input_file = download_from_s3(bucket_name, key_name)
+        with metrics.span('fetch'):
+            input_file = download_from_s3(bucket_name, key_name)
         file_name_without_ext, ext = os.path.splitext(os.path.basename(input_file))
         output_path = '/tmp/' + file_name_without_ext + '.webp'
-        asl_input_file = convert_mp4_to_webp(input_file, output_path)
-        message = analyze_asl_image(asl_input_file)
+        with metrics.span('encode'):
+            asl_input_file = convert_mp4_to_webp(input_file, output_path)
+        with metrics.span('model'):
+            message = analyze_asl_image(asl_input_file)
         # else:
         #     print("Error in converting mp4 to webp");
         #     message = "Error in converting mp4 to webp"
@@ -68,18 +81,19 @@ def default(event, context):
     #response = analyze_asl_image(output_path)
     #print(response)
     # broadcast the message to all connected users
-    _broadcast(
-        message,
-        _get_endpoint(event),
-        connection_id,
-        channel_name,
-        username,
-    )
+    with metrics.span('broadcast'):
+        _broadcast(
+            message,
+            _get_endpoint(event),
+            connection_id,
+            channel_name,
+            username,
+        )
 
-    return {
+    return metrics.respond({
         'statusCode': 200,
         'body': safe_dumps(message),
-    }
+    }, data)
 
 
 def handle_cmd(event, context):
@@ -0,0 +1,135 @@
+"""Throughput of the blendedpose temporal filters.
+
+Smooths a synthetic openpose sequence in shape [T, 134, 2] with every
+filter of the registry, three ways: the whole sequence at once, streamed
+one frame at a time with ``TemporalFilter.online`` and streamed in chunks.
+The frame by frame stream is also run the way ``Smoother.smooth`` used to,
+concatenating the history before every call, as a baseline for the ring
+buffer. Filters whose dependencies are missing (SmoothNet needs torch) are
+skipped.
+
+    python benchmarks/filter_bench.py --frames 900 --chunk 8
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(BENCH_DIR)
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+from render_bench import synthetic_poses
+from blending import temporal_filters
+
+FILTER_CFGS = {
+    'gaussian': dict(type='GaussianFilter', window_size=11, sigma=4.0),
+    'oneeuro': dict(type='OneEuroFilter'),
+    'savgol': dict(type='SavizkyGolayFilter', window_size=11, polyorder=2),
+    'smoothnet': dict(type='SmoothNetFilter', window_size=32, output_size=32,
+                      checkpoint=None, device='cpu'),
+}
+
+
+def openpose_poses(frames, rng):
+    """COCO-WholeBody keypoints with the neck appended, [T, 134, 2]."""
+    poses = synthetic_poses(frames, rng)
+    poses += rng.normal(0, 1.5, poses.shape)
+    neck = poses[:, 5:7].mean(axis=1, keepdims=True)
+    return np.concatenate((poses, neck), axis=1).astype(np.float32)
+
+
+def offline(cfg, poses, chunk):
+    temporal_filters.build_filter(cfg)(poses)
+
+
+def online_frames(cfg, poses, chunk):
+    pose_filter = temporal_filters.build_filter(cfg)
+    for frame in poses:
+        pose_filter.online(frame)
+
+
+def online_chunks(cfg, poses, chunk):
+    pose_filter = temporal_filters.build_filter(cfg)
+    for start in range(0, len(poses), chunk):
+        pose_filter.online(poses[start:start + chunk])
+
+
+def concat_frames(cfg, poses, chunk):
+    """The stream as Smoother.smooth filtered it before the ring buffer."""
+    pose_filter = temporal_filters.build_filter(cfg)
+    padding = pose_filter.window_size - 1
+    history = poses[:0]
+    for frame in poses:
+        window = np.concatenate((history, frame[None]), axis=0)
+        history = window[-padding:].copy() if padding > 0 else poses[:0]
+        pose_filter(window)[-1:]
+
+
+MODES = {
+    'offline': offline,
+    'online_frames': online_frames,
+    'online_chunks': online_chunks,
+    'concat_frames': concat_frames,
+}
+
+
+def measure(mode, cfg, poses, chunk, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        MODES[mode](cfg, poses, chunk)
+        timings.append(time.perf_counter() - start)
+    return len(poses) / min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames', type=int, default=900)
+    parser.add_argument('--chunk', type=int, default=8)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--filters', nargs='+', default=list(FILTER_CFGS),
+                        choices=list(FILTER_CFGS))
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'filter.json'))
+    args = parser.parse_args()
+
+    poses = openpose_poses(args.frames, np.random.default_rng(0))
+    results = {}
+    for name in args.filters:
+        cfg = FILTER_CFGS[name]
+        try:
+            temporal_filters.build_filter(cfg)
+        except ImportError as e:
+            print(f"{name:<10} skipped, {e}")
+            continue
+        results[name] = {mode: round(measure(mode, cfg, poses, args.chunk, args.repeats), 1)
+                         for mode in MODES}
+        print(f"{name:<10} " + '  '.join(f"{mode}={fps:,.0f} fps"
+                                         for mode, fps in results[name].items()))
+
+    report = {
+        'benchmark': 'filter',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""Offline benchmark of gloss2pose.
+
+Seeds local stand-ins for S3 and DynamoDB (see local_aws.py) with synthetic
+lookup clips and gloss rows, then drives the handler over a grid of
+sentence lengths, finger spelling ratios and concurrency levels. Reports the
+p50/p95 latency, the CPU seconds spent in ffmpeg and the bytes moved to and
+from S3 of every scenario, and writes them as JSON.
+
+Each scenario runs the current handler and, as a baseline, the Manager and
+Thread pipeline it replaced (see gloss2pose_baseline.py) on the same
+sentences. The baseline has no caches, ``--cold`` only empties those of
+the current handler.
+
+Needs an ffmpeg binary, nothing else leaves the machine:
+
+    python benchmarks/gloss2pose_bench.py --lengths 4,16 --concurrency 1,4 \\
+        --output benchmarks/results/gloss2pose.json
+    python benchmarks/gloss2pose_bench.py --lengths 4,16 --concurrency 1 --cold \\
+        --output benchmarks/results/gloss2pose_cold.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(BENCH_DIR)
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'gloss2pose'))
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'layers', 'common', 'python'))
+
+from local_aws import LocalDynamoDB, LocalS3
+
+POSE_BUCKET = 'bench-pose'
+DATA_BUCKET = 'bench-data'
+KEY_PREFIX = 'lookup/'
+LETTER_SIGN_ID = 100000
+
+
+def percentile(values, q):
+    """Nearest rank percentile of ``values``, ``q`` in [0, 100]."""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    rank = max(1, int(round(q / 100 * len(values) + 0.5)))
+    return values[min(rank, len(values)) - 1]
+
+
+def make_clip(ffmpeg, path, seconds, size):
+    """Encode a synthetic test pattern clip, VP9 for webm and MPEG-4 part 2
+    otherwise so that any ffmpeg build can write it."""
+    codec = ['-c:v', 'libvpx-vp9', '-b:v', '0', '-crf', '32'] \
+        if path.endswith('.webm') else ['-c:v', 'mpeg4']
+    subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'lavfi',
+                    '-i', f'testsrc=duration={seconds}:size={size}:rate=30',
+                    *codec, '-pix_fmt', 'yuv420p', path], check=True)
+
+
+def seed(handlers, s3, vocabulary, ffmpeg, clip_seconds, clip_size, workdir):
+    """Write the gloss rows and a lookup clip of every sign and video type,
+    at the keys each of ``handlers`` reads them from."""
+    rows = {f'WORD{i}': [i + 1] for i in range(vocabulary)}
+    rows.update({c: [LETTER_SIGN_ID + i] for i, c in enumerate(string.ascii_uppercase)})
+
+    sign_ids = [ids[0] for ids in rows.values()]
+    for handler in handlers:
+        for video_type in ('pose', 'sign', 'avatar'):
+            ext = os.path.splitext(handler.clip_key(video_type, 0))[1]
+            template = os.path.join(workdir, f'{video_type}{ext}')
+            if not os.path.exists(template):
+                make_clip(ffmpeg, template, clip_seconds, clip_size)
+            for sign_id in sign_ids:
+                path = s3._path(POSE_BUCKET, handler.clip_key(video_type, sign_id))
+                if os.path.exists(path):
+                    continue
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # every sign shares the same content, link instead of copying
+                os.link(template, path)
+    return rows
+
+
+def make_sentence(rng, rows, length, fingerspell_ratio):
+    """Random gloss sentence of ``length`` tokens, a ``fingerspell_ratio``
+    share of which are not in the table and get finger spelled."""
+    words = [gloss for gloss in rows if gloss.startswith('WORD')]
+    tokens = []
+    for _ in range(length):
+        if rng.random() < fingerspell_ratio:
+            tokens.append(''.join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 7))))
+        else:
+            tokens.append(rng.choice(words))
+    return ' '.join(tokens)
+
+
+def run_scenario(handler, s3, dynamodb, sink, sentences, concurrency, cold):
+    """Render ``sentences`` with ``concurrency`` requests in flight.
+
+    The per-span timings are only reported one request at a time. Concurrent
+    requests share the module level recorder of the handler, which every
+    request resets on entry, so their spans are lost or mixed up.
+    """
+    def _request(sentence):
+        if cold and hasattr(handler, 'clip_store'):
+            handler.clip_store.clear()
+            handler.gloss_resolver.cache.clear()
+        start = time.perf_counter()
+        handler.lambda_handler({'Gloss': sentence}, None)
+        return time.perf_counter() - start
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    downloaded, uploaded = s3.bytes_downloaded, s3.bytes_uploaded
+    s3_requests, queries = s3.requests, dynamodb.queries
+    sink.records.clear()
+
+    start = time.perf_counter()
+    # the handler logs every step, keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(_request, sentences))
+    wall = time.perf_counter() - start
+
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    spans = {}
+    for record in sink.records:
+        for name in record['_aws']['CloudWatchMetrics'][0]['Metrics']:
+            spans.setdefault(name['Name'], []).append(record[name['Name']])
+    return {
+        'requests': len(sentences),
+        'wall_s': round(wall, 3),
+        'throughput_rps': round(len(sentences) / wall, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'ffmpeg_cpu_s': round((after.ru_utime - usage.ru_utime)
+                              + (after.ru_stime - usage.ru_stime), 3),
+        'bytes_downloaded': s3.bytes_downloaded - downloaded,
+        'bytes_uploaded': s3.bytes_uploaded - uploaded,
+        's3_requests': s3.requests - s3_requests,
+        'dynamodb_queries': dynamodb.queries - queries,
+        'span_p50_ms': {name: round(percentile(values, 50), 3)
+                        for name, values in spans.items()} if concurrency == 1 else None,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--lengths', default='4,16,64',
+                        help='comma separated sentence lengths in glosses')
+    parser.add_argument('--fingerspell-ratios', default='0,0.25',
+                        help='comma separated shares of finger spelled glosses')
+    parser.add_argument('--concurrency', default='1,4',
+                        help='comma separated numbers of requests in flight')
+    parser.add_argument('--requests', type=int, default=8,
+                        help='requests per scenario')
+    parser.add_argument('--vocabulary', type=int, default=200,
+                        help='number of glosses in the table')
+    parser.add_argument('--clip-seconds', type=float, default=1.0)
+    parser.add_argument('--clip-size', default='320x240')
+    parser.add_argument('--concat-mode', default='encode', choices=('encode', 'copy'))
+    parser.add_argument('--implementations', default='current,baseline',
+                        help='comma separated handlers to run, current and/or baseline')
+    parser.add_argument('--use-index', action='store_true',
+                        help='resolve glosses from a gloss index instead of DynamoDB')
+    parser.add_argument('--cold', action='store_true',
+                        help='empty the clip and gloss caches before every request, '
+                             'use with a concurrency of 1')
+    parser.add_argument('--ffmpeg', default=shutil.which('ffmpeg') or '/opt/bin/ffmpeg')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'gloss2pose.json'))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.ffmpeg):
+        sys.exit(f'ffmpeg not found at {args.ffmpeg}, pass --ffmpeg')
+
+    workdir = tempfile.mkdtemp(prefix='gloss2pose-bench-')
+    index_path = os.path.join(workdir, 'gloss_index.bin')
+    os.environ.update({
+        'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+        'POSE_BUCKET': POSE_BUCKET,
+        'ASL_DATA_BUCKET': DATA_BUCKET,
+        'KEY_PREFIX': KEY_PREFIX,
+        'TABLE_NAME': 'bench',
+        'FFMPEG_PATH': args.ffmpeg,
+        'CONCAT_MODE': args.concat_mode,
+        'CLIP_CACHE_DIR': os.path.join(workdir, 'clip-cache') + '/',
+        'GLOSS_INDEX_PATH': index_path,
+    })
+    # the handlers read their configuration at import time
+    import boto3
+    import gloss2pose_baseline as baseline
+    import gloss2pose_handler as handler
+    from genasl.gloss_index import GlossIndex, write_index
+    from genasl.metrics import ListSink
+
+    implementations = {'current': handler, 'baseline': baseline}
+    implementations = {name: implementations[name]
+                       for name in args.implementations.split(',')}
+    try:
+        s3 = LocalS3(os.path.join(workdir, 's3'))
+        rows = seed(implementations.values(), s3, args.vocabulary, args.ffmpeg,
+                    args.clip_seconds, args.clip_size, workdir)
+        dynamodb = LocalDynamoDB(rows)
+
+        # the baseline still builds its boto3 clients on every call, only
+        # the requests go to the stand-ins
+        def baseline_s3_client():
+            boto3.client('s3')
+            return s3
+
+        def baseline_dynamodb_table():
+            boto3.resource('dynamodb')
+            return dynamodb.Table(baseline.table_name)
+
+        baseline.s3_client = baseline_s3_client
+        baseline.dynamodb_table = baseline_dynamodb_table
+        sink = ListSink()
+        handler.clip_store.client = s3
+        handler.gloss_resolver.client = dynamodb
+        handler.gloss_resolver.index = None
+        if args.use_index:
+            write_index(rows, index_path)
+            handler.gloss_resolver.index = GlossIndex(index_path)
+        handler.metrics.sink = sink
+
+        rng = random.Random(args.seed)
+        scenarios = []
+        for length in [int(v) for v in args.lengths.split(',')]:
+            for ratio in [float(v) for v in args.fingerspell_ratios.split(',')]:
+                for concurrency in [int(v) for v in args.concurrency.split(',')]:
+                    # fresh sentences, so every request misses the video cache,
+                    # the same for every implementation
+                    sentences = [make_sentence(rng, rows, length, ratio)
+                                 for _ in range(args.requests)]
+                    for name, implementation in implementations.items():
+                        result = run_scenario(implementation, s3, dynamodb, sink, sentences,
+                                              concurrency, args.cold)
+                        result.update(implementation=name, sentence_length=length,
+                                      fingerspell_ratio=ratio, concurrency=concurrency)
+                        scenarios.append(result)
+                        print(f"{name:<8} length={length:<4} fingerspell={ratio:<5} "
+                              f"concurrency={concurrency:<3} p50={result['p50_ms']:9.1f}ms "
+                              f"p95={result['p95_ms']:9.1f}ms "
+                              f"ffmpeg_cpu={result['ffmpeg_cpu_s']:7.2f}s "
+                              f"down={result['bytes_downloaded']:>11}B "
+                              f"up={result['bytes_uploaded']:>10}B")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'benchmark': 'gloss2pose',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'scenarios': scenarios,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Latency of the assignment solvers of blending.group.
+
+Groups synthetic bottom-up detections of M = 5 to 30 people with
+``_match_by_tag`` and each matcher (munkres, scipy and greedy), for 17 and
+134 joint types, and reports the milliseconds per image and the number of
+people found.
+
+    python benchmarks/group_bench.py --people 5 10 20 30 --joints 17 134
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+from blending import group
+from group_test import grouping_cfg, synthetic_detections
+
+MATCHERS = ('munkres', 'scipy', 'greedy')
+
+
+def measure(inp, params, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = group._match_by_tag(inp, params)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--people', type=int, nargs='+', default=[5, 10, 15, 20, 25, 30])
+    parser.add_argument('--joints', type=int, nargs='+', default=[17, 134])
+    parser.add_argument('--matchers', nargs='+', default=list(MATCHERS), choices=MATCHERS)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'group.json'))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for num_joints in args.joints:
+        results[num_joints] = {}
+        for num_people in args.people:
+            inp = synthetic_detections(num_people, rng, num_joints)
+            row = results[num_joints][num_people] = {}
+            for matcher in args.matchers:
+                params = group._Params(grouping_cfg(num_joints=num_joints, matcher=matcher))
+                ms, found = measure(inp, params, args.repeats)
+                row[matcher] = {'ms': round(ms, 3), 'people': found}
+            print(f"K={num_joints:<4} M={num_people:<3} " + '  '.join(
+                f"{matcher}={result['ms']:8.2f} ms ({result['people']})"
+                for matcher, result in row.items()))
+
+    report = {
+        'benchmark': 'group',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Latency of HeatmapParser.adjust and refine of blending.group.
+
+Runs both on synthetic 134-joint heatmaps of 128x96 with M = 5 to 30
+people, next to the per-joint loops they replaced, and checks that the
+keypoints are identical. ``refine`` is timed for all the people of the
+image, as ``HeatmapParser.parse`` calls it.
+
+    python benchmarks/heatmap_parser_bench.py --people 5 10 30 --size 128 96
+"""
+import argparse
+import copy
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+from blending.group import HeatmapParser
+
+
+def loop_adjust(results, heatmaps):
+    """HeatmapParser.adjust as it was, one joint at a time."""
+    _, _, H, W = heatmaps.shape
+    for batch_id, people in enumerate(results):
+        for people_id, people_i in enumerate(people):
+            for joint_id, joint in enumerate(people_i):
+                if joint[2] > 0:
+                    x, y = joint[0:2]
+                    xx, yy = int(x), int(y)
+                    tmp = heatmaps[batch_id][joint_id]
+                    y += 0.25 if tmp[min(H - 1, yy + 1), xx] > tmp[max(0, yy - 1), xx] else -0.25
+                    x += 0.25 if tmp[yy, min(W - 1, xx + 1)] > tmp[yy, max(0, xx - 1)] else -0.25
+                    results[batch_id][people_id, joint_id, 0:2] = (x + 0.5, y + 0.5)
+    return results
+
+
+def loop_refine(heatmap, tag, keypoints, use_udp=False):
+    """HeatmapParser.refine as it was, one joint at a time."""
+    K, H, W = heatmap.shape
+    if len(tag.shape) == 3:
+        tag = tag[..., None]
+    tags = []
+    for i in range(K):
+        if keypoints[i, 2] > 0:
+            x, y = keypoints[i][:2].astype(int)
+            tags.append(tag[i, np.clip(y, 0, H - 1), np.clip(x, 0, W - 1)])
+    prev_tag = np.mean(tags, axis=0)
+    results = []
+    for _heatmap, _tag in zip(heatmap, tag):
+        distance_tag = (((_tag - prev_tag[None, None, :])**2).sum(axis=2)**0.5)
+        norm_heatmap = _heatmap - np.round(distance_tag)
+        y, x = np.unravel_index(np.argmax(norm_heatmap), _heatmap.shape)
+        xx, yy = x.copy(), y.copy()
+        val = _heatmap[y, x]
+        if not use_udp:
+            x += 0.5
+            y += 0.5
+        x += 0.25 if _heatmap[yy, min(W - 1, xx + 1)] > _heatmap[yy, max(0, xx - 1)] else -0.25
+        y += 0.25 if _heatmap[min(H - 1, yy + 1), xx] > _heatmap[max(0, yy - 1), xx] else -0.25
+        results.append((x, y, val))
+    results = np.array(results)
+    for i in range(K):
+        if results[i, 2] > 0 and keypoints[i, 2] == 0:
+            keypoints[i, :3] = results[i, :3]
+    return keypoints
+
+
+def synthetic_image(num_people, num_joints, height, width, rng):
+    """Heatmaps and tags of one image, and grouped people as from
+    ``HeatmapParser.match``, with a fifth of the joints missing."""
+    heatmaps = rng.random((1, num_joints, height, width)).astype(np.float32)
+    tags = rng.normal(0, 1, (num_joints, height, width)).astype(np.float32)
+    people = np.zeros((num_people, num_joints, 4), dtype=np.float32)
+    people[..., 0] = rng.integers(0, width, (num_people, num_joints))
+    people[..., 1] = rng.integers(0, height, (num_people, num_joints))
+    people[..., 2] = rng.uniform(0.1, 1, (num_people, num_joints))
+    people[..., 2] *= rng.random((num_people, num_joints)) > 0.2
+    return heatmaps, tags, [people]
+
+
+def measure(fn, make_input, repeats):
+    timings = []
+    for _ in range(repeats):
+        inp = make_input()
+        start = time.perf_counter()
+        out = fn(*inp)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--people', type=int, nargs='+', default=[5, 10, 20, 30])
+    parser.add_argument('--joints', type=int, default=134)
+    parser.add_argument('--size', type=int, nargs=2, default=[128, 96], metavar=('H', 'W'))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output',
+                        default=os.path.join(BENCH_DIR, 'results', 'heatmap_parser.json'))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for num_people in args.people:
+        heatmaps, tags, people = synthetic_image(num_people, args.joints, *args.size, rng)
+
+        def adjust_input():
+            return copy.deepcopy(people), heatmaps
+
+        def refine_all(refine):
+            def run(persons):
+                return [refine(heatmaps[0], tags, person) for person in persons]
+            return run
+
+        def refine_input():
+            return (copy.deepcopy(people[0]),)
+
+        timings = {}
+        for name, (loop, vectorized, make_input) in {
+            'adjust': (loop_adjust, HeatmapParser.adjust, adjust_input),
+            'refine': (refine_all(loop_refine), refine_all(HeatmapParser.refine), refine_input),
+        }.items():
+            loop_ms, expected = measure(loop, make_input, args.repeats)
+            vectorized_ms, actual = measure(vectorized, make_input, args.repeats)
+            if not all(np.array_equal(a, b) for a, b in zip(actual, expected)):
+                sys.exit(f'{name} differs from the loop with {num_people} people')
+            timings[name] = {'loop_ms': round(loop_ms, 3), 'vectorized_ms': round(vectorized_ms, 3)}
+        results[num_people] = timings
+        print(f"M={num_people:<3} " + '  '.join(
+            f"{name} loop {t['loop_ms']:8.2f} ms vectorized {t['vectorized_ms']:7.2f} ms"
+            for name, t in timings.items()))
+
+    report = {
+        'benchmark': 'heatmap_parser',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
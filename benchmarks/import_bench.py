@@ -0,0 +1,142 @@
+"""Cold-start import cost of the blendedpose modules.
+
+Imports each target in a fresh interpreter with ``-X importtime`` and
+reports the median wall time, the heaviest packages it pulled in and
+whether torch, scipy or munkres were loaded. The slim targets must not load
+them, only building a filter or parser that needs them may, and ``--budget-ms``
+caps the import time of the handler, so that a regression fails the run.
+
+    python benchmarks/import_bench.py --repeats 5 --budget-ms 1500
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+BLENDEDPOSE_DIR = os.path.join(FUNCTIONS_DIR, 'blendedpose')
+COMMON_LAYER_DIR = os.path.join(FUNCTIONS_DIR, 'layers', 'common', 'python')
+
+HEAVY = ('torch', 'scipy', 'munkres', 'mmpose')
+PACKAGES = ('numpy', 'cv2', 'scipy', 'torch', 'munkres', 'boto3', 'botocore')
+# statement run after the imports, to time what the first request pays for
+FIRST_SMOOTH = ('import numpy as np; '
+                'smooth_video.Smoother(smooth_video.filter_cfg).smooth_array('
+                'np.zeros((30, 133, 2), np.float32))')
+TARGETS = {
+    # name: (import statement, heavy modules allowed, code run afterwards)
+    'blending': ('import blending', (), ''),
+    'blending.smooth_video': ('from blending import smooth_video', (), ''),
+    'blending.group': ('from blending import group', (), ''),
+    'blending.post_transforms': ('from blending import post_transforms', (), ''),
+    'blending.visualizer': ('from blending.visualizer import visualizer', (), ''),
+    'blendedpose_handler': ('import blendedpose_handler', (), ''),
+    'first_smooth': ('from blending import smooth_video', ('scipy',), FIRST_SMOOTH),
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+{after}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed,
+                  'loaded': sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Return the microseconds spent in the modules of each top-level
+    package, the sum of their self times."""
+    packages = {}
+    for line in stderr.splitlines():
+        # import time:   self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return packages
+
+
+def run(name, repeats):
+    statement, allowed, after = TARGETS[name]
+    env = dict(os.environ,
+               PYTHONPATH=os.pathsep.join([BLENDEDPOSE_DIR, COMMON_LAYER_DIR]),
+               PYTHONDONTWRITEBYTECODE='1')
+    # blendedpose_handler reads its configuration at import time
+    for key, value in (('POSE_BUCKET', 'bench-pose'), ('ASL_DATA_BUCKET', 'bench-data'),
+                       ('KEY_PREFIX', 'lookup/'), ('TABLE_NAME', 'bench-table'),
+                       ('AWS_DEFAULT_REGION', 'us-east-1')):
+        env.setdefault(key, value)
+    code = PROBE.format(statement=statement, after=after, heavy=HEAVY)
+
+    timings, packages = [], {}
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env,
+                                cwd=BLENDEDPOSE_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f'{name} failed:\n{result.stderr[-2000:]}')
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(probe['seconds'])
+        packages = parse_importtime(result.stderr)
+    unexpected = sorted(set(probe['loaded']) - set(allowed))
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 1),
+        'min_ms': round(min(timings) * 1000, 1),
+        'packages_ms': {package: round(packages[package] / 1000, 1)
+                        for package in PACKAGES if package in packages},
+        'loaded': probe['loaded'],
+        'unexpected': unexpected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--targets', nargs='+', default=list(TARGETS), choices=list(TARGETS))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='fail if blendedpose_handler takes longer to import')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'import.json'))
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.targets:
+        results[name] = result = run(name, args.repeats)
+        packages = ' '.join(f'{package}={ms:.0f}ms' for package, ms in result['packages_ms'].items())
+        print(f"{name:<26} {result['median_ms']:8.1f} ms  {packages}"
+              f"{'  UNEXPECTED ' + ','.join(result['unexpected']) if result['unexpected'] else ''}")
+
+    report = {
+        'benchmark': 'import',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    failures = [f"{name} loaded {', '.join(result['unexpected'])}"
+                for name, result in results.items() if result['unexpected']]
+    handler = results.get('blendedpose_handler')
+    if args.budget_ms is not None and handler and handler['median_ms'] > args.budget_ms:
+        failures.append(f"blendedpose_handler took {handler['median_ms']} ms, "
+                        f"budget {args.budget_ms} ms")
+    if failures:
+        sys.exit('; '.join(failures))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Benchmark of the blendedpose keypoint loaders.
+
+Seeds a local S3 stand-in (see local_aws.py) with per-frame .npy keypoints
+of a sentence and compares the serial loop that ``smooth_video`` used
+before (kept here as ``get_keypoints``) with the concurrent ``keypoint_loader.load_keypoints``. Every request waits
+``--latency-ms`` to mimic the round trip to S3, which is what the
+concurrent loader hides.
+
+    python benchmarks/keypoint_loader_bench.py --signs 10 --frames 45
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(BENCH_DIR)
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from local_aws import LocalS3
+from blending import keypoint_loader
+
+BUCKET = 'bench-pose'
+PREFIX = 'lookup/keypoints/'
+
+
+def seed(s3, signs, frames, keypoints, rng):
+    """Write ``frames`` [1, K, 3] .npy frames, numbered from 1, per sign."""
+    folder_prefixes = []
+    for sign_id in range(1, signs + 1):
+        folder_prefix = f'{PREFIX}{sign_id}'
+        for frame in range(1, frames + 1):
+            buffer = io.BytesIO()
+            np.save(buffer, rng.random((1, keypoints, 3)).astype(np.float32))
+            s3.put_object(Bucket=BUCKET, Key=f'{folder_prefix}/{frame}.npy',
+                          Body=buffer.getvalue())
+        folder_prefixes.append(folder_prefix)
+    return folder_prefixes
+
+
+def extract_number_from_path(file_path):
+    # Get the base name of the file (6.npy in this case)
+    base_name = os.path.basename(file_path)
+    # Split the base name by '.' and get the first part
+    number = base_name.split('.')[0]
+    return number
+
+
+def get_keypoints(s3, bucket_name, folder_prefixes):
+    """smooth_video.get_keypoints as it was, one frame at a time. It created
+    its own client, ``s3`` stands in for it."""
+    paginator = s3.get_paginator('list_objects_v2')
+
+    # Initialize an empty list to store the numpy arrays
+    poses = []
+
+    for folder_prefix in folder_prefixes:
+        # List objects in the specified S3 folder
+        pages = paginator.paginate(Bucket=bucket_name, Prefix=folder_prefix)
+        frame_cnt=len(poses)
+        for page in pages:
+            if 'Contents' in page:
+                for obj in page['Contents']:
+                    # Get the object key
+                    key = obj['Key']
+
+                    # Check if the object is a file (not a subfolder)
+                    if not key.endswith('/'):
+                        # Download the file content
+                        response = s3.get_object(Bucket=bucket_name, Key=key)
+                        content = response['Body'].read()
+
+                        # Load the numpy array from the content
+                        result = {
+                            'track_id': frame_cnt+int(extract_number_from_path(key)),
+                            'keypoints': np.load(io.BytesIO(content))[0]
+                        }
+                        poses.append(result)
+    return poses
+
+
+def serial(s3, folder_prefixes, workers):
+    poses = get_keypoints(s3, BUCKET, folder_prefixes)
+    poses.sort(key=lambda pose: pose['track_id'])
+    return np.stack([pose['keypoints'] for pose in poses])
+
+
+def concurrent(s3, folder_prefixes, workers):
+    return keypoint_loader.load_keypoints(s3, BUCKET, folder_prefixes,
+                                          max_workers=workers)['keypoints']
+
+
+def measure(loader, s3, folder_prefixes, workers, repeats):
+    timings = []
+    requests = s3.requests
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            keypoints = loader(s3, folder_prefixes, workers)
+        timings.append(time.perf_counter() - start)
+    return keypoints, {
+        'median_s': round(statistics.median(timings), 4),
+        'min_s': round(min(timings), 4),
+        'requests': (s3.requests - requests) // repeats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--signs', type=int, default=10)
+    parser.add_argument('--frames', type=int, default=45, help='frames per sign')
+    parser.add_argument('--keypoints', type=int, default=134)
+    parser.add_argument('--latency-ms', type=float, default=15.0)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'keypoint_loader.json'))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='keypoint-loader-bench-') as workdir:
+        s3 = LocalS3(workdir)
+        folder_prefixes = seed(s3, args.signs, args.frames, args.keypoints,
+                               np.random.default_rng(0))
+        s3.latency = args.latency_ms / 1000
+
+        expected, serial_result = measure(serial, s3, folder_prefixes, args.workers, args.repeats)
+        keypoints, concurrent_result = measure(concurrent, s3, folder_prefixes, args.workers,
+                                               args.repeats)
+        assert np.array_equal(expected, keypoints), 'the loaders disagree on the frames'
+
+    results = {'serial': serial_result, 'concurrent': concurrent_result}
+    for name, result in results.items():
+        print(f"{name:<10} median={result['median_s']:.3f}s min={result['min_s']:.3f}s "
+              f"requests={result['requests']}")
+    print(f"speedup x{serial_result['median_s'] / concurrent_result['median_s']:.1f}")
+
+    report = {
+        'benchmark': 'keypoint_loader',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""In-process stand-ins for the S3 and DynamoDB clients used by the Lambda
+functions, so they can be benchmarked without network access.
+
+Only the calls the functions make are implemented, with the same arguments
+and errors as boto3.
+"""
+import io
+import json
+import os
+import shutil
+import time
+from threading import Lock
+
+from botocore.exceptions import ClientError
+
+
+class LocalS3:
+    """S3 client backed by a local folder, ``root/<bucket>/<key>``.
+
+    Counts the bytes read from and written to the buckets.
+
+    Args:
+        root (str): Folder holding the buckets.
+        latency (float): Seconds every request waits before being served, to
+            mimic the round trip to S3. Default: 0
+    """
+
+    def __init__(self, root, latency=0.0):
+        self.root = root
+        self.latency = latency
+        self.bytes_downloaded = 0
+        self.bytes_uploaded = 0
+        self.requests = 0
+        self._lock = Lock()
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, key)
+
+    def _count(self, downloaded=0, uploaded=0):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            self.bytes_downloaded += downloaded
+            self.bytes_uploaded += uploaded
+
+    def _write_metadata(self, bucket, key, metadata):
+        with open(self._path(bucket, key) + '.metadata.json', 'w') as f:
+            json.dump(metadata or {}, f)
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        self._count()
+        if not os.path.isfile(path):
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}},
+                              'HeadObject')
+        metadata = {}
+        if os.path.exists(path + '.metadata.json'):
+            with open(path + '.metadata.json') as f:
+                metadata = json.load(f)
+        return {'ContentLength': os.path.getsize(path), 'Metadata': metadata}
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            self._count()
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}},
+                              'HeadObject')
+        shutil.copyfile(path, Filename)
+        self._count(downloaded=os.path.getsize(path))
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, **kwargs):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(Filename, path)
+        self._write_metadata(Bucket, Key, (ExtraArgs or {}).get('Metadata'))
+        self._count(uploaded=os.path.getsize(path))
+
+    def put_object(self, Bucket, Key, Body, Metadata=None, **kwargs):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(Body)
+        self._write_metadata(Bucket, Key, Metadata)
+        self._count(uploaded=len(Body))
+        return {}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            self._count()
+            raise ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'Not Found'}},
+                              'GetObject')
+        with open(path, 'rb') as f:
+            body = f.read()
+        self._count(downloaded=len(body))
+        return {'Body': io.BytesIO(body), 'ContentLength': len(body)}
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None, MaxKeys=1000):
+        bucket_root = os.path.join(self.root, Bucket)
+        keys = []
+        for folder, _, files in os.walk(bucket_root):
+            for name in files:
+                key = os.path.relpath(os.path.join(folder, name), bucket_root)
+                key = key.replace(os.sep, '/')
+                if key.startswith(Prefix) and not key.endswith('.metadata.json'):
+                    keys.append(key)
+        # S3 lists keys in lexicographic order
+        keys.sort()
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + MaxKeys]
+        self._count()
+        response = {'Contents': [{'Key': key, 'Size': os.path.getsize(self._path(Bucket, key))}
+                                 for key in page],
+                    'KeyCount': len(page),
+                    'IsTruncated': start + MaxKeys < len(keys)}
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = str(start + MaxKeys)
+        return response
+
+    def get_paginator(self, operation_name):
+        assert operation_name == 'list_objects_v2', operation_name
+        return _ListObjectsV2Paginator(self)
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn=3600):
+        return 'file://' + self._path(Params['Bucket'], Params['Key'])
+
+
+class _ListObjectsV2Paginator:
+
+    def __init__(self, s3):
+        self.s3 = s3
+
+    def paginate(self, **kwargs):
+        token = None
+        while True:
+            page = self.s3.list_objects_v2(ContinuationToken=token, **kwargs)
+            yield page
+            if not page['IsTruncated']:
+                return
+            token = page['NextContinuationToken']
+
+
+class LocalDynamoDB:
+    """DynamoDB client answering ``Query`` on the (Gloss, SignID) table from
+    memory.
+
+    Args:
+        rows (dict[str, list[int]]): SignIDs of each gloss.
+    """
+
+    def __init__(self, rows):
+        self.rows = {gloss: sorted(sign_ids) for gloss, sign_ids in rows.items()}
+        self.queries = 0
+        self._lock = Lock()
+
+    def query(self, TableName, KeyConditionExpression, ExpressionAttributeValues,
+              ProjectionExpression=None, Limit=None, **kwargs):
+        with self._lock:
+            self.queries += 1
+        gloss = ExpressionAttributeValues[':gloss']['S']
+        sign_ids = self.rows.get(gloss, [])[:Limit]
+        return {'Items': [{'Gloss': {'S': gloss}, 'SignID': {'N': str(s)}}
+                          for s in sign_ids]}
+
+    def Table(self, name):
+        """The ``boto3.resource('dynamodb').Table`` view of the rows."""
+        return _LocalTable(self)
+
+
+class _LocalTable:
+
+    def __init__(self, dynamodb):
+        self.dynamodb = dynamodb
+
+    def query(self, KeyConditionExpression, **kwargs):
+        # only Key('Gloss').eq(gloss) is supported
+        _, gloss = KeyConditionExpression.get_expression()['values']
+        response = self.dynamodb.query(
+            TableName=None, KeyConditionExpression='Gloss = :gloss',
+            ExpressionAttributeValues={':gloss': {'S': gloss}})
+        items = [{'Gloss': gloss, 'SignID': int(item['SignID']['N'])}
+                 for item in response['Items']]
+        return {'Items': items, 'Count': len(items)}
@@ -0,0 +1,141 @@
+"""Memory and latency of blending.nms.nearby_joints_nms.
+
+Runs the blocked float32 ``nearby_joints_nms`` and, as a baseline, the
+version that materialized every joint distance at once, on crowded frames
+of 134-keypoint candidates (see nms_bench.py). Each run happens in a fresh
+process, so that the peak RSS it adds can be read from getrusage. Checks
+that both keep the same instances.
+
+    python benchmarks/nearby_joints_bench.py --candidates 100 200 400 --block-size 32
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(BENCH_DIR)
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+from nms_bench import crowded_frame
+from blending import nms
+
+DIST_THR = 0.05
+
+
+def dense_nearby_joints_nms(kpts_db, dist_thr, num_nearby_joints_thr=None):
+    """nearby_joints_nms as it was, with the N x N x K distances at once."""
+    scores = np.array([k['score'] for k in kpts_db])
+    kpts = np.array([k['keypoints'] for k in kpts_db])
+    num_people, num_joints, _ = kpts.shape
+    if num_nearby_joints_thr is None:
+        num_nearby_joints_thr = num_joints // 2
+    pose_area = kpts.max(axis=1) - kpts.min(axis=1)
+    pose_area = np.sqrt(np.power(pose_area, 2).sum(axis=1))
+    pose_area = pose_area.reshape(num_people, 1, 1)
+    pose_area = np.tile(pose_area, (num_people, num_joints))
+    close_dist_thr = pose_area * dist_thr
+    instance_dist = kpts[:, None] - kpts
+    instance_dist = np.sqrt(np.power(instance_dist, 2).sum(axis=3))
+    close_instance_num = (instance_dist < close_dist_thr).sum(2)
+    close_instance = close_instance_num > num_nearby_joints_thr
+    ignored_pose_inds, keep_pose_inds = set(), list()
+    for i in np.argsort(scores)[::-1]:
+        if i in ignored_pose_inds:
+            continue
+        keep_inds = close_instance[i].nonzero()[0]
+        keep_ind = keep_inds[np.argmax(scores[keep_inds])]
+        if keep_ind not in ignored_pose_inds:
+            keep_pose_inds.append(keep_ind)
+            ignored_pose_inds = ignored_pose_inds.union(set(keep_inds))
+    return keep_pose_inds
+
+
+def child(variant, candidates, block_size, repeats):
+    """Run one variant, print its keep indices, latency and added peak RSS."""
+    kpts_db = crowded_frame(candidates, np.random.default_rng(candidates))
+    if variant == 'dense':
+        run = lambda: dense_nearby_joints_nms(kpts_db, DIST_THR)  # noqa: E731
+    else:
+        run = lambda: nms.nearby_joints_nms(kpts_db, DIST_THR,  # noqa: E731
+                                            block_size=block_size)
+    # ru_maxrss is in KiB on Linux
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        keep = run()
+        timings.append(time.perf_counter() - start)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'keep': [int(i) for i in keep], 'ms': min(timings) * 1000,
+                      'peak_mib': (peak - baseline) / 1024}))
+
+
+def measure(variant, candidates, block_size, repeats):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', variant,
+         '--candidates', str(candidates), '--block-size', str(block_size),
+         '--repeats', str(repeats)],
+        capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--candidates', type=int, nargs='+', default=[100, 200, 400])
+    parser.add_argument('--block-size', type=int, default=32)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--child', choices=['dense', 'blocked'], help=argparse.SUPPRESS)
+    parser.add_argument('--output',
+                        default=os.path.join(BENCH_DIR, 'results', 'nearby_joints.json'))
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.candidates[0], args.block_size, args.repeats)
+        return
+
+    results = {}
+    for candidates in args.candidates:
+        dense = measure('dense', candidates, args.block_size, args.repeats)
+        blocked = measure('blocked', candidates, args.block_size, args.repeats)
+        if dense['keep'] != blocked['keep']:
+            sys.exit(f"{candidates} candidates: the blocked version keeps {blocked['keep']}, "
+                     f"the dense one {dense['keep']}")
+        results[candidates] = {
+            'dense_ms': round(dense['ms'], 3),
+            'blocked_ms': round(blocked['ms'], 3),
+            'dense_peak_mib': round(dense['peak_mib'], 1),
+            'blocked_peak_mib': round(blocked['peak_mib'], 1),
+            'kept': len(blocked['keep']),
+        }
+        print(f"{candidates:>4} candidates  dense {dense['ms']:8.2f} ms "
+              f"{dense['peak_mib']:7.1f} MiB  blocked {blocked['ms']:8.2f} ms "
+              f"{blocked['peak_mib']:7.1f} MiB  kept {len(blocked['keep'])}")
+
+    report = {
+        'benchmark': 'nearby_joints',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'child')},
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Latency of the OKS NMS of blending.nms on crowded frames.
+
+Builds frames of 50 to 200 candidate poses of 134 keypoints, several
+jittered candidates per person, and runs ``oks_nms`` and ``soft_oks_nms``
+with the OKS of every pair computed at once (``oks_matrix``) and, as a
+baseline, with the per-instance ``oks_iou`` loop they used before. Checks
+that both keep the same instances.
+
+    python benchmarks/nms_bench.py --candidates 50 100 200
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(BENCH_DIR)
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+from filter_bench import openpose_poses
+from blending import nms
+
+
+def crowded_frame(candidates, rng, people=8):
+    """Candidates of ``people`` signers, jittered copies of their poses."""
+    poses = openpose_poses(people, rng) - [320, 360]
+    poses = poses * rng.uniform(0.3, 0.6, (people, 1, 1)) + rng.uniform(0, 1000, (people, 1, 2))
+    kpts_db = []
+    for i in range(candidates):
+        pose = poses[i % people] + rng.normal(0, rng.uniform(0.5, 5), poses.shape[1:])
+        scores = rng.uniform(0, 1, (len(pose), 1))
+        width, height = pose.max(axis=0) - pose.min(axis=0)
+        kpts_db.append(dict(keypoints=np.concatenate((pose, scores), axis=1),
+                            score=float(rng.uniform()), area=float(width * height)))
+    return kpts_db
+
+
+def loop_oks_iou(g, d, a_g, a_d, sigmas, vis_thr=None):
+    """oks_iou as it was, one detection at a time."""
+    vars = (sigmas * 2)**2
+    xg, yg = g[0::3], g[1::3]
+    ious = np.zeros(len(d), dtype=np.float32)
+    for n_d in range(0, len(d)):
+        dx = d[n_d, 0::3] - xg
+        dy = d[n_d, 1::3] - yg
+        e = (dx**2 + dy**2) / vars / ((a_g + a_d[n_d]) / 2 + np.spacing(1)) / 2
+        ious[n_d] = np.sum(np.exp(-e)) / len(e) if len(e) != 0 else 0.0
+    return ious
+
+
+def loop_oks_nms(kpts_db, thr, sigmas):
+    scores = np.array([k['score'] for k in kpts_db])
+    kpts = np.array([k['keypoints'].flatten() for k in kpts_db])
+    areas = np.array([k['area'] for k in kpts_db])
+    order = scores.argsort()[::-1]
+    keep = []
+    while len(order) > 0:
+        i = order[0]
+        keep.append(i)
+        oks_ovr = loop_oks_iou(kpts[i], kpts[order[1:]], areas[i], areas[order[1:]], sigmas)
+        order = order[np.where(oks_ovr <= thr)[0] + 1]
+    return np.array(keep)
+
+
+def loop_soft_oks_nms(kpts_db, thr, sigmas, max_dets=20):
+    scores = np.array([k['score'] for k in kpts_db])
+    kpts = np.array([k['keypoints'].flatten() for k in kpts_db])
+    areas = np.array([k['area'] for k in kpts_db])
+    order = scores.argsort()[::-1]
+    scores = scores[order]
+    keep = []
+    while len(order) > 0 and len(keep) < max_dets:
+        i = order[0]
+        oks_ovr = loop_oks_iou(kpts[i], kpts[order[1:]], areas[i], areas[order[1:]], sigmas)
+        order = order[1:]
+        scores = nms._rescore(oks_ovr, scores[1:], thr)
+        tmp = scores.argsort()[::-1]
+        order, scores = order[tmp], scores[tmp]
+        keep.append(i)
+    return np.array(keep, dtype=np.intp)
+
+
+def measure(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        keep = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, keep
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--candidates', type=int, nargs='+', default=[50, 100, 200])
+    parser.add_argument('--thr', type=float, default=0.9)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'nms.json'))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sigmas = nms._get_sigmas(None, 134)
+    results = {}
+    for candidates in args.candidates:
+        kpts_db = crowded_frame(candidates, rng)
+        cases = {
+            'oks_nms': (lambda: loop_oks_nms(kpts_db, args.thr, sigmas),
+                        lambda: nms.oks_nms(kpts_db, args.thr)),
+            'soft_oks_nms': (lambda: loop_soft_oks_nms(kpts_db, args.thr, sigmas),
+                             lambda: nms.soft_oks_nms(kpts_db, args.thr)),
+        }
+        results[candidates] = {}
+        for name, (loop, matrix) in cases.items():
+            loop_ms, loop_keep = measure(loop, args.repeats)
+            matrix_ms, matrix_keep = measure(matrix, args.repeats)
+            if not np.array_equal(loop_keep, matrix_keep):
+                sys.exit(f'{name} keeps {matrix_keep}, the loop keeps {loop_keep}')
+            results[candidates][name] = {'loop_ms': round(loop_ms, 3),
+                                         'matrix_ms': round(matrix_ms, 3),
+                                         'kept': len(matrix_keep)}
+            print(f"{candidates:>4} candidates {name:<13} loop {loop_ms:8.2f} ms  "
+                  f"matrix {matrix_ms:7.2f} ms  x{loop_ms / matrix_ms:5.1f}  "
+                  f"kept {len(matrix_keep)}")
+
+    report = {
+        'benchmark': 'nms',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark of the multi-process blendedpose rendering.
+
+Renders a synthetic sentence (see render_bench.py) in process, as the
+producer thread of ``video_writer.write_frames`` does, and with
+``parallel_render.render_frames`` for a range of worker counts, checks that
+every frame is identical and reports the frames per second. Frames are
+discarded so that only rendering is measured.
+
+    python benchmarks/parallel_render_bench.py --frames 900 --workers 1 2 4
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(BENCH_DIR)
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from render_bench import FRAME_SIZE, synthetic_poses
+from blending import parallel_render
+from blending import smooth_video
+
+FRAME_SHAPE = (FRAME_SIZE[1], FRAME_SIZE[0], 3)
+
+
+def in_process(poses, workers, chunk_frames):
+    renderer = smooth_video.create_renderer()
+    frame = np.empty(FRAME_SHAPE, dtype=np.uint8)
+    for keypoints in poses:
+        frame.fill(0)
+        yield renderer.render(frame, keypoints)
+
+
+def processes(poses, workers, chunk_frames):
+    return parallel_render.render_frames(smooth_video.create_renderer, poses, FRAME_SHAPE,
+                                         workers, chunk_frames)
+
+
+def measure(render, poses, workers, chunk_frames):
+    digest = hashlib.sha1()
+    start = time.perf_counter()
+    for frame in render(poses, workers, chunk_frames):
+        digest.update(frame)
+    elapsed = time.perf_counter() - start
+    return digest.hexdigest(), {
+        'seconds': round(elapsed, 3),
+        'fps': round(len(poses) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames', type=int, default=900)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({2, parallel_render.available_cpus()}))
+    parser.add_argument('--chunk-frames', type=int, default=parallel_render.render_chunk_frames)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'parallel_render.json'))
+    args = parser.parse_args()
+
+    poses = synthetic_poses(args.frames, np.random.default_rng(0)).astype(np.float32)
+    expected, baseline = measure(in_process, poses, 1, args.chunk_frames)
+    results = {'in_process': baseline}
+    print(f"{'in_process':<12} {baseline['seconds']:7.2f}s {baseline['fps']:8.1f} fps")
+    for workers in args.workers:
+        digest, result = measure(processes, poses, workers, args.chunk_frames)
+        assert digest == expected, f'{workers} workers rendered different frames'
+        results[f'workers_{workers}'] = result
+        print(f"{f'workers_{workers}':<12} {result['seconds']:7.2f}s {result['fps']:8.1f} fps "
+              f"(x{result['fps'] / baseline['fps']:.1f})")
+
+    report = {
+        'benchmark': 'parallel_render',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': parallel_render.available_cpus(),
+        },
+        # what create_video_using_visualizer picks for this sentence
+        'worker_count': parallel_render.worker_count(args.frames, args.chunk_frames),
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"worker_count picks {report['worker_count']} for {args.frames} frames")
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
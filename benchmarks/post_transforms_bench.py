@@ -0,0 +1,127 @@
+"""Latency of the flips and affine transforms of blending.post_transforms.
+
+Flips 134-keypoint pose sequences with ``fliplr_regression`` and heatmaps
+with ``flip_back``, with the permutation of the wholebody ``flip_indices``
+and, as a baseline, with the per-pair loop they used before. Transforms N
+instances of 134 keypoints with ``batch_affine_transform`` next to calling
+``affine_transform`` per point. Checks that the outputs match.
+
+    python benchmarks/post_transforms_bench.py --batch 1 8 32
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+from blending import post_transforms
+from blending.visualizer import coco_wholebody_openpose
+from blending.visualizer.utils import parse_pose_metainfo
+
+
+def loop_fliplr_regression(regression, flip_pairs):
+    """fliplr_regression as it was, with center_mode='static' around 0."""
+    regression_flipped = regression.copy()
+    for left, right in flip_pairs:
+        regression_flipped[..., left, :] = regression[..., right, :]
+        regression_flipped[..., right, :] = regression[..., left, :]
+    regression_flipped[..., 0] = -regression_flipped[..., 0]
+    return regression_flipped
+
+
+def loop_flip_back(output_flipped, flip_pairs):
+    """flip_back as it was, for GaussianHeatmap."""
+    output_flipped_back = output_flipped.copy()
+    for left, right in flip_pairs:
+        output_flipped_back[:, left, ...] = output_flipped[:, right, ...]
+        output_flipped_back[:, right, ...] = output_flipped[:, left, ...]
+    return output_flipped_back[..., ::-1]
+
+
+def loop_affine_transform(pts, trans_mats):
+    return np.array([[post_transforms.affine_transform(pt, trans_mat) for pt in instance]
+                     for instance, trans_mat in zip(pts, trans_mats)])
+
+
+def measure(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--frames', type=int, default=64)
+    parser.add_argument('--size', type=int, nargs=2, default=[64, 48], metavar=('H', 'W'))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output',
+                        default=os.path.join(BENCH_DIR, 'results', 'post_transforms.json'))
+    args = parser.parse_args()
+
+    metainfo = parse_pose_metainfo(coco_wholebody_openpose.dataset_info)
+    flip_pairs = [(int(left), int(right)) for left, right in metainfo['flip_pairs']]
+    permutation = post_transforms.flip_permutation(metainfo['flip_indices'])
+    num_keypoints = len(permutation)
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for batch in args.batch:
+        regression = rng.normal(0, 100, (batch, args.frames, num_keypoints, 2))
+        heatmaps = rng.random((batch, num_keypoints, *args.size)).astype(np.float32)
+        pts = rng.uniform(0, 1000, (batch, num_keypoints, 2))
+        trans_mats = rng.normal(0, 1, (batch, 2, 3))
+        cases = {
+            'fliplr_regression': (
+                lambda: loop_fliplr_regression(regression, flip_pairs),
+                lambda: post_transforms.fliplr_regression(
+                    regression, permutation, center_mode='static', center_x=0)),
+            'flip_back': (
+                lambda: loop_flip_back(heatmaps, flip_pairs),
+                lambda: post_transforms.flip_back(heatmaps, permutation)),
+            'affine_transform': (
+                lambda: loop_affine_transform(pts, trans_mats),
+                lambda: post_transforms.batch_affine_transform(pts, trans_mats)),
+        }
+        results[batch] = {}
+        for name, (loop, batched) in cases.items():
+            loop_ms, expected = measure(loop, args.repeats)
+            batched_ms, actual = measure(batched, args.repeats)
+            if not np.allclose(actual, expected):
+                sys.exit(f'{name} differs from the loop with a batch of {batch}')
+            results[batch][name] = {'loop_ms': round(loop_ms, 3),
+                                    'batched_ms': round(batched_ms, 3)}
+            print(f"N={batch:<3} {name:<18} loop {loop_ms:8.2f} ms  "
+                  f"batched {batched_ms:7.2f} ms  x{loop_ms / batched_ms:6.1f}")
+
+    report = {
+        'benchmark': 'post_transforms',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Parity check and benchmark of the blendedpose skeleton rendering.
+
+Renders the same synthetic COCO-WholeBody sequence with
+``PoseVisualizer._draw_instances_kpts_openpose`` and with the batched
+``SkeletonRenderer``, checks that the frames match within a pixel
+tolerance and reports the frames per second of both.
+
+    python benchmarks/render_bench.py --frames 300
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from blending import smooth_video
+from blending.visualizer import coco_wholebody_openpose
+from blending.visualizer.utils import parse_pose_metainfo
+from blending.visualizer.visualizer import PoseVisualizer
+
+FRAME_SIZE = (640, 480)
+
+
+def synthetic_poses(frames, rng):
+    """A signer facing the camera, waist up, moving the arms and hands.
+
+    Returns:
+        np.ndarray: COCO-WholeBody keypoints in shape [T, 133, 2].
+    """
+    t = np.arange(frames)[:, None]
+    body = np.array([
+        [320, 120], [305, 108], [335, 108], [290, 115], [350, 115],   # face
+        [260, 190], [380, 190], [230, 280], [410, 280],               # arms
+        [250, 360], [390, 360], [280, 420], [360, 420],               # wrists, hips
+        [280, 520], [360, 520], [280, 600], [360, 600],               # legs
+    ], dtype=np.float64)
+    poses = np.zeros((frames, 133, 2))
+    poses[:, :17] = body
+    # wave the forearms
+    poses[:, 7] += np.stack([20 * np.sin(t / 9), 15 * np.cos(t / 11)], -1)[:, 0]
+    poses[:, 8] += np.stack([20 * np.cos(t / 7), 15 * np.sin(t / 13)], -1)[:, 0]
+    poses[:, 9] = poses[:, 7] + np.stack([30 * np.sin(t / 5), -60 + 20 * np.cos(t / 6)], -1)[:, 0]
+    poses[:, 10] = poses[:, 8] + np.stack([30 * np.cos(t / 4), -60 + 20 * np.sin(t / 7)], -1)[:, 0]
+    # feet below the frame
+    poses[:, 17:23] = [[280, 640]] * 3 + [[360, 640]] * 3
+    # face contour around the nose
+    angles = np.linspace(0, 2 * np.pi, 68, endpoint=False)
+    poses[:, 23:91] = poses[:, :1] + np.stack([35 * np.cos(angles), 45 * np.sin(angles)], -1)
+    # hands fanned out of the wrists
+    fingers = np.array([[np.cos(a) * r, -np.sin(a) * r]
+                        for a in np.linspace(0.3, 2.8, 5) for r in (12, 22, 30, 38)])
+    for wrist, start in ((9, 91), (10, 112)):
+        poses[:, start] = poses[:, wrist]
+        poses[:, start + 1:start + 21] = poses[:, wrist:wrist + 1] + fingers
+    return poses + rng.normal(0, 1.0, poses.shape)
+
+
+def render_reference(poses):
+    parsed_config = parse_pose_metainfo(coco_wholebody_openpose.dataset_info)
+    visualizer = PoseVisualizer(
+        skeleton=parsed_config['skeleton_links'],
+        link_color=parsed_config['skeleton_link_colors'],
+        kpt_color=parsed_config['keypoint_colors'],
+        radius=4,
+        show_keypoint_weight=True,
+        line_width=5)
+    frames = []
+    for keypoints in poses:
+        img = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+        frames.append(visualizer._draw_instances_kpts_openpose(img, keypoints[None]))
+    return frames
+
+
+def render_batched(poses):
+    renderer = smooth_video.create_renderer()
+    frames = []
+    for keypoints in poses:
+        img = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+        frames.append(renderer.render(img, keypoints))
+    return frames
+
+
+def timed(render, poses):
+    start = time.perf_counter()
+    frames = render(poses)
+    return frames, len(poses) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--scores', action='store_true',
+                        help='add keypoint scores, drawn as translucent keypoints')
+    parser.add_argument('--max-diff-ratio', type=float, default=0.005,
+                        help='largest share of pixels allowed to differ by more '
+                             'than --pixel-tolerance')
+    parser.add_argument('--pixel-tolerance', type=int, default=2)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'render.json'))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    poses = synthetic_poses(args.frames, rng)
+    if args.scores:
+        poses = np.concatenate((poses, rng.uniform(0.2, 1.0, poses.shape[:-1] + (1,))), -1)
+
+    reference, reference_fps = timed(render_reference, poses)
+    batched, batched_fps = timed(render_batched, poses)
+
+    diff = np.abs(np.stack(reference).astype(np.int16) - np.stack(batched).astype(np.int16))
+    differing = (diff.max(-1) > args.pixel_tolerance).mean()
+    print(f"reference {reference_fps:8.1f} fps")
+    print(f"batched   {batched_fps:8.1f} fps (x{batched_fps / reference_fps:.1f})")
+    print(f"pixels differing by more than {args.pixel_tolerance}: {differing:.4%}, "
+          f"max difference {diff.max()}")
+
+    report = {
+        'benchmark': 'render',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': {
+            'reference_fps': round(reference_fps, 2),
+            'batched_fps': round(batched_fps, 2),
+            'differing_pixel_ratio': float(differing),
+            'max_pixel_difference': int(diff.max()),
+        },
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+    if differing > args.max_diff_ratio:
+        sys.exit(f"parity check failed: {differing:.4%} of the pixels differ")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Benchmark of the blendedpose segment cache.
+
+Seeds a local S3 stand-in (see local_aws.py) with packed keypoints of a
+vocabulary of synthetic signs, then renders the same random sentences with
+the segment cache disabled and enabled. Sign frequencies follow a Zipf law
+so that, as with real transcripts, common signs come back often. Reports
+the render time and the share of frames drawn and encoded.
+
+    python benchmarks/segment_cache_bench.py --sentences 50 --ffmpeg /usr/bin/ffmpeg
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(BENCH_DIR)
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from local_aws import LocalS3
+from render_bench import synthetic_poses
+from blending import keypoint_archive
+from blending import segment_cache
+from blending import smooth_video
+from blending import video_writer
+
+POSE_BUCKET = 'bench-pose'
+DATA_BUCKET = 'bench-data'
+PREFIX = 'lookup/keypoints/'
+
+
+def seed(s3, vocabulary, rng):
+    """Pack a sign of 30 to 90 frames per SignID."""
+    for sign_id in range(1, vocabulary + 1):
+        frames = int(rng.integers(30, 91))
+        poses = synthetic_poses(frames + sign_id, rng)[sign_id:]
+        poses = np.concatenate((poses, np.ones(poses.shape[:-1] + (1,))), -1)
+        s3.put_object(Bucket=POSE_BUCKET, Key=keypoint_archive.archive_key(f'{PREFIX}{sign_id}'),
+                      Body=keypoint_archive.pack(poses))
+
+
+def sentences(count, vocabulary, rng):
+    weights = 1 / np.arange(1, vocabulary + 1)
+    weights /= weights.sum()
+    return [[f'{PREFIX}{sign_id}'
+             for sign_id in rng.choice(np.arange(1, vocabulary + 1), int(rng.integers(3, 8)),
+                                       p=weights)]
+            for _ in range(count)]
+
+
+def render_all(workdir, folder_prefixes_list, cached):
+    os.environ['SEGMENT_CACHE'] = '1' if cached else '0'
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        for i, folder_prefixes in enumerate(folder_prefixes_list):
+            smooth_video.smooth_video(POSE_BUCKET, folder_prefixes,
+                                      os.path.join(workdir, f'{i}.webm'), 'webm')
+    elapsed = time.perf_counter() - start
+    frames = rendered = 0
+    for line in log.getvalue().splitlines():
+        if line.startswith('Rendered '):
+            words = line.split()
+            rendered += int(words[1])
+            frames += int(words[3])
+        elif line.startswith('Video saved as '):
+            count = int(line.split('(')[1].split()[0])
+            rendered += count
+            frames += count
+    return {
+        'seconds': round(elapsed, 3),
+        'frames': frames,
+        'rendered_frames': rendered,
+        'rendered_ratio': round(rendered / max(1, frames), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--vocabulary', type=int, default=40)
+    parser.add_argument('--sentences', type=int, default=50)
+    parser.add_argument('--ffmpeg', default=video_writer.ffmpeg_path)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'segment_cache.json'))
+    args = parser.parse_args()
+    if not os.path.exists(args.ffmpeg):
+        sys.exit(f'{args.ffmpeg} not found, the segment cache needs ffmpeg')
+    video_writer.ffmpeg_path = args.ffmpeg
+    video_writer.writer_backend = 'ffmpeg'
+    # a single process, the cache is about the work saved
+    smooth_video.parallel_render.render_workers = 1
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory(prefix='segment-cache-bench-') as workdir:
+        s3 = LocalS3(workdir)
+        seed(s3, args.vocabulary, rng)
+        smooth_video.s3_client = s3
+        segment_cache.cache_bucket = DATA_BUCKET
+        folder_prefixes_list = sentences(args.sentences, args.vocabulary, rng)
+
+        results = {
+            'uncached': render_all(workdir, folder_prefixes_list, cached=False),
+            # fills the cache
+            'cached_cold': render_all(workdir, folder_prefixes_list, cached=True),
+            'cached_warm': render_all(workdir, folder_prefixes_list, cached=True),
+        }
+    for name, result in results.items():
+        print(f"{name:<12} {result['seconds']:7.2f}s rendered {result['rendered_frames']:>6} "
+              f"of {result['frames']} frames ({result['rendered_ratio']:.0%})")
+
+    report = {
+        'benchmark': 'segment_cache',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Latency of SmoothNetFilter on CPU, per 100 frames.
+
+Smooths synthetic openpose tracks in shape [T, 134, 2] with the PyTorch
+model accumulating the window outputs in a Python loop (as the model did
+before the overlap-add became a single transposed convolution), with the
+current PyTorch model and, when onnxruntime is installed, with the model
+exported to ONNX. Each is run on batches of 1, 4 and 16 tracks, the tracks
+of a batch go through the model together, in forward passes of at most
+``--max-windows`` windows. The outputs of the three are checked against
+each other, and the peak resident memory of the process is reported.
+Needs torch.
+
+    python benchmarks/smoothnet_bench.py --frames 300 --batches 1 4 16
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(BENCH_DIR)
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+from filter_bench import openpose_poses
+from blending.temporal_filters import SmoothNetFilter
+
+try:
+    import torch
+except ImportError:
+    sys.exit('torch is not installed, SmoothNet needs it')
+from blending.temporal_filters.smoothnet import SmoothNet
+
+
+class LoopSmoothNet(SmoothNet):
+    """SmoothNet with the window outputs accumulated one window at a time."""
+
+    def forward(self, x):
+        N, C, T = x.shape
+        num_windows = T - self.window_size + 1
+        x = x.unfold(2, self.window_size, 1)
+        x = self.decoder(self.res_blocks(self.encoder(x)))
+        out = x.new_zeros(N, C, T)
+        count = x.new_zeros(T)
+        for t in range(num_windows):
+            out[..., t:t + self.output_size] += x[:, :, t]
+            count[t:t + self.output_size] += 1.0
+        return out.div(count)
+
+
+def measure(pose_filter, tracks, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        smoothed = pose_filter.smooth_batch(tracks)
+        timings.append(time.perf_counter() - start)
+    frames = sum(len(track) for track in tracks)
+    return min(timings) / frames * 100 * 1000, smoothed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--window-size', type=int, default=32)
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--max-windows', type=int, default=65536,
+                        help='SmoothNetFilter max_windows, 0 for one pass per batch')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='torch intra-op threads, the Lambda vCPUs')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'smoothnet.json'))
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    max_windows = args.max_windows or sys.maxsize
+    torch.manual_seed(0)
+    pose_filter = SmoothNetFilter(args.window_size, args.window_size, max_windows=max_windows)
+    loop_filter = SmoothNetFilter(args.window_size, args.window_size, max_windows=max_windows)
+    loop_filter.smoothnet = LoopSmoothNet(args.window_size, args.window_size).eval()
+    loop_filter.smoothnet.load_state_dict(pose_filter.smoothnet.state_dict())
+    filters = {'loop': loop_filter, 'vectorized': pose_filter}
+
+    workdir = tempfile.TemporaryDirectory(prefix='smoothnet-bench-')
+    try:
+        import onnxruntime  # noqa: F401
+        graph = os.path.join(workdir.name, 'smoothnet.onnx')
+        pose_filter.export(graph)
+        filters['onnx'] = SmoothNetFilter(args.window_size, args.window_size, graph=graph,
+                                          max_windows=max_windows)
+    except ImportError:
+        print('onnxruntime is not installed, skipping the ONNX graph')
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for batch in args.batches:
+        tracks = [openpose_poses(args.frames, rng) for _ in range(batch)]
+        results[batch] = {}
+        reference = None
+        for name, smoothnet_filter in filters.items():
+            ms, smoothed = measure(smoothnet_filter, tracks, args.repeats)
+            if reference is None:
+                reference = smoothed
+            error = max(float(np.abs(a - b).max()) for a, b in zip(smoothed, reference))
+            if error > 1e-3:
+                sys.exit(f'{name} differs from the loop by {error} px')
+            results[batch][name] = round(ms, 3)
+        print(f"batch {batch:<3} " + '  '.join(f"{name}={ms:.2f} ms/100 frames"
+                                              for name, ms in results[batch].items()))
+    workdir.cleanup()
+    # kilobytes on Linux
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak resident memory {max_rss_mb:.0f} MB")
+
+    report = {
+        'benchmark': 'smoothnet',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'torch': torch.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'torch_threads': torch.get_num_threads(),
+        },
+        'results': results,
+        'max_rss_mb': round(max_rss_mb),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
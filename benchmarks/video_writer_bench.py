@@ -0,0 +1,112 @@
+"""Benchmark of the blendedpose video encoding.
+
+Renders a synthetic sentence (see render_bench.py) and compares the former
+serial loop, a new frame per ``np.zeros`` drawn then written through
+``cv2.VideoWriter``, with ``video_writer.write_frames`` which renders into a
+frame pool in a producer thread and streams the frames to ffmpeg.
+
+    python benchmarks/video_writer_bench.py --frames 300 --ffmpeg /usr/bin/ffmpeg
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(BENCH_DIR, '..', 'amplify', 'custom', 'functions')
+sys.path.append(BENCH_DIR)
+sys.path.append(os.path.join(FUNCTIONS_DIR, 'blendedpose'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from render_bench import FRAME_SIZE, synthetic_poses
+from blending import smooth_video
+from blending import video_writer
+
+
+def serial_opencv(poses, output_file, file_type, args):
+    renderer = smooth_video.create_renderer()
+    out = cv2.VideoWriter(output_file, cv2.VideoWriter_fourcc(*video_writer.FOURCCS[file_type]),
+                          30, FRAME_SIZE)
+    for keypoints in poses:
+        img = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+        out.write(renderer.render(img, keypoints))
+    out.release()
+
+
+def pipelined(backend):
+    def run(poses, output_file, file_type, args):
+        renderer = smooth_video.create_renderer()
+        options = {} if backend == 'opencv' else {
+            'deadline': args.deadline, 'cpu_used': args.cpu_used, 'threads': args.threads}
+        with video_writer.open_writer(output_file, file_type, FRAME_SIZE, 30,
+                                      backend=backend, **options) as writer:
+            video_writer.write_frames(writer, renderer.render, poses,
+                                      (FRAME_SIZE[1], FRAME_SIZE[0], 3), args.pool_size)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--file-type', default='webm', choices=sorted(video_writer.CODECS))
+    parser.add_argument('--ffmpeg', default=video_writer.ffmpeg_path)
+    parser.add_argument('--deadline', default=video_writer.video_deadline)
+    parser.add_argument('--cpu-used', type=int, default=video_writer.video_cpu_used)
+    parser.add_argument('--threads', type=int, default=video_writer.video_threads)
+    parser.add_argument('--pool-size', type=int, default=video_writer.frame_pool_size)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'video_writer.json'))
+    args = parser.parse_args()
+    video_writer.ffmpeg_path = args.ffmpeg
+
+    poses = synthetic_poses(args.frames, np.random.default_rng(0))
+    runs = {
+        'serial_opencv': serial_opencv,
+        'pipelined_opencv': pipelined('opencv'),
+    }
+    if os.path.exists(args.ffmpeg):
+        runs['pipelined_ffmpeg'] = pipelined('ffmpeg')
+    else:
+        print(f"{args.ffmpeg} not found, skipping the ffmpeg writer")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='video-writer-bench-') as workdir:
+        for name, run in runs.items():
+            output_file = os.path.join(workdir, f'{name}.{args.file_type}')
+            start = time.perf_counter()
+            run(poses, output_file, args.file_type, args)
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                'seconds': round(elapsed, 3),
+                'fps': round(args.frames / elapsed, 1),
+                'bytes': os.path.getsize(output_file),
+            }
+            print(f"{name:<18} {elapsed:7.2f}s {args.frames / elapsed:8.1f} fps "
+                  f"{results[name]['bytes']:>10} bytes")
+
+    report = {
+        'benchmark': 'video_writer',
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import concurrent.futures
+import configparser
+import os
+import subprocess
+import tempfile
+
+import boto3
+
+config_parser = configparser.ConfigParser()
+config_parser.read("config.ini")
+config = config_parser['DEFAULT']
+
+bucket_name = config['s3_bucket']
+lookup_key = f"{config['s3_prefix']}/gloss2pose/lookup/"
+mezzanine_key = f"{lookup_key}mezzanine/"
+# one H.264 MPEG-TS segment per sign for the gloss2pose HLS output mode
+hls_key = f"{lookup_key}hls/"
+# lookup folders gloss2pose reads the sign, pose and avatar clips from
+LOOKUP_FOLDERS = ("sign", "pose2", "avatar")
+
+# Every mezzanine clip is encoded with exactly these parameters so that
+# gloss2pose can join them with the concat demuxer and `-c copy`
+# (CONCAT_MODE=copy) instead of re-encoding the whole sentence.
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+FRAME_RATE = 30
+PIXEL_FORMAT = "yuv420p"
+CRF = 32
+
+s3_client = boto3.client('s3')
+
+
+def normalize_clip(from_file, to_file):
+    """
+    re-encode @from_file as a VP9 webm with the mezzanine resolution, frame
+    rate and pixel format, starting on a keyframe
+    """
+    video_filter = (
+        f"scale={FRAME_WIDTH}:{FRAME_HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={FRAME_WIDTH}:{FRAME_HEIGHT}:(ow-iw)/2:(oh-ih)/2,"
+        f"setsar=1,fps={FRAME_RATE},format={PIXEL_FORMAT}"
+    )
+    ffmpeg_args = [
+        "ffmpeg", "-y",
+        "-i", from_file,
+        "-vf", video_filter,
+        "-c:v", "libvpx-vp9",
+        "-b:v", "0", "-crf", str(CRF),
+        "-force_key_frames", "expr:eq(n,0)",
+        "-an",
+        to_file
+    ]
+    subprocess.run(ffmpeg_args, shell=False, check=True, capture_output=True)
+    return to_file
+
+
+def segment_clip(from_file, to_file):
+    """
+    encode @from_file as a single H.264 MPEG-TS HLS segment and return its
+    duration in seconds
+    """
+    ffmpeg_args = [
+        "ffmpeg", "-y",
+        "-i", from_file,
+        "-vf", f"fps={FRAME_RATE},format={PIXEL_FORMAT}",
+        "-c:v", "libx264", "-preset", "veryfast",
+        "-force_key_frames", "expr:eq(n,0)",
+        "-an",
+        "-f", "mpegts",
+        to_file
+    ]
+    subprocess.run(ffmpeg_args, shell=False, check=True, capture_output=True)
+    ffprobe_args = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        to_file
+    ]
+    result = subprocess.run(ffprobe_args, shell=False, check=True, capture_output=True)
+    return float(result.stdout)
+
+
+def process_file(key):
+    folder, file_name = key[len(lookup_key):].split("/", 1)
+    stem = os.path.splitext(file_name)[0]
+    to_key = f"{mezzanine_key}{folder}/{stem}.webm"
+    segment_key = f"{hls_key}{folder}/{stem}.ts"
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = os.path.join(tmpdir, file_name)
+        to_file = os.path.join(tmpdir, f"{stem}.webm")
+        segment_file = os.path.join(tmpdir, f"{stem}.ts")
+        s3_client.download_file(bucket_name, key, source_file)
+        try:
+            normalize_clip(source_file, to_file)
+            duration = segment_clip(source_file, segment_file)
+        except subprocess.CalledProcessError as e:
+            print(f"Error normalizing {key}: {e.stderr.decode()}")
+            return None
+        s3_client.upload_file(to_file, bucket_name, to_key)
+        # gloss2pose reads the duration back to write the playlist
+        s3_client.upload_file(segment_file, bucket_name, segment_key, ExtraArgs={
+            'ContentType': 'video/mp2t',
+            'Metadata': {'duration': f"{duration:.3f}"}
+        })
+    print(f"uploaded files {to_key} {segment_key}")
+    return to_key
+
+
+def list_clips(folder):
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=f"{lookup_key}{folder}/"):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith(".mp4"):
+                yield obj['Key']
+
+
+def convert():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for folder in LOOKUP_FOLDERS:
+            list(executor.map(process_file, list_clips(folder)))
+
+
+if __name__ == '__main__':
+    convert()
@@ -0,0 +1,45 @@
+import configparser
+import os
+import sys
+from collections import defaultdict
+
+import boto3
+
+sys.path.append(os.path.join(os.path.dirname(__file__),
+                             "../amplify/custom/functions/layers/common/python"))
+from genasl.gloss_index import write_index
+
+config_parser = configparser.ConfigParser()
+config_parser.read("config.ini")
+config = config_parser['DEFAULT']
+
+# the index ships with the common layer, next to the resolver that reads it
+INDEX_FILE = os.path.join(
+    os.path.dirname(__file__),
+    "../amplify/custom/functions/layers/common/python/genasl/gloss_index.bin")
+
+boto3.setup_default_session(region_name=config['region'])
+dynamodb_client = boto3.client('dynamodb')
+
+
+def scan_glosses(table_name):
+    """
+    read every Gloss -> SignID row written by create_sign_videos.py
+    """
+    mapping = defaultdict(list)
+    paginator = dynamodb_client.get_paginator('scan')
+    for page in paginator.paginate(TableName=table_name,
+                                   ProjectionExpression='Gloss, SignID'):
+        for item in page['Items']:
+            mapping[item['Gloss']['S']].append(int(item['SignID']['N']))
+    return mapping
+
+
+def export(index_file=INDEX_FILE):
+    mapping = scan_glosses(config["table_name"])
+    write_index(mapping, index_file)
+    print(f"exported {len(mapping)} glosses to {index_file}")
+
+
+if __name__ == '__main__':
+    export(*sys.argv[1:])
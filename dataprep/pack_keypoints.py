@@ -0,0 +1,70 @@
+import concurrent.futures
+import configparser
+import io
+import os
+import sys
+from collections import defaultdict
+
+import boto3
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "../amplify/custom/functions/blendedpose"))
+from blending import keypoint_archive
+
+config_parser = configparser.ConfigParser()
+config_parser.read("config.ini")
+config = config_parser['DEFAULT']
+
+bucket_name = config['s3_bucket']
+# per-frame layout read by blendedpose: keypoints/<SignID>/<frame>.npy
+keypoints_key = f"{config['s3_prefix']}/gloss2pose/lookup/keypoints/"
+# float16 halves the archives, coordinates keep a 0.5 px precision up to 1024
+ARCHIVE_DTYPE = os.environ.get('ARCHIVE_DTYPE', 'float32')
+
+s3_client = boto3.client('s3')
+
+
+def frame_number(key):
+    return int(os.path.splitext(os.path.basename(key))[0])
+
+
+def list_signs():
+    """
+    group the per-frame .npy keys by sign folder
+    """
+    signs = defaultdict(list)
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=keypoints_key):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith(".npy"):
+                signs[os.path.dirname(obj['Key'])].append(obj['Key'])
+    return signs
+
+
+def pack_sign(folder_prefix, keys):
+    # frame order is numeric, S3 lists 10.npy before 2.npy
+    keys = sorted(keys, key=frame_number)
+    frames = []
+    for key in keys:
+        body = s3_client.get_object(Bucket=bucket_name, Key=key)['Body'].read()
+        frames.append(np.load(io.BytesIO(body))[0])
+    to_key = keypoint_archive.archive_key(folder_prefix)
+    s3_client.put_object(
+        Bucket=bucket_name,
+        Key=to_key,
+        Body=keypoint_archive.pack(np.stack(frames), dtype=ARCHIVE_DTYPE),
+        ContentType='application/octet-stream'
+    )
+    print(f"packed {len(frames)} frames into {to_key}")
+    return to_key
+
+
+def convert():
+    signs = list_signs()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() * 4) as executor:
+        list(executor.map(pack_sign, signs.keys(), signs.values()))
+
+
+if __name__ == '__main__':
+    convert()